@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODULES = ('params.pipeline_params',
+           'source.libs.pipeline_params_manager',
+           'source.libs.work_queue',
+           'source.libs.training_scheduler',
+           'source.libs.data_manager')
+HEAVY_MODULES = ('keras', 'pandas', 'sqlalchemy', 'git')
+REPETITIONS = 5
+
+
+def measure(statement: str, env: dict[str, str]) -> tuple[float, list[str]]:
+    # best of several fresh interpreters, plus the heavy modules that ended up loaded
+    probe = f'{statement}\nimport sys\nprint(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    best_time = float('inf')
+    loaded_modules = []
+    for _ in range(REPETITIONS):
+        start_time = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-c', probe], cwd=REPO_ROOT, env=env,
+                                   capture_output=True, text=True)
+        elapsed_time = time.perf_counter() - start_time
+        if completed.returncode != 0:
+            return float('nan'), [completed.stderr.strip().splitlines()[-1]]
+        best_time = min(best_time, elapsed_time)
+        loaded_modules = list(filter(None, completed.stdout.strip().split(',')))
+    return best_time, loaded_modules
+
+
+def report(label: str, elapsed_time: float, loaded_modules: list[str]):
+    if elapsed_time != elapsed_time:  # nan: the statement failed
+        print(f'{label:<60}{"failed":>13}  {loaded_modules[0]}')
+    else:
+        print(f'{label:<60}{elapsed_time * 1000:>10.1f} ms  heavy: {", ".join(loaded_modules) or "-"}')
+
+
+def main():
+    env = {**os.environ, 'PYTHONPATH': str(REPO_ROOT)}
+    report('interpreter baseline', *measure('pass', env))
+    for module in MODULES:
+        report(f'import {module}', *measure(f'import {module}', env))
+    for heavy_module in HEAVY_MODULES:
+        report(f'(reference) import {heavy_module}', *measure(f'import {heavy_module}', env))
+
+    code_version_statement = 'from source.libs.helper import Helper\nHelper.get_code_version()\nHelper.get_code_version()'
+    report('get_code_version x2 (env override)',
+           *measure(code_version_statement, {**env, 'AITTD_CODE_VERSION': 'benchmark'}))
+    report('get_code_version x2 (git)', *measure(code_version_statement, env))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from source.db_tables import Params, Layers, Training, EpochMetrics  # noqa: E402
+from source.libs.db_manager import DBManager  # noqa: E402
+from source.libs.leaderboard import Leaderboard  # noqa: E402
+
+CODE_VERSION = 'synthetic-history'
+WINDOW_WIDTHS = (30, 60, 120, 300, 600)
+UNITS = (8, 16, 32, 64, 128)
+
+
+def build_params(runs_count: int, random_generator: random.Random) -> Iterator[Params]:
+    for run_index in range(runs_count):
+        yield Params(Hash=f'synthetic-{run_index}',
+                     CodeVersion=CODE_VERSION,
+                     WindowWidth=random_generator.choice(WINDOW_WIDTHS),
+                     FitMaxEpochs=random_generator.randint(5, 50))
+
+
+def build_results(db_manager: DBManager,
+                  epochs_count: int,
+                  random_generator: random.Random) -> tuple[Iterator[Layers], Iterator[EpochMetrics], Iterator[Training]]:
+    # three passes over the streamed ids, so nothing is held for the whole history
+    def iter_params_ids() -> Iterator[int]:
+        for ids_chunk in db_manager.iter_columns([Params.ID], [Params.CodeVersion == CODE_VERSION],
+                                                 output_format='pandas'):
+            yield from ids_chunk['ID'].tolist()
+
+    def build_layers() -> Iterator[Layers]:
+        for params_id in iter_params_ids():
+            for layer_index in range(random_generator.randint(1, 3)):
+                yield Layers(ParamsID=params_id, LayerIndex=layer_index, Units=random_generator.choice(UNITS))
+
+    def build_epoch_metrics() -> Iterator[EpochMetrics]:
+        for params_id in iter_params_ids():
+            base_loss = random_generator.uniform(0.05, 1.0)
+            for epoch in range(epochs_count):
+                yield EpochMetrics(ParamsID=params_id, Epoch=epoch,
+                                   Loss=base_loss / (epoch + 1),
+                                   ValLoss=base_loss / (epoch + 1) * random_generator.uniform(1.0, 1.3),
+                                   WallTimeInSec=float(epoch + 1))
+
+    def build_training() -> Iterator[Training]:
+        for params_id in iter_params_ids():
+            yield Training(ParamsID=params_id, DurationInSec=random_generator.randint(10, 3600), ModelPath='-')
+
+    return build_layers(), build_epoch_metrics(), build_training()
+
+
+def timed(label: str, function, *args, **kwargs):
+    start_time = time.perf_counter()
+    output = function(*args, **kwargs)
+    print(f'{label:<50}{time.perf_counter() - start_time:>10.3f} s')
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Leaderboard refresh and top-k queries over a synthetic history. '
+                                                 'Use a dedicated database: synthetic runs are left in place.')
+    parser.add_argument('--runs', type=int, default=1_000_000)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--drivername', default='postgresql')
+    parser.add_argument('--dbname', required=True)
+    parser.add_argument('--username')
+    parser.add_argument('--host', default='localhost')
+    arguments = parser.parse_args()
+
+    logs_folder = Path(tempfile.mkdtemp(prefix='leaderboard_history_'))
+    db_manager = DBManager(config={'conn_drivername': arguments.drivername,
+                                   'conn_dbname': arguments.dbname,
+                                   'conn_username': arguments.username,
+                                   'conn_host': arguments.host,
+                                   'logs_folder': logs_folder})
+    leaderboard = Leaderboard(config={'dbconn_username': arguments.username,
+                                      'dbconn_dbname': arguments.dbname,
+                                      'code_version': CODE_VERSION,
+                                      'logs_folder': logs_folder},
+                              db_manager=db_manager)
+
+    random_generator = random.Random(arguments.seed)
+    print(timed('insert params', db_manager.bulk_insert, build_params(arguments.runs, random_generator)))
+    layers, epoch_metrics, training = build_results(db_manager, arguments.epochs, random_generator)
+    print(timed('insert layers', db_manager.bulk_insert, layers))
+    print(timed('insert epoch metrics', db_manager.bulk_insert, epoch_metrics))
+    print(timed('insert training', db_manager.bulk_insert, training))
+
+    print(f'summaries: {timed("refresh", leaderboard.refresh)}')
+    for group_by in (None, 'StackShape', 'WindowWidth', 'LayersCount'):
+        top_k = timed(f'top {arguments.top_k} (group by: {group_by})', leaderboard.get_top_k, arguments.top_k, group_by)
+        print(top_k.head(3).to_string(index=False))
+
+    leaderboard.destroy()
+    db_manager.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,3 @@
-import keras
-
 from source.libs.helper import Helper
 from source.types.pipeline_params_types import (LayerParamsCombinations,
                                                 PipelineParamsCombinations)
@@ -9,6 +7,8 @@ class InputPipelineParams:
 
     @staticmethod
     def get() -> PipelineParamsCombinations:
+        import keras  # deferred: loading the backend takes seconds
+
         output_layer = 0
         return PipelineParamsCombinations(
             ColumnToPredict=['Oracle'],
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import String, DateTime, Integer, Boolean, ForeignKey, UniqueConstraint
+from sqlalchemy import String, DateTime, Integer, Boolean, Float, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import mapped_column, relationship
 
 from source.libs.db_manager import DBManager
@@ -38,7 +38,11 @@ class Params(DBManager.Base):
     training_rel = relationship('Training', back_populates='params_rel')
     states_rel = relationship('States', back_populates='params_rel')
     layers_rel = relationship('Layers', back_populates='params_rel')
-    __table_args__ = (UniqueConstraint('Hash', 'CodeVersion'),)
+    searchRungs_rel = relationship('SearchRungs', back_populates='params_rel')
+    epochMetrics_rel = relationship('EpochMetrics', back_populates='params_rel')
+    runSummaries_rel = relationship('RunSummaries', back_populates='params_rel')
+    __table_args__ = (UniqueConstraint('Hash', 'CodeVersion'),
+                      Index('ix_Params_CodeVersion_WindowWidth', 'CodeVersion', 'WindowWidth'))
 
 
 class Layers(DBManager.Base):
@@ -69,8 +73,62 @@ class States(DBManager.Base):
     __tablename__ = 'States'
     ParamsID = mapped_column(ForeignKey(Params.ID), primary_key=True)
     Status = mapped_column(ForeignKey(EnumStatus.ID))
-    SetBy = mapped_column(String(64))  # hostname
+    SetBy = mapped_column(String(64))  # worker name
+    LeaseExpiresOn = mapped_column(DateTime())
+    Attempts = mapped_column(Integer(), default=0)
     CreatedOn = mapped_column(DateTime(), default=datetime.now)
     UpdatedOn = mapped_column(DateTime(), default=datetime.now, onupdate=datetime.now)
     params_rel = relationship('Params', back_populates='states_rel')
     enumStatus_rel = relationship('EnumStatus', back_populates='states_rel')
+    __table_args__ = (Index('ix_States_Status_LeaseExpiresOn', 'Status', 'LeaseExpiresOn'),)
+
+
+class SearchRungs(DBManager.Base):
+    __tablename__ = 'SearchRungs'
+    ID = mapped_column(Integer(), primary_key=True)
+    SearchName = mapped_column(String(128), nullable=False)
+    ParamsID = mapped_column(ForeignKey(Params.ID), nullable=False)
+    Bracket = mapped_column(Integer(), nullable=False)
+    Rung = mapped_column(Integer(), nullable=False)
+    Budget = mapped_column(Integer())  # FitMaxEpochs
+    Score = mapped_column(Float())
+    Promoted = mapped_column(Boolean())
+    CreatedOn = mapped_column(DateTime(), default=datetime.now)
+    UpdatedOn = mapped_column(DateTime(), default=datetime.now, onupdate=datetime.now)
+    params_rel = relationship('Params', back_populates='searchRungs_rel')
+    __table_args__ = (UniqueConstraint('SearchName', 'Bracket', 'Rung', 'ParamsID'),)
+
+
+class EpochMetrics(DBManager.Base):
+    __tablename__ = 'EpochMetrics'
+    ParamsID = mapped_column(ForeignKey(Params.ID), primary_key=True)
+    Epoch = mapped_column(Integer(), primary_key=True)
+    Loss = mapped_column(Float())
+    ValLoss = mapped_column(Float())
+    WallTimeInSec = mapped_column(Float())  # since the beginning of the training
+    CreatedOn = mapped_column(DateTime(), default=datetime.now)
+    UpdatedOn = mapped_column(DateTime(), default=datetime.now, onupdate=datetime.now)
+    params_rel = relationship('Params', back_populates='epochMetrics_rel')
+    __table_args__ = (Index('ix_EpochMetrics_Epoch', 'Epoch'),)
+
+
+class RunSummaries(DBManager.Base):
+    # denormalized per-run results, rebuilt by Leaderboard.refresh
+    __tablename__ = 'RunSummaries'
+    ParamsID = mapped_column(ForeignKey(Params.ID), primary_key=True)
+    CodeVersion = mapped_column(String(64), nullable=False)
+    WindowWidth = mapped_column(Integer())
+    StackShape = mapped_column(String(256))  # units per layer, e.g. "64-32-1"
+    LayersCount = mapped_column(Integer())
+    BestValLoss = mapped_column(Float())
+    BestLoss = mapped_column(Float())
+    EpochsCount = mapped_column(Integer())
+    DurationInSec = mapped_column(Integer())
+    CreatedOn = mapped_column(DateTime(), default=datetime.now)
+    UpdatedOn = mapped_column(DateTime(), default=datetime.now, onupdate=datetime.now)
+    params_rel = relationship('Params', back_populates='runSummaries_rel')
+    __table_args__ = (Index('ix_RunSummaries_CodeVersion_BestValLoss', 'CodeVersion', 'BestValLoss'),
+                      Index('ix_RunSummaries_CodeVersion_StackShape_BestValLoss',
+                            'CodeVersion', 'StackShape', 'BestValLoss'),
+                      Index('ix_RunSummaries_CodeVersion_WindowWidth_BestValLoss',
+                            'CodeVersion', 'WindowWidth', 'BestValLoss'))
@@ -0,0 +1,187 @@
+import hashlib
+import os
+import shutil
+import threading
+from collections.abc import Sequence, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import dacite
+import numpy
+
+from source.libs.helper import Helper
+
+
+@dataclass
+class Config:
+    folder: Path
+    max_bytes: Optional[int] = None  # None: garbage collection only removes what is requested
+    extracted_max_bytes: int = 8 * 1024 * 1024 * 1024  # 8gb
+    uri_scheme: str = 'artifact'
+    lock_filename: str = 'artifact_store.lock'
+
+
+class ArtifactNotFound(FileNotFoundError):
+    pass
+
+
+class ArtifactStore:
+    # the filesystem is the index: one file per digest, whose mtime is its last access; whatever removes files,
+    # or maps the extracted ones, holds the store lock
+
+    def __init__(self, config: dict):
+        self.__config = dacite.from_dict(Config, config)
+        self.__folder = Helper.ensure_folder(str(self.__config.folder))
+        self.__objects_folder = Helper.ensure_folder(str(self.__folder / 'objects'))
+        self.__extracted_folder = Helper.ensure_folder(str(self.__folder / 'extracted'))
+        self.__lock_path = self.__folder / self.__config.lock_filename
+
+    def __get_object_path(self, digest: str) -> Path:
+        return self.__objects_folder / digest[:2] / f'{digest}.npz'
+
+    def __get_extracted_path(self, digest: str) -> Path:
+        return self.__extracted_folder / digest
+
+    @staticmethod
+    def get_digest(arrays: Sequence[numpy.ndarray]) -> str:
+        # over dtypes, shapes and raw bytes, so identical weights match whatever the compression produced
+        digest = hashlib.blake2b(digest_size=20)
+        for array in arrays:
+            array = numpy.ascontiguousarray(array)
+            digest.update(f'{array.dtype.str}{array.shape}'.encode('utf-8'))
+            digest.update(memoryview(array).cast('B'))
+        return digest.hexdigest()
+
+    def build_uri(self, digest: str) -> str:
+        return f'{self.__config.uri_scheme}:{digest}'
+
+    def is_uri(self, value: str) -> bool:
+        return value.startswith(f'{self.__config.uri_scheme}:')
+
+    def parse_uri(self, uri_or_digest: str) -> str:
+        return uri_or_digest[len(self.__config.uri_scheme) + 1:] if self.is_uri(uri_or_digest) else uri_or_digest
+
+    def put(self, arrays: Sequence[numpy.ndarray]) -> str:
+        digest = self.get_digest(arrays)
+        object_path = self.__get_object_path(digest)
+        with Helper.lock_file(self.__lock_path):
+            if object_path.exists():
+                os.utime(object_path)
+                return self.build_uri(digest)
+
+        # compressed without holding the lock, then checked again and published in one critical section, since
+        # another writer may have published it or garbage collection may have removed it in between
+        object_path.parent.mkdir(exist_ok=True)
+        temporary_path = object_path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp.npz')
+        numpy.savez_compressed(temporary_path, *arrays)
+        with Helper.lock_file(self.__lock_path):
+            if object_path.exists():
+                os.utime(object_path)
+                temporary_path.unlink()
+            else:
+                os.replace(temporary_path, object_path)
+        return self.build_uri(digest)
+
+    def __extract(self, digest: str):
+        # decompressed once into plain .npy files, which can then be memory-mapped
+        extracted_path = self.__get_extracted_path(digest)
+        shutil.rmtree(extracted_path, ignore_errors=True)  # what is left of an interrupted removal
+        temporary_path = extracted_path.with_name(f'{digest}.{os.getpid()}.tmp')
+        temporary_path.mkdir(exist_ok=True)
+        with numpy.load(self.__get_object_path(digest)) as compressed_arrays:
+            for array_index in range(len(compressed_arrays.files)):
+                numpy.save(temporary_path / f'{array_index}.npy', compressed_arrays[f'arr_{array_index}'])
+        os.rename(temporary_path, extracted_path)
+
+    def __map_extracted(self, digest: str) -> list[numpy.ndarray]:
+        # empty when not extracted or incomplete; mapped arrays stay valid once their files are unlinked
+        extracted_path = self.__get_extracted_path(digest)
+        arrays_count = len(list(extracted_path.glob('*.npy')))
+        try:
+            return [numpy.load(extracted_path / f'{array_index}.npy', mmap_mode='r')
+                    for array_index in range(arrays_count)]
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def __get_folder_bytes(path: Path) -> int:
+        return sum(map(lambda file_path: (file_path.stat().st_size), path.iterdir()))
+
+    def __evict_extracted(self, protected_digest: str):
+        # extracted copies follow the last access of their compressed object
+        extracted_entries = []
+        for extracted_path in self.__extracted_folder.iterdir():
+            digest = extracted_path.name
+            object_path = self.__get_object_path(digest)
+            if extracted_path.suffix == '.tmp' or digest == protected_digest:
+                continue
+            last_access = object_path.stat().st_mtime if object_path.exists() else 0
+            extracted_entries.append((last_access, extracted_path, self.__get_folder_bytes(extracted_path)))
+
+        protected_path = self.__get_extracted_path(protected_digest)
+        extracted_bytes = sum(map(lambda entry: (entry[2]), extracted_entries)) + self.__get_folder_bytes(
+            protected_path)
+        for _, extracted_path, folder_bytes in sorted(extracted_entries, key=lambda entry: (entry[0])):
+            if extracted_bytes <= self.__config.extracted_max_bytes:
+                break
+            # arrays already mapped stay valid: the files are only unlinked
+            shutil.rmtree(extracted_path, ignore_errors=True)
+            extracted_bytes -= folder_bytes
+
+    def load(self, uri_or_digest: str, mmap: bool = True) -> list[numpy.ndarray]:
+        digest = self.parse_uri(uri_or_digest)
+        object_path = self.__get_object_path(digest)
+        with Helper.lock_file(self.__lock_path):
+            if not object_path.exists():
+                raise ArtifactNotFound(f'Artifact not found: "{digest}".')
+            os.utime(object_path)
+
+            arrays = self.__map_extracted(digest)
+            if len(arrays) == 0:
+                self.__extract(digest)
+                self.__evict_extracted(protected_digest=digest)
+                arrays = self.__map_extracted(digest)
+            if len(arrays) == 0:
+                raise ArtifactNotFound(f'Artifact has no arrays: "{digest}".')
+
+        # copied outside the lock
+        return arrays if mmap else [numpy.array(array) for array in arrays]
+
+    def __list_objects(self) -> list[tuple[float, str, int]]:
+        objects = []
+        for object_path in self.__objects_folder.glob('*/*.npz'):
+            if not object_path.name.endswith('.tmp.npz'):
+                object_stat = object_path.stat()
+                objects.append((object_stat.st_mtime, object_path.stem, object_stat.st_size))
+        return objects
+
+    def collect_garbage(self,
+                        protected: Iterable[str],
+                        max_bytes: Optional[int] = None,
+                        remove_unprotected: bool = False) -> int:
+        # least recently used unprotected artifacts go first, until the store fits in max_bytes
+        protected_digests = set(map(self.parse_uri, protected))
+        max_bytes = max_bytes if max_bytes is not None else self.__config.max_bytes
+        freed_bytes = 0
+        with Helper.lock_file(self.__lock_path):
+            objects = self.__list_objects()
+            total_bytes = sum(map(lambda entry: (entry[2]), objects))
+            for _, digest, object_bytes in sorted(objects, key=lambda entry: (entry[0])):
+                if not remove_unprotected and (max_bytes is None or total_bytes <= max_bytes):
+                    break
+                if digest in protected_digests:
+                    continue
+                self.__get_object_path(digest).unlink(missing_ok=True)
+                shutil.rmtree(self.__get_extracted_path(digest), ignore_errors=True)
+                total_bytes -= object_bytes
+                freed_bytes += object_bytes
+        return freed_bytes
+
+    def get_usage(self) -> dict[str, int]:
+        with Helper.lock_file(self.__lock_path):
+            objects = self.__list_objects()
+            extracted_paths = [path for path in self.__extracted_folder.iterdir() if path.suffix != '.tmp']
+            return {'objects': len(objects),
+                    'bytes': sum(map(lambda entry: (entry[2]), objects)),
+                    'extracted_bytes': sum(map(self.__get_folder_bytes, extracted_paths))}
@@ -0,0 +1,175 @@
+import asyncio
+from collections.abc import Sequence, Iterable, Mapping, AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Optional, Any, TYPE_CHECKING
+
+from sqlalchemy import BinaryExpression, select, update
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from source.db_tables import States
+from source.libs.base_class import BaseConfig, VerboseLevel, base_async_method, BaseClass
+from source.libs.db_manager import DBManager, RecordsMismatchException, DEFAULT_SQLITE_PRAGMAS
+from source.libs.engine_registry import EngineRegistry
+from source.libs.helper import Helper
+from source.types.db_types import InsertResult
+from source.types.logger_types import TermLoggerType
+
+if TYPE_CHECKING:
+    import pandas
+
+
+@dataclass
+class Config(BaseConfig):
+    conn_dbname: str  # the database file for sqlite
+    conn_username: Optional[str] = None
+    conn_host: str = 'localhost'
+    conn_drivername: str = 'postgresql+psycopg'  # must be an asyncio capable driver, e.g. 'sqlite+aiosqlite'
+    record_autofill_field_names: Sequence[str] = ('ID', 'CreatedOn', 'UpdatedOn')
+    insert_chunk_size: int = 1000
+    max_concurrent_writes: int = 8
+    pool_size: int = 8
+    pool_max_overflow: int = 0
+    pool_pre_ping: bool = True
+    pool_recycle_in_sec: int = 1800  # -1: connections are never recycled
+    sqlite_pragmas: dict[str, str | int] = field(default_factory=lambda: dict(DEFAULT_SQLITE_PRAGMAS))
+
+
+class AsyncDBManager(BaseClass):
+
+    def __init__(self, config: dict, default_verbose_level: Optional[VerboseLevel] = None):
+        super().__init__(Config, config, default_verbose_level)
+        self.__initialize_connection()
+
+    def __initialize_connection(self):
+        is_sqlite = self._config.conn_drivername.startswith('sqlite')
+        self.__url = URL.create(drivername=self._config.conn_drivername,
+                                username=None if is_sqlite else self._config.conn_username,
+                                host=None if is_sqlite else self._config.conn_host,
+                                database=self._config.conn_dbname)
+        self.__engine = create_async_engine(self.__url,
+                                            pool_size=self._config.pool_size,
+                                            max_overflow=self._config.pool_max_overflow,
+                                            pool_pre_ping=self._config.pool_pre_ping,
+                                            pool_recycle=self._config.pool_recycle_in_sec)
+        if is_sqlite:
+            EngineRegistry.set_pragmas(self.__engine.sync_engine, self._config.sqlite_pragmas)
+        self.__session = async_sessionmaker(self.__engine)
+        # bounds the writes in flight, so concurrent callers queue here instead of on the pool
+        self.__writes_semaphore = asyncio.Semaphore(self._config.max_concurrent_writes)
+
+        self._logger.info(TermLoggerType.ALL, f'{Helper.get_fully_qualified_name(self.__class__)} was initialized')
+
+    @base_async_method
+    async def create_all_tables(self):
+        async with self.__engine.begin() as connection:
+            await connection.run_sync(DBManager.Base.metadata.create_all)
+
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator[AsyncSession]:
+        async with self.__session.begin() as session:
+            yield session
+
+    @asynccontextmanager
+    async def __use_session(self, session: Optional[AsyncSession]) -> AsyncIterator[AsyncSession]:
+        if session is not None:
+            yield session
+        else:
+            async with self.__session.begin() as new_session:
+                yield new_session
+
+    def __record_as_dict(self, record: DBManager.Base) -> dict[str, Any]:
+        return {col.name: getattr(record, col.name) for col in record.__table__.columns
+                if col.name not in self._config.record_autofill_field_names}
+
+    async def __insert_chunk(self, records_chunk: Sequence[DBManager.Base], session: AsyncSession) -> int:
+        table = records_chunk[0].__class__
+        if not Helper.type_check_contents(values=records_chunk, expected_type=table):
+            raise RecordsMismatchException('Not all records are for the same table.')
+        insert_stmt = DBManager.build_insert(self.__engine.dialect.name, table)
+        insert_stmt = insert_stmt.values(list(map(self.__record_as_dict, records_chunk)))
+        cursor_result = await session.execute(insert_stmt.on_conflict_do_nothing()
+                                              .execution_options(preserve_rowcount=True))
+        return cursor_result.rowcount
+
+    @base_async_method
+    async def insert(self,
+                     records: Iterable[DBManager.Base],
+                     chunk_size: Optional[int] = None,
+                     session: Optional[AsyncSession] = None) -> InsertResult:
+        insert_result = InsertResult()
+        async with self.__use_session(session) as session:
+            for records_chunk in Helper.split_in_chunks(records, chunk_size or self._config.insert_chunk_size):
+                insert_result.add(len(records_chunk), await self.__insert_chunk(records_chunk, session))
+
+        if self._async_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'insert_result: {insert_result}')
+        return insert_result
+
+    async def __run_write(self, write, *args) -> Any:
+        async with self.__writes_semaphore:
+            async with self.__session.begin() as session:
+                return await write(*args, session)
+
+    @base_async_method
+    async def insert_concurrently(self,
+                                  records: Iterable[DBManager.Base],
+                                  chunk_size: Optional[int] = None) -> InsertResult:
+        # every chunk is committed on its own connection: a failed chunk does not roll back the others
+        records_chunks = list(Helper.split_in_chunks(records, chunk_size or self._config.insert_chunk_size))
+        inserted_counts = await asyncio.gather(*(self.__run_write(self.__insert_chunk, records_chunk)
+                                                 for records_chunk in records_chunks))
+        insert_result = InsertResult()
+        for records_chunk, inserted_count in zip(records_chunks, inserted_counts):
+            insert_result.add(len(records_chunk), inserted_count)
+        return insert_result
+
+    async def __update_states_chunk(self,
+                                    params_ids: Sequence[int],
+                                    values: dict[str, Any],
+                                    session: AsyncSession) -> int:
+        update_stmt = update(States).where(States.ParamsID.in_(params_ids)).values(**values)
+        cursor_result = await session.execute(update_stmt.execution_options(preserve_rowcount=True))
+        return cursor_result.rowcount
+
+    @base_async_method
+    async def update_states(self,
+                            statuses: Mapping[int, int],
+                            set_by: Optional[str] = None,
+                            chunk_size: Optional[int] = None) -> int:
+        # one statement per status and chunk instead of one per run
+        params_ids_by_status: dict[int, list[int]] = {}
+        for params_id, status in statuses.items():
+            params_ids_by_status.setdefault(status, []).append(params_id)
+
+        writes = []
+        for status, params_ids in params_ids_by_status.items():
+            values = {'Status': status} if set_by is None else {'Status': status, 'SetBy': set_by}
+            for params_ids_chunk in Helper.split_in_chunks(params_ids, chunk_size or self._config.insert_chunk_size):
+                writes.append(self.__run_write(self.__update_states_chunk, params_ids_chunk, values))
+        updated_count = sum(await asyncio.gather(*writes))
+
+        if self._async_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'updated_states: {updated_count}')
+        return updated_count
+
+    @base_async_method
+    async def get_columns(self,
+                          columns: Sequence[InstrumentedAttribute],
+                          filter_criterion: Optional[Sequence[BinaryExpression | bool]] = None) -> 'pandas.DataFrame':
+        import pandas  # deferred: only needed for reads
+
+        select_stmt = select(*columns)
+        if filter_criterion is not None:
+            select_stmt = select_stmt.where(*filter_criterion)
+        async with self.__session.begin() as session:
+            # pandas is synchronous, so it runs on the session's connection through the greenlet bridge
+            return await session.run_sync(lambda sync_session: (pandas.read_sql(sql=select_stmt,
+                                                                                con=sync_session.connection())))
+
+    @base_async_method
+    async def destroy(self):
+        super().destroy()
+        await self.__engine.dispose()
@@ -1,4 +1,5 @@
 import time
+from contextvars import ContextVar
 from dataclasses import dataclass
 from functools import wraps
 from pathlib import Path
@@ -7,6 +8,7 @@ from typing import Optional
 import dacite
 
 from source.libs.multi_rotating_logger import MultiRotatingLogger
+from source.libs.profiler import Profiler
 from source.types.logger_types import TermLoggerType
 
 
@@ -17,6 +19,10 @@ class BaseConfig:
     short_term_logger_backup_count: Optional[int] = None
     long_term_logger_filename: Optional[str] = None
     long_term_logger_backup_count: Optional[int] = None
+    logger_trace_mode: Optional[str] = None
+    logger_async_enabled: bool = False
+    logger_async_queue_max_size: Optional[int] = None
+    logger_async_overflow_policy: Optional[str] = None
 
 
 @dataclass(frozen=True)
@@ -27,6 +33,10 @@ class VerboseLevel:
     DEFAULT = NONE
 
 
+# the verbose level of the running coroutine call; each asyncio task works on its own copy
+_async_verbose_level: ContextVar[Optional[int]] = ContextVar('async_verbose_level', default=None)
+
+
 def base_method(method):
     @wraps(method)
     def base_method_wrapper(instance: BaseClass, *args, verbose_level: Optional[VerboseLevel] = None, **kwargs):
@@ -39,11 +49,18 @@ def base_method(method):
 
         if instance._dynamic_verbose_level != VerboseLevel.NONE:
             instance._logger.info(TermLoggerType.SHORT, f'Calling: {method.__name__}')
-        call_time = time.time()
-        output = method(instance, *args, **kwargs)
-        elapsed_time = time.time() - call_time
+        is_profiling_enabled = Profiler.enabled
+        if is_profiling_enabled:
+            Profiler.enter(f'{instance.__class__.__name__}.{method.__name__}')
+        call_time = time.perf_counter_ns()
+        try:
+            output = method(instance, *args, **kwargs)
+        finally:
+            elapsed_time = time.perf_counter_ns() - call_time
+            if is_profiling_enabled:
+                Profiler.exit(elapsed_time)
         if instance._dynamic_verbose_level != VerboseLevel.NONE:
-            instance._logger.info(TermLoggerType.SHORT, f'Exiting: {method.__name__} ({elapsed_time:.3f}s)')
+            instance._logger.info(TermLoggerType.SHORT, f'Exiting: {method.__name__} ({elapsed_time / 1e9:.3f}s)')
 
         if (instance._dynamic_verbose_level != VerboseLevel.EXTENDED
                 or (verbose_level == VerboseLevel.EXTENDED and previous_dynamic_verbose_level is not None)):
@@ -53,6 +70,34 @@ def base_method(method):
     return base_method_wrapper
 
 
+def base_async_method(method):
+    @wraps(method)
+    async def base_async_method_wrapper(instance: BaseClass, *args, verbose_level: Optional[VerboseLevel] = None,
+                                        **kwargs):
+        if verbose_level is None:
+            verbose_level = instance._default_verbose_level
+        if _async_verbose_level.get() == VerboseLevel.EXTENDED:
+            verbose_level = VerboseLevel.EXTENDED
+
+        # concurrent calls interleave, so the level is held by the calling task instead of the dynamic one
+        verbose_level_token = _async_verbose_level.set(verbose_level)
+        if verbose_level != VerboseLevel.NONE:
+            instance._logger.info(TermLoggerType.SHORT, f'Calling: {method.__name__}')
+        call_time = time.perf_counter_ns()
+        try:
+            output = await method(instance, *args, **kwargs)
+        finally:
+            elapsed_time = time.perf_counter_ns() - call_time
+            if Profiler.enabled:
+                Profiler.record(f'{instance.__class__.__name__}.{method.__name__}', elapsed_time)
+            _async_verbose_level.reset(verbose_level_token)
+        if verbose_level != VerboseLevel.NONE:
+            instance._logger.info(TermLoggerType.SHORT, f'Exiting: {method.__name__} ({elapsed_time / 1e9:.3f}s)')
+        return output
+
+    return base_async_method_wrapper
+
+
 class BaseClass:
 
     def __init__(self, config_template: dataclass, config_payload: dict, default_verbose_level: Optional[VerboseLevel]):
@@ -65,6 +110,12 @@ class BaseClass:
         self._default_verbose_level = default_verbose_level or VerboseLevel.DEFAULT
         self._dynamic_verbose_level = self._default_verbose_level
 
+    @property
+    def _async_verbose_level(self) -> int:
+        # the level of the base_async_method call running in the current task
+        verbose_level = _async_verbose_level.get()
+        return self._default_verbose_level if verbose_level is None else verbose_level
+
     def __load_configs(self, config_template: dataclass, config_payload: dict):
         self._config = dacite.from_dict(config_template, config_payload)
 
@@ -95,7 +146,17 @@ class BaseClass:
         if self._config.long_term_logger_backup_count is not None:
             logger_configs[TermLoggerType.LONG]['rfh_backup_count'] = self._config.long_term_logger_backup_count
 
-        self._logger = MultiRotatingLogger(configs=logger_configs)
+        if self._config.logger_trace_mode is not None:
+            for logger_config in logger_configs.values():
+                logger_config['trace_mode'] = self._config.logger_trace_mode
+
+        async_config = {'enabled': self._config.logger_async_enabled}
+        if self._config.logger_async_queue_max_size is not None:
+            async_config['queue_max_size'] = self._config.logger_async_queue_max_size
+        if self._config.logger_async_overflow_policy is not None:
+            async_config['overflow_policy'] = self._config.logger_async_overflow_policy
+
+        self._logger = MultiRotatingLogger(configs=logger_configs, async_config=async_config)
 
     def destroy(self):
         self._logger.destroy()
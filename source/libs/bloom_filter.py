@@ -0,0 +1,40 @@
+import hashlib
+import math
+from collections.abc import Iterable
+
+
+class BloomFilter:
+
+    def __init__(self, expected_items: int, false_positive_rate: float = 0.001):
+        expected_items = max(1, expected_items)
+        self.__bits_count = max(8, math.ceil(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.__hashes_count = max(1, round(self.__bits_count / expected_items * math.log(2)))
+        self.__bits = bytearray(math.ceil(self.__bits_count / 8))
+        self.__items_count = 0
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.__bits)
+
+    def __get_positions(self, item: str) -> Iterable[int]:
+        # double hashing: k positions out of a single 128 bits digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], 'little')
+        second_hash = int.from_bytes(digest[8:], 'little') | 1
+        for hash_index in range(self.__hashes_count):
+            yield (first_hash + hash_index * second_hash) % self.__bits_count
+
+    def add(self, item: str):
+        for position in self.__get_positions(item):
+            self.__bits[position >> 3] |= 1 << (position & 7)
+        self.__items_count += 1
+
+    def update(self, items: Iterable[str]):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.__bits[position >> 3] & (1 << (position & 7)) for position in self.__get_positions(item))
+
+    def __len__(self) -> int:
+        return self.__items_count
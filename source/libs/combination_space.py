@@ -0,0 +1,115 @@
+from bisect import bisect_right
+from collections.abc import Sequence, Callable, Iterator
+from functools import reduce
+from itertools import accumulate
+from typing import Any
+
+
+def _normalize_index(index: int, length: int) -> int:
+    if not isinstance(index, int):
+        raise TypeError(f'Indexes must be integers, not {type(index).__name__}.')
+    if index < 0:
+        index += length
+    if index < 0 or index >= length:
+        raise IndexError(f'Index out of range (length: {length}).')
+    return index
+
+
+def _slice_view(sequence: Sequence[Any], index: slice) -> 'MappedSequence':
+    return MappedSequence(range(len(sequence))[index], sequence.__getitem__)
+
+
+class CartesianProduct(Sequence):
+
+    def __init__(self, factors: dict[str | int, Sequence[Any]]):
+        self.__keys = list(factors.keys())
+        self.__values = list(factors.values())
+        self.__radixes = list(map(lambda values: (len(values)), self.__values))
+        self.__length = reduce(lambda a, b: (a * b), self.__radixes, 1)
+
+    @property
+    def keys(self) -> list[str | int]:
+        return self.__keys
+
+    @property
+    def factors(self) -> dict[str | int, Sequence[Any]]:
+        return dict(zip(self.__keys, self.__values))
+
+    @property
+    def radixes(self) -> list[int]:
+        return self.__radixes
+
+    def get_digits(self, index: int) -> list[int]:
+        quotient = _normalize_index(index, self.__length)
+        digits = []
+        for radix in self.__radixes:
+            quotient, remainder = divmod(quotient, radix)
+            digits.append(remainder)
+        return digits
+
+    def get_index(self, digits: Sequence[int]) -> int:
+        index = 0
+        for digit, radix in zip(reversed(digits), reversed(self.__radixes)):
+            if digit < 0 or digit >= radix:
+                raise IndexError(f'Digit {digit} out of range (radix: {radix}).')
+            index = index * radix + digit
+        return index
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def get_by_digits(self, digits: Sequence[int]) -> dict[str | int, Any]:
+        return {key: values[digit] for key, values, digit in zip(self.__keys, self.__values, digits)}
+
+    def __getitem__(self, index: int | slice) -> dict[str | int, Any] | Sequence[dict[str | int, Any]]:
+        if isinstance(index, slice):
+            return _slice_view(self, index)
+        return self.get_by_digits(self.get_digits(index))
+
+    def __iter__(self) -> Iterator[dict[str | int, Any]]:
+        for counter in range(self.__length):
+            yield self[counter]
+
+
+class ChainedSequence(Sequence):
+
+    def __init__(self, sequences: Sequence[Sequence[Any]]):
+        self.__sequences = list(sequences)
+        self.__offsets = list(accumulate(map(len, self.__sequences), initial=0))
+
+    def __len__(self) -> int:
+        return self.__offsets[-1]
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            return _slice_view(self, index)
+        index = _normalize_index(index, len(self))
+        sequence_index = bisect_right(self.__offsets, index) - 1
+        return self.__sequences[sequence_index][index - self.__offsets[sequence_index]]
+
+    def __iter__(self) -> Iterator[Any]:
+        for sequence in self.__sequences:
+            yield from sequence
+
+
+class MappedSequence(Sequence):
+
+    def __init__(self, sequence: Sequence[Any], function: Callable[[Any], Any]):
+        self.__sequence = sequence
+        self.__function = function
+
+    @property
+    def source(self) -> Sequence[Any]:
+        return self.__sequence
+
+    def __len__(self) -> int:
+        return len(self.__sequence)
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            return _slice_view(self, index)
+        return self.__function(self.__sequence[index])
+
+    def __iter__(self) -> Iterator[Any]:
+        for item in self.__sequence:
+            yield self.__function(item)
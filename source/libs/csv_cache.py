@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import dacite
+import pandas
+from pandas import DataFrame
+
+from source.libs.helper import Helper
+
+
+@dataclass
+class Config:
+    folder: Path
+    max_bytes: int = 2 * 1024 * 1024 * 1024  # 2gb
+    file_format: str = 'feather'
+    index_filename: str = 'csv_cache_index.json'
+    lock_filename: str = 'csv_cache_index.lock'
+
+
+class UnsupportedCacheFormat(Exception):
+    pass
+
+
+class CsvCache:
+    __READERS = {'feather': pandas.read_feather, 'parquet': pandas.read_parquet, 'pickle': pandas.read_pickle}
+    __WRITERS = {'feather': DataFrame.to_feather, 'parquet': DataFrame.to_parquet, 'pickle': DataFrame.to_pickle}
+
+    def __init__(self, config: dict):
+        self.__config = dacite.from_dict(Config, config)
+        if self.__config.file_format not in CsvCache.__READERS:
+            raise UnsupportedCacheFormat(f'Unsupported cache format: "{self.__config.file_format}". '
+                                         f'Available: {", ".join(CsvCache.__READERS.keys())}.')
+        self.__folder = Helper.ensure_folder(str(self.__config.folder))
+        self.__index_path = self.__folder / self.__config.index_filename
+        self.__lock_path = self.__folder / self.__config.lock_filename
+
+    def __read_index(self) -> dict[str, dict[str, Any]]:
+        if not self.__index_path.exists():
+            return {'sources': {}, 'entries': {}}
+        with open(self.__index_path) as index_file:
+            return json.load(index_file)
+
+    def __write_index(self, index: dict[str, dict[str, Any]]):
+        # written aside and swapped in, so a crash never leaves a partial index
+        temporary_path = self.__get_temporary_path(self.__index_path)
+        with open(temporary_path, 'w') as index_file:
+            json.dump(index, index_file)
+        os.replace(temporary_path, self.__index_path)
+
+    @contextmanager
+    def __update_index(self) -> Iterator[dict[str, dict[str, Any]]]:
+        # read-modify-write under a file lock, so concurrent workers never overwrite each other's entries
+        with Helper.lock_file(self.__lock_path):
+            index = self.__read_index()
+            yield index
+            self.__write_index(index)
+
+    @staticmethod
+    def __get_temporary_path(path: Path) -> Path:
+        return path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+
+    def __get_entry_path(self, digest: str) -> Path:
+        return self.__folder / f'{digest}.{self.__config.file_format}'
+
+    def __reconcile(self, index: dict[str, dict[str, Any]]):
+        # entry files missing from the index (e.g. after it was lost or rewritten without a lock) are adopted,
+        # and entries whose file is gone are dropped, so the size cap always covers the whole folder
+        entries = index['entries']
+        for entry_path in self.__folder.glob(f'*.{self.__config.file_format}'):
+            if entry_path.stem not in entries:
+                entry_stat = entry_path.stat()
+                entries[entry_path.stem] = {'bytes': entry_stat.st_size, 'last_access': entry_stat.st_mtime}
+        for digest in list(entries.keys()):
+            if not self.__get_entry_path(digest).exists():
+                del entries[digest]
+
+    @staticmethod
+    def __resolve_fingerprint(index: dict[str, dict[str, Any]], path: Path) -> str:
+        # the content digest is only recomputed when size or mtime changed
+        file_stat = os.stat(path)
+        source_key = str(Path(path).resolve())
+        source = index['sources'].get(source_key)
+        if source is None or source['size'] != file_stat.st_size or source['mtime_ns'] != file_stat.st_mtime_ns:
+            source = {'size': file_stat.st_size,
+                      'mtime_ns': file_stat.st_mtime_ns,
+                      'digest': Helper.generate_file_digest(path)}
+            index['sources'][source_key] = source
+        return source['digest']
+
+    def __evict(self, index: dict[str, dict[str, Any]], protected_digest: str):
+        entries = index['entries']
+        total_bytes = sum(map(lambda entry: (entry['bytes']), entries.values()))
+        for digest in sorted(entries.keys(), key=lambda digest: (entries[digest]['last_access'])):
+            if total_bytes <= self.__config.max_bytes:
+                break
+            if digest == protected_digest:
+                continue
+            self.__get_entry_path(digest).unlink(missing_ok=True)
+            total_bytes -= entries.pop(digest)['bytes']
+
+    def get_fingerprint(self, path: Path) -> str:
+        with self.__update_index() as index:
+            return self.__resolve_fingerprint(index, path)
+
+    def load(self, path: Path, parse: Callable[[Path], DataFrame]) -> tuple[DataFrame, bool]:
+        with self.__update_index() as index:
+            digest = self.__resolve_fingerprint(index, path)
+            entry_path = self.__get_entry_path(digest)
+            is_indexed = digest in index['entries'] and entry_path.exists()
+            if is_indexed:
+                index['entries'][digest]['last_access'] = time.time()
+
+        if is_indexed:
+            try:
+                return CsvCache.__READERS[self.__config.file_format](entry_path), True
+            except FileNotFoundError:  # evicted by another worker in the meantime
+                pass
+
+        # parsed and written without holding the lock, then published and indexed atomically
+        dataframe = parse(path)
+        temporary_path = self.__get_temporary_path(entry_path)
+        CsvCache.__WRITERS[self.__config.file_format](dataframe, temporary_path)
+
+        with self.__update_index() as index:
+            os.replace(temporary_path, entry_path)
+            self.__reconcile(index)
+            index['entries'][digest] = {'bytes': entry_path.stat().st_size, 'last_access': time.time()}
+            self.__evict(index, protected_digest=digest)
+        return dataframe, False
+
+    def clear(self):
+        with self.__update_index() as index:
+            self.__reconcile(index)
+            for digest in index['entries'].keys():
+                self.__get_entry_path(digest).unlink(missing_ok=True)
+            index.update({'sources': {}, 'entries': {}})
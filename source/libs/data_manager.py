@@ -1,14 +1,20 @@
+from collections.abc import Sequence
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+import numpy
 import pandas
-from pandas import DataFrame
+from pandas import DataFrame, DatetimeIndex
 
 from source.libs.base_class import BaseConfig, VerboseLevel, base_method, BaseClass
+from source.libs.csv_cache import CsvCache
+from source.libs.dataset_cache import DatasetCache, PreparedDataset
 from source.libs.helper import Helper
+from source.libs.window_dataset import WindowDataset
 from source.types.logger_types import TermLoggerType
+from source.types.pipeline_params_types import PipelineParams
 
 
 @dataclass
@@ -17,6 +23,17 @@ class Config(BaseConfig):
     pandas_log_use_custom_settings: bool = True
     pandas_log_display_width: int = 1000
     pandas_log_display_max_cols: Optional[int] = None
+    csv_cache_folder: Optional[Path] = None  # None: the cache is disabled
+    csv_cache_max_bytes: int = 2 * 1024 * 1024 * 1024  # 2gb
+    csv_cache_format: str = 'feather'
+    time_filter_use_index: bool = False
+    time_filter_unsorted_fallback: str = 'mask'  # 'mask', 'sort' or 'raise'
+    time_filter_datetime_format: Optional[str] = None  # None: inferred by pandas
+    csv_stream_chunk_size: int = 100000
+    csv_stream_assume_sorted: bool = False  # True: reading stops after time_to, unless unsorted rows are met
+    windows_dtype: str = 'float32'
+    dataset_cache_max_bytes: int = 4 * 1024 * 1024 * 1024  # 4gb, shared by the whole process
+    dataset_use_csv_stream: bool = False
 
 
 class UndefinedDataFrame(Exception):
@@ -31,6 +48,10 @@ class InvalidTimeRange(Exception):
     pass
 
 
+class UnsortedTimeField(Exception):
+    pass
+
+
 class DataManager(BaseClass):
 
     def __init__(self,
@@ -40,6 +61,14 @@ class DataManager(BaseClass):
         super().__init__(Config, config, default_verbose_level)
 
         self.__dataframe = dataframe
+        self.__time_index: Optional[DatetimeIndex] = None
+        self.__time_index_field_name: Optional[str] = None
+
+        self.__csv_cache = None
+        if self._config.csv_cache_folder is not None:
+            self.__csv_cache = CsvCache(config={'folder': self._config.csv_cache_folder,
+                                                'max_bytes': self._config.csv_cache_max_bytes,
+                                                'file_format': self._config.csv_cache_format})
 
         if self._config.pandas_log_use_custom_settings:
             pandas.set_option('display.width', self._config.pandas_log_display_width)
@@ -55,9 +84,86 @@ class DataManager(BaseClass):
 
     @base_method
     def load_csv(self, path: Path) -> DataFrame:
-        self.__dataframe = pandas.read_csv(path)
+        was_cached = False
+        if self.__csv_cache is None:
+            self.__dataframe = pandas.read_csv(path)
+        else:
+            self.__dataframe, was_cached = self.__csv_cache.load(path, pandas.read_csv)
+        self.__time_index = None
         if self._dynamic_verbose_level != VerboseLevel.NONE:
-            self._logger.debug(TermLoggerType.SHORT, f'CSV was loaded: {path}')
+            self._logger.debug(TermLoggerType.SHORT, f'CSV was loaded: {path} (cached: {was_cached})')
+            self._logger.debug(TermLoggerType.SHORT, f'Sample:\n{self.__dataframe}')
+        return self.__dataframe
+
+    @base_method
+    def __resolve_field_name(self, field_name: Optional[str]) -> str:
+        if field_name is None:
+            if self._config.default_field_name is None:
+                raise UndefinedFieldName(
+                    'Both the "field_name" parameter and the "default_field_name" option were not set. At least one of them is required.')
+            else:
+                field_name = self._config.default_field_name
+        return field_name
+
+    @base_method
+    def load_csv_range(self,
+                       path: Path,
+                       field_name: Optional[str] = None,
+                       time_from: Optional[datetime] = None,
+                       time_to: Optional[datetime] = None,
+                       columns: Optional[Sequence[str]] = None,
+                       chunk_size: Optional[int] = None,
+                       assume_sorted: Optional[bool] = None) -> DataFrame:
+        # the range and the columns are applied while reading, so only selected rows are kept in memory
+        field_name = self.__resolve_field_name(field_name)
+        if assume_sorted is None:
+            assume_sorted = self._config.csv_stream_assume_sorted
+        if columns is not None and field_name not in columns:
+            columns = [field_name, *columns]
+        time_from_as_str = None if time_from is None else str(time_from)
+        time_to_as_str = None if time_to is None else str(time_to)
+        if time_from is not None and time_to is not None and time_from >= time_to:
+            raise InvalidTimeRange(
+                f'"time_from" ({time_from_as_str}) must be earlier than "time_to" ({time_to_as_str}).')
+
+        selected_chunks = []
+        empty_selection = DataFrame(columns=columns)
+        read_chunks_count = 0
+        last_time = None
+        with pandas.read_csv(path,
+                             usecols=columns,
+                             chunksize=chunk_size or self._config.csv_stream_chunk_size) as csv_reader:
+            for chunk in csv_reader:
+                read_chunks_count += 1
+                empty_selection = chunk.iloc[0:0]
+                chunk_times = chunk[field_name]
+                if assume_sorted and (not chunk_times.is_monotonic_increasing
+                                      or (last_time is not None and chunk_times.iloc[0] < last_time)):
+                    # stopping early would silently drop rows: the rest of the file is scanned instead
+                    assume_sorted = False
+                    self._logger.warning(TermLoggerType.ALL, f'The "{field_name}" field of {path} is not sorted '
+                                                             f'in ascending order, the whole file is scanned')
+                last_time = chunk_times.iloc[-1]
+                condition = numpy.ones(len(chunk), dtype=bool)
+                if time_from_as_str is not None:
+                    condition &= (chunk_times >= time_from_as_str).to_numpy()
+                if time_to_as_str is not None:
+                    condition &= (chunk_times < time_to_as_str).to_numpy()
+                if condition.any():
+                    selected_chunks.append(chunk.loc[condition])
+                if assume_sorted and time_to_as_str is not None and chunk_times.iloc[-1] >= time_to_as_str:
+                    break
+
+        if len(selected_chunks) > 0:
+            self.__dataframe = pandas.concat(selected_chunks)
+        else:
+            self.__dataframe = empty_selection
+        self.__time_index = None
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT,
+                               f'CSV range was loaded: {path} (from: {time_from_as_str} - to: {time_to_as_str}, '
+                               f'read chunks: {read_chunks_count}, rows: {len(self.__dataframe)})')
             self._logger.debug(TermLoggerType.SHORT, f'Sample:\n{self.__dataframe}')
         return self.__dataframe
 
@@ -69,6 +175,53 @@ class DataManager(BaseClass):
             self._logger.debug(TermLoggerType.SHORT, f'Length: {df_length}')
         return df_length
 
+    @base_method
+    def __get_time_index(self, field_name: str) -> DatetimeIndex:
+        # parsed once per loaded DataFrame, then sliced along with it
+        if self.__time_index is not None and self.__time_index_field_name == field_name:
+            return self.__time_index
+
+        time_index = DatetimeIndex(pandas.to_datetime(self.__dataframe[field_name],
+                                                     format=self._config.time_filter_datetime_format))
+        if not time_index.is_monotonic_increasing:
+            match self._config.time_filter_unsorted_fallback:
+                case 'raise':
+                    raise UnsortedTimeField(f'The "{field_name}" field is not sorted in ascending order.')
+                case 'sort':
+                    sorting_order = time_index.argsort(kind='stable')
+                    self.__dataframe = self.__dataframe.iloc[sorting_order]
+                    time_index = time_index[sorting_order]
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT,
+                               f'Time index was built: {field_name} (sorted: {time_index.is_monotonic_increasing})')
+
+        self.__time_index = time_index
+        self.__time_index_field_name = field_name
+        return time_index
+
+    @base_method
+    def __indexed_time_filter(self, field_name: str, time_from: Optional[datetime], time_to: Optional[datetime]):
+        time_index = self.__get_time_index(field_name)
+        if time_index.is_monotonic_increasing:
+            # binary search: slicing returns a view instead of a masked copy
+            start = 0 if time_from is None else time_index.searchsorted(pandas.Timestamp(time_from), side='left')
+            end = len(time_index) if time_to is None else time_index.searchsorted(pandas.Timestamp(time_to),
+                                                                                   side='left')
+            selector = slice(start, end)
+        else:
+            selector = numpy.ones(len(time_index), dtype=bool)
+            if time_from is not None:
+                selector &= time_index >= pandas.Timestamp(time_from)
+            if time_to is not None:
+                selector &= time_index < pandas.Timestamp(time_to)
+        self.__slice_rows(selector)
+
+    def __slice_rows(self, selector: slice | numpy.ndarray):
+        self.__dataframe = self.__dataframe.iloc[selector]
+        if self.__time_index is not None:
+            self.__time_index = self.__time_index[selector]
+
     @base_method
     def time_filter(self,
                     field_name: Optional[str] = None,
@@ -76,14 +229,10 @@ class DataManager(BaseClass):
                     time_to: Optional[datetime] = None,
                     count_from_start: Optional[int] = None,
                     count_to_end: Optional[int] = None,
+                    use_index: Optional[bool] = None,
                     ) -> DataFrame:
         self.__check_dataframe()
-        if field_name is None:
-            if self._config.default_field_name is None:
-                raise UndefinedFieldName(
-                    'Both the "field_name" parameter and the "default_field_name" option were not set. At least one of them is required.')
-            else:
-                field_name = self._config.default_field_name
+        field_name = self.__resolve_field_name(field_name)
 
         time_from_as_str = None
         time_from_condition = lambda: True
@@ -101,12 +250,18 @@ class DataManager(BaseClass):
             raise InvalidTimeRange(
                 f'"time_from" ({time_from_as_str}) must be earlier than "time_to" ({time_to_as_str}).')
 
-        self.__dataframe = self.__dataframe.loc[time_from_condition() & time_to_condition()]
+        if use_index is None:
+            use_index = self._config.time_filter_use_index
+        if use_index:
+            self.__indexed_time_filter(field_name, time_from, time_to)
+        elif time_from is not None or time_to is not None:
+            self.__dataframe = self.__dataframe.loc[time_from_condition() & time_to_condition()]
+            self.__time_index = None
 
         if count_from_start is not None:
-            self.__dataframe = self.__dataframe[:count_from_start]
+            self.__slice_rows(slice(None, count_from_start))
         if count_to_end is not None:
-            self.__dataframe = self.__dataframe[-count_to_end::]
+            self.__slice_rows(slice(-count_to_end, None))
 
         if self._dynamic_verbose_level != VerboseLevel.NONE:
             self._logger.debug(TermLoggerType.SHORT,
@@ -115,6 +270,95 @@ class DataManager(BaseClass):
 
         return self.__dataframe
 
+    @base_method
+    def __extract_arrays(self,
+                         column_to_predict: str | Sequence[str],
+                         feature_columns: Optional[Sequence[str]] = None) -> PreparedDataset:
+        self.__check_dataframe()
+        if feature_columns is None:
+            feature_columns = list(self.__dataframe.select_dtypes('number').columns)
+
+        # the only copy: filtered rows as one contiguous array, windows are views over it
+        features = self.__dataframe[list(feature_columns)].to_numpy(dtype=self._config.windows_dtype)
+        targets = self.__dataframe[column_to_predict].to_numpy(dtype=self._config.windows_dtype)
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT,
+                               f'Arrays were extracted: features {features.shape} ({feature_columns}), '
+                               f'targets {targets.shape} ({column_to_predict})')
+
+        return PreparedDataset(features=features, targets=targets)
+
+    @base_method
+    def build_windows(self,
+                      column_to_predict: str | Sequence[str],
+                      window_width: int,
+                      batch_size: int,
+                      shuffle: bool = False,
+                      feature_columns: Optional[Sequence[str]] = None,
+                      target_offset: int = 1,
+                      seed: Optional[int] = None) -> WindowDataset:
+        prepared_dataset = self.__extract_arrays(column_to_predict, feature_columns)
+        window_dataset = WindowDataset(prepared_dataset.features, prepared_dataset.targets, window_width, batch_size,
+                                       shuffle=shuffle, target_offset=target_offset, seed=seed)
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT,
+                               f'Windows were built: {window_dataset.windows.shape} '
+                               f'(batches: {len(window_dataset)}, bytes: {window_dataset.nbytes})')
+
+        return window_dataset
+
+    @base_method
+    def prepare_dataset(self,
+                        pipeline_params: PipelineParams,
+                        field_name: Optional[str] = None,
+                        feature_columns: Optional[Sequence[str]] = None,
+                        seed: Optional[int] = None) -> WindowDataset:
+        dataset_cache = DatasetCache.get_shared(self._config.dataset_cache_max_bytes)
+        time_from, time_to = pipeline_params.DatasetTimeFilter
+        cache_key = (str(pipeline_params.DatasetPath),
+                     dataset_cache.get_fingerprint(pipeline_params.DatasetPath),
+                     time_from,
+                     time_to,
+                     field_name or self._config.default_field_name,
+                     str(pipeline_params.ColumnToPredict),
+                     tuple(feature_columns) if feature_columns is not None else None,
+                     self._config.windows_dtype,
+                     # settings that change which rows are read, so managers configured differently never share
+                     self._config.dataset_use_csv_stream,
+                     self._config.csv_stream_assume_sorted,
+                     self._config.time_filter_use_index,
+                     self._config.time_filter_unsorted_fallback,
+                     self._config.time_filter_datetime_format)
+
+        def build_prepared_dataset() -> PreparedDataset:
+            if self._config.dataset_use_csv_stream:
+                # only pushed down when the feature columns are known, otherwise every numeric column is used
+                columns = None
+                if feature_columns is not None:
+                    columns = list(dict.fromkeys([*feature_columns, pipeline_params.ColumnToPredict]))
+                self.load_csv_range(pipeline_params.DatasetPath, field_name=field_name,
+                                    time_from=time_from, time_to=time_to, columns=columns)
+            else:
+                self.load_csv(pipeline_params.DatasetPath)
+                self.time_filter(field_name=field_name, time_from=time_from, time_to=time_to)
+            prepared_dataset = self.__extract_arrays(pipeline_params.ColumnToPredict, feature_columns)
+            # shared between combinations, so it must not be modified in place
+            prepared_dataset.features.flags.writeable = False
+            prepared_dataset.targets.flags.writeable = False
+            return prepared_dataset
+
+        prepared_dataset = dataset_cache.get_or_build(cache_key, build_prepared_dataset)
+        window_dataset = WindowDataset(prepared_dataset.features, prepared_dataset.targets,
+                                       pipeline_params.WindowWidth, pipeline_params.DatasetBatchSize,
+                                       shuffle=pipeline_params.DatasetShuffle, seed=seed)
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'Dataset cache: {dataset_cache.stats}')
+
+        return window_dataset
+
     @base_method
     def destroy(self):
         super().destroy()
@@ -0,0 +1,87 @@
+import dataclasses
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy
+
+from source.libs.helper import Helper
+from source.types.cache_types import CacheStats
+
+
+@dataclass(frozen=True)
+class PreparedDataset:
+    features: numpy.ndarray
+    targets: numpy.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        return self.features.nbytes + self.targets.nbytes
+
+
+class DatasetCache:
+    __shared_instance: Optional['DatasetCache'] = None
+    __shared_instance_lock = threading.Lock()
+
+    def __init__(self, max_bytes: int):
+        self.__max_bytes = max_bytes
+        self.__entries: OrderedDict[Hashable, PreparedDataset] = OrderedDict()
+        self.__fingerprints: dict[str, tuple[int, int, str]] = {}
+        self.__stats = CacheStats()
+        self.__lock = threading.RLock()
+
+    @classmethod
+    def get_shared(cls, max_bytes: int) -> 'DatasetCache':
+        # one instance per process; the budget of the first caller wins
+        with cls.__shared_instance_lock:
+            if cls.__shared_instance is None:
+                cls.__shared_instance = cls(max_bytes)
+            return cls.__shared_instance
+
+    @property
+    def stats(self) -> CacheStats:
+        with self.__lock:
+            return dataclasses.replace(self.__stats)
+
+    def get_fingerprint(self, path: Path) -> str:
+        # content digests are memoized per (size, mtime) so unchanged files are not re-read
+        file_stat = os.stat(path)
+        with self.__lock:
+            size, mtime_ns, digest = self.__fingerprints.get(str(path), (None, None, None))
+            if size != file_stat.st_size or mtime_ns != file_stat.st_mtime_ns:
+                digest = Helper.generate_file_digest(path)
+                self.__fingerprints[str(path)] = (file_stat.st_size, file_stat.st_mtime_ns, digest)
+            return digest
+
+    def __evict(self):
+        while self.__stats.bytes_used > self.__max_bytes and len(self.__entries) > 0:
+            _, evicted_dataset = self.__entries.popitem(last=False)
+            self.__stats.bytes_used -= evicted_dataset.nbytes
+            self.__stats.evictions += 1
+        self.__stats.entries = len(self.__entries)
+
+    def get_or_build(self, key: Hashable, builder: Callable[[], PreparedDataset]) -> PreparedDataset:
+        with self.__lock:
+            if key in self.__entries:
+                self.__entries.move_to_end(key)
+                self.__stats.hits += 1
+                return self.__entries[key]
+            self.__stats.misses += 1
+
+        prepared_dataset = builder()
+        with self.__lock:
+            if prepared_dataset.nbytes <= self.__max_bytes and key not in self.__entries:
+                self.__entries[key] = prepared_dataset
+                self.__stats.bytes_used += prepared_dataset.nbytes
+                self.__evict()
+        return prepared_dataset
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__stats.bytes_used = 0
+            self.__stats.entries = 0
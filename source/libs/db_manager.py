@@ -1,33 +1,74 @@
-from collections.abc import Sequence
-from dataclasses import dataclass
-from typing import Optional
+import csv
+import io
+from collections.abc import Sequence, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional, Any, TYPE_CHECKING
 
-import pandas
-from sqlalchemy import create_engine, BinaryExpression
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.engine import URL
-from sqlalchemy.orm import declarative_base, sessionmaker, InstrumentedAttribute
+from sqlalchemy import (BinaryExpression, Boolean, Column, ColumnElement, Connection, DateTime, Float, Integer,
+                        MetaData, Select, String, Table, select, update, bindparam, exists, func)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import URL, Row, Result
+from sqlalchemy.sql.dml import Insert
+from sqlalchemy.orm import declarative_base, sessionmaker, InstrumentedAttribute, Session
 
 from source.libs.base_class import BaseConfig, VerboseLevel, base_method, BaseClass
+from source.libs.engine_registry import EngineRegistry
 from source.libs.helper import Helper
+from source.types.db_types import InsertResult
 from source.types.logger_types import TermLoggerType
 
+if TYPE_CHECKING:
+    import pandas
+    import pyarrow
+
+
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # readers do not block the writer
+    'synchronous': 'NORMAL',  # durable with WAL, without a fsync per transaction
+    'foreign_keys': 'ON',
+    'busy_timeout': 30000,
+    'cache_size': -65536,  # in kb
+    'temp_store': 'MEMORY',
+}
+
 
 @dataclass
 class Config(BaseConfig):
-    conn_username: str
-    conn_dbname: str
+    conn_dbname: str  # the database file for sqlite
+    conn_username: Optional[str] = None
     conn_host: str = 'localhost'
-    conn_drivername: str = 'postgresql'
+    conn_drivername: str = 'postgresql'  # or 'sqlite'
     record_autofill_field_names: Sequence[str] = ('ID', 'CreatedOn', 'UpdatedOn')
+    insert_chunk_size: int = 1000
+    bulk_insert_chunk_size: int = 50000
+    bulk_insert_staging_prefix: str = 'staging_'
+    bulk_insert_null_marker: str = r'\N'
+    pool_size: int = 5
+    pool_max_overflow: int = 10
+    pool_pre_ping: bool = True
+    pool_recycle_in_sec: int = 1800  # -1: connections are never recycled
+    create_tables_on_init: bool = True
+    read_chunk_size: int = 10000
+    sqlite_pragmas: dict[str, str | int] = field(default_factory=lambda: dict(DEFAULT_SQLITE_PRAGMAS))
 
 
 class RecordsMismatchException(Exception):
     pass
 
 
+class UnsupportedDialect(Exception):
+    pass
+
+
+class UnsupportedReadFormat(Exception):
+    pass
+
+
 class DBManager(BaseClass):
     Base = declarative_base()
+    __DIALECT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
 
     def __init__(self, config: dict, default_verbose_level: Optional[VerboseLevel] = None):
         super().__init__(Config, config, default_verbose_level)
@@ -35,9 +76,10 @@ class DBManager(BaseClass):
 
     @base_method
     def __initialize_connection(self):
+        is_sqlite = self._config.conn_drivername.startswith('sqlite')
         engine_create_params = {'drivername': self._config.conn_drivername,
-                                'username': self._config.conn_username,
-                                'host': self._config.conn_host,
+                                'username': None if is_sqlite else self._config.conn_username,
+                                'host': None if is_sqlite else self._config.conn_host,
                                 'database': self._config.conn_dbname}
 
         if self._dynamic_verbose_level != VerboseLevel.NONE:
@@ -47,12 +89,38 @@ class DBManager(BaseClass):
         self.__url = URL.create(**engine_create_params)
 
         self.__metadata = DBManager.Base.metadata
-        self.__engine = create_engine(self.__url)
+        self.__engine = EngineRegistry.acquire(self.__url,
+                                               pool_size=self._config.pool_size,
+                                               max_overflow=self._config.pool_max_overflow,
+                                               pool_pre_ping=self._config.pool_pre_ping,
+                                               pool_recycle=self._config.pool_recycle_in_sec,
+                                               connect_pragmas=self._config.sqlite_pragmas if is_sqlite else None)
         self.__session = sessionmaker(self.__engine)
 
-        self.create_all_tables()
+        if self._config.create_tables_on_init:
+            try:
+                is_created = EngineRegistry.ensure_schema(self.__engine, DBManager.Base.metadata)
+            except Exception:
+                EngineRegistry.release(self.__engine)
+                raise
+            if self._dynamic_verbose_level != VerboseLevel.NONE:
+                self._logger.debug(TermLoggerType.SHORT, f'schema_created: {is_created}')
         self._logger.info(TermLoggerType.ALL, f'{Helper.get_fully_qualified_name(self.__class__)} was initialized')
 
+    @staticmethod
+    def build_owned_config(owner: BaseClass) -> dict[str, Any]:
+        # from the dbconn_* options of an owner's config; the logs are named after the owner,
+        # so that several owners can hold their own DBManager in the same process
+        owner_config = owner._config
+        owner_name = owner.__class__.__name__
+        return {'conn_username': owner_config.dbconn_username,
+                'conn_dbname': owner_config.dbconn_dbname,
+                'conn_host': owner_config.dbconn_host,
+                'conn_drivername': owner_config.dbconn_drivername,
+                'logs_folder': owner_config.logs_folder,
+                'short_term_logger_filename': f'{owner_name}_DBManager_short_term.bwpylog',
+                'long_term_logger_filename': f'{owner_name}_DBManager_long_term.bwpylog'}
+
     @base_method
     def create_all_tables(self):
         DBManager.Base.metadata.create_all(bind=self.__engine)
@@ -60,52 +128,363 @@ class DBManager(BaseClass):
     @base_method
     def drop_all_tables(self):
         DBManager.Base.metadata.drop_all(bind=self.__engine)
+        EngineRegistry.forget_schema(self.__engine)
 
     @base_method
     def print_tables_names(self):
         self._logger.debug(TermLoggerType.ALL, 'Tables: {}'.format(', '.join(self.__metadata.tables.keys())))
 
-    @base_method
-    def insert(self, records: Sequence[Base]):
-        def record_as_dict(record):
-            record_dict = {col.name: getattr(record, col.name)
-                           for col in record.__table__.columns}
-            for autofill_field_name in self._config.record_autofill_field_names:
-                if autofill_field_name in record_dict:
-                    del record_dict[autofill_field_name]
-            return record_dict
-
-        if len(records) == 0:
-            return
-
-        table = records[0].__class__
+    @contextmanager
+    def begin(self) -> Iterator[Session]:
+        with self.__session.begin() as session:
+            yield session
+
+    @contextmanager
+    def __use_session(self, session: Optional[Session]) -> Iterator[Session]:
+        # joins the caller's transaction when a session is given, otherwise opens a new one
+        if session is not None:
+            yield session
+        else:
+            with self.__session.begin() as new_session:
+                yield new_session
+
+    def __record_as_dict(self, record: Base) -> dict[str, Any]:
+        record_dict = {col.name: getattr(record, col.name)
+                       for col in record.__table__.columns}
+        for autofill_field_name in self._config.record_autofill_field_names:
+            if autofill_field_name in record_dict:
+                del record_dict[autofill_field_name]
+        return record_dict
+
+    @staticmethod
+    def build_insert(dialect_name: str, table: type) -> Insert:
+        # both dialects share the on_conflict_do_nothing / on_conflict_do_update / excluded api
+        dialect_insert = DBManager.__DIALECT_INSERTS.get(dialect_name)
+        if dialect_insert is None:
+            raise UnsupportedDialect(f'Upserts are not supported for "{dialect_name}". '
+                                     f'Available: {", ".join(DBManager.__DIALECT_INSERTS.keys())}.')
+        return dialect_insert(table.__table__)
+
+    @staticmethod
+    def build_utc_now(dialect_name: str, offset_in_sec: float = 0) -> ColumnElement[datetime]:
+        # evaluated by the db server, so timestamps shared between hosts do not depend on their clocks or time zones
+        if dialect_name == 'postgresql':
+            return func.timezone('UTC', func.now(), type_=DateTime) + timedelta(seconds=offset_in_sec)
+        elif dialect_name == 'sqlite':
+            return func.strftime('%Y-%m-%d %H:%M:%f', 'now', f'{offset_in_sec:+} seconds', type_=DateTime)
+        raise UnsupportedDialect(f'Server timestamps are not supported for "{dialect_name}". '
+                                 f'Available: postgresql, sqlite.')
+
+    def __execute_values(self, session: Session, insert_stmt: Insert, record_dicts: list[dict[str, Any]]) -> Result:
+        # sqlite caps the bound parameters of a statement and compiles multi-row values slowly:
+        # an executemany is batched by the dialect instead (also with RETURNING)
+        if self.__engine.dialect.name == 'sqlite':
+            return session.execute(insert_stmt.execution_options(preserve_rowcount=True), record_dicts)
+        return session.execute(insert_stmt.values(record_dicts).execution_options(preserve_rowcount=True))
+
+    @staticmethod
+    def __check_records(records: Sequence[Base], table: Optional[type] = None) -> type:
+        table = table or records[0].__class__
         if not Helper.type_check_contents(values=records, expected_type=table):
             raise RecordsMismatchException('Not all records are for the same table.')
+        return table
 
-        with self.__session.begin() as session:
-            record_dicts = list(map(record_as_dict, records))
-            if self._dynamic_verbose_level != VerboseLevel.NONE:
-                self._logger.debug(TermLoggerType.SHORT, f'table: {Helper.get_fully_qualified_name(table)}')
-                self._logger.debug(TermLoggerType.SHORT, f'record_dicts:\n{Helper.beautify_json(record_dicts)}')
-            insert_stmt = insert(table).values(record_dicts)
-            ignore_duplicates_stmt = insert_stmt.on_conflict_do_nothing()
-            session.execute(ignore_duplicates_stmt)
-            session.commit()
+    @base_method
+    def insert(self,
+               records: Iterable[Base],
+               chunk_size: Optional[int] = None,
+               session: Optional[Session] = None) -> InsertResult:
+        insert_result = InsertResult()
+        table = None
+        with self.__use_session(session) as session:
+            for records_chunk in Helper.split_in_chunks(records, chunk_size or self._config.insert_chunk_size):
+                table = self.__check_records(records_chunk, table)
+                record_dicts = list(map(self.__record_as_dict, records_chunk))
+                if self._dynamic_verbose_level != VerboseLevel.NONE:
+                    self._logger.debug(TermLoggerType.SHORT, f'table: {Helper.get_fully_qualified_name(table)}')
+                    self._logger.debug(TermLoggerType.SHORT, f'record_dicts:\n{Helper.beautify_json(record_dicts)}')
+                insert_stmt = self.build_insert(self.__engine.dialect.name, table)
+                cursor_result = self.__execute_values(session, insert_stmt.on_conflict_do_nothing(), record_dicts)
+                insert_result.add(len(records_chunk), cursor_result.rowcount)
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'insert_result: {insert_result}')
+        return insert_result
+
+    def __get_bulk_insert_columns(self, table: type) -> list[Column]:
+        # autofill fields are only kept when they can be resolved client-side (e.g. timestamps)
+        return [col for col in table.__table__.columns
+                if col.name not in self._config.record_autofill_field_names or col.default is not None]
+
+    @staticmethod
+    def __resolve_default_values(columns: Sequence[Column]) -> dict[str, Any]:
+        default_values = {}
+        for col in columns:
+            if col.default is not None:
+                default_values[col.name] = col.default.arg(None) if col.default.is_callable else col.default.arg
+        return default_values
+
+    def __serialize_for_copy(self, records: Sequence[Base], columns: Sequence[Column]) -> io.StringIO:
+        def serialize_value(value: Any) -> Any:
+            if value is None:
+                return self._config.bulk_insert_null_marker
+            elif isinstance(value, datetime):
+                return value.isoformat(sep=' ')
+            return value
+
+        default_values = self.__resolve_default_values(columns)
+        buffer = io.StringIO()
+        csv_writer = csv.writer(buffer)
+        for record in records:
+            row = []
+            for col in columns:
+                value = getattr(record, col.name)
+                if value is None and col.name in default_values:
+                    value = default_values[col.name]
+                row.append(serialize_value(value))
+            csv_writer.writerow(row)
+        buffer.seek(0)
+        return buffer
+
+    def __copy_into(self, connection: Connection, staging_table: Table, buffer: io.StringIO):
+        preparer = connection.dialect.identifier_preparer
+        quoted_columns = ', '.join(map(lambda col: (preparer.quote(col.name)), staging_table.columns))
+        copy_stmt = (f'COPY {preparer.format_table(staging_table)} ({quoted_columns}) '
+                     f"FROM STDIN WITH (FORMAT csv, NULL '{self._config.bulk_insert_null_marker}')")
+        cursor = connection.connection.cursor()
+        try:
+            if hasattr(cursor, 'copy_expert'):  # psycopg2
+                cursor.copy_expert(copy_stmt, buffer)
+            else:  # psycopg (3)
+                with cursor.copy(copy_stmt) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+
+    @base_method
+    def bulk_insert(self,
+                    records: Iterable[Base],
+                    chunk_size: Optional[int] = None,
+                    session: Optional[Session] = None) -> InsertResult:
+        if self.__engine.dialect.name != 'postgresql':
+            return self.insert(records, chunk_size=chunk_size, session=session)
+
+        insert_result = InsertResult()
+        table = None
+        staging_table = None
+        with self.__use_session(session) as session:
+            connection = session.connection()
+            for records_chunk in Helper.split_in_chunks(records, chunk_size or self._config.bulk_insert_chunk_size):
+                table = self.__check_records(records_chunk, table)
+                columns = self.__get_bulk_insert_columns(table)
+                if staging_table is None:
+                    staging_table = Table(f'{self._config.bulk_insert_staging_prefix}{table.__tablename__}',
+                                          MetaData(),
+                                          *[Column(col.name, col.type) for col in columns],
+                                          prefixes=['TEMPORARY'])
+                    staging_table.create(connection)
+                else:
+                    connection.execute(staging_table.delete())
+
+                self.__copy_into(connection, staging_table, self.__serialize_for_copy(records_chunk, columns))
+                merge_stmt = self.build_insert(self.__engine.dialect.name, table).from_select(
+                    [col.name for col in columns], select(staging_table))
+                ignore_duplicates_stmt = merge_stmt.on_conflict_do_nothing()
+                cursor_result = connection.execute(ignore_duplicates_stmt.execution_options(preserve_rowcount=True))
+                insert_result.add(len(records_chunk), cursor_result.rowcount)
+
+                if self._dynamic_verbose_level != VerboseLevel.NONE:
+                    self._logger.debug(TermLoggerType.SHORT,
+                                       f'table: {Helper.get_fully_qualified_name(table)} | {insert_result}')
+
+            if staging_table is not None:
+                staging_table.drop(connection)
+
+        return insert_result
+
+    @base_method
+    def insert_returning(self,
+                         records: Iterable[Base],
+                         conflict_columns: Sequence[InstrumentedAttribute],
+                         returning_columns: Sequence[InstrumentedAttribute],
+                         chunk_size: Optional[int] = None,
+                         session: Optional[Session] = None) -> list[Row]:
+        # conflicting rows get a no-op update so that RETURNING also yields the ones that already existed
+        conflict_names = list(map(lambda col: (col.name), conflict_columns))
+        returned_rows = []
+        table = None
+        with self.__use_session(session) as session:
+            for records_chunk in Helper.split_in_chunks(records, chunk_size or self._config.insert_chunk_size):
+                table = self.__check_records(records_chunk, table)
+                unique_record_dicts = {}
+                for record_dict in map(self.__record_as_dict, records_chunk):
+                    unique_record_dicts[tuple(record_dict[name] for name in conflict_names)] = record_dict
+                insert_stmt = self.build_insert(self.__engine.dialect.name, table)
+                upsert_stmt = insert_stmt.on_conflict_do_update(
+                    index_elements=conflict_names,
+                    set_={conflict_names[0]: getattr(insert_stmt.excluded, conflict_names[0])})
+                returned_rows.extend(self.__execute_values(session,
+                                                           upsert_stmt.returning(*returning_columns),
+                                                           list(unique_record_dicts.values())).all())
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'returned_rows: {len(returned_rows)}')
+        return returned_rows
+
+    @base_method
+    def upsert(self,
+               records: Iterable[Base],
+               conflict_columns: Sequence[InstrumentedAttribute],
+               chunk_size: Optional[int] = None,
+               session: Optional[Session] = None) -> InsertResult:
+        # conflicting rows take the new values, and their onupdate columns (e.g. UpdatedOn) are refreshed
+        conflict_names = list(map(lambda col: (col.name), conflict_columns))
+        insert_result = InsertResult()
+        table = None
+        with self.__use_session(session) as session:
+            for records_chunk in Helper.split_in_chunks(records, chunk_size or self._config.insert_chunk_size):
+                table = self.__check_records(records_chunk, table)
+                unique_record_dicts = {}
+                for record_dict in map(self.__record_as_dict, records_chunk):
+                    unique_record_dicts[tuple(record_dict[name] for name in conflict_names)] = record_dict
+                insert_stmt = self.build_insert(self.__engine.dialect.name, table)
+                update_values = {name: getattr(insert_stmt.excluded, name)
+                                 for name in next(iter(unique_record_dicts.values())).keys()
+                                 if name not in conflict_names}
+                for col in table.__table__.columns:
+                    if col.onupdate is not None and col.name not in update_values:
+                        update_values[col.name] = col.onupdate.arg(None) if col.onupdate.is_callable \
+                            else col.onupdate.arg
+                upsert_stmt = insert_stmt.on_conflict_do_update(index_elements=conflict_names, set_=update_values)
+                cursor_result = self.__execute_values(session, upsert_stmt, list(unique_record_dicts.values()))
+                insert_result.add(len(records_chunk), cursor_result.rowcount)
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'upsert_result: {insert_result}')
+        return insert_result
+
+    @base_method
+    def replace_values(self,
+                       column: InstrumentedAttribute,
+                       replacements: Iterable[tuple[Any, Any]],
+                       skip_conflicts_on: Optional[Sequence[InstrumentedAttribute]] = None,
+                       chunk_size: Optional[int] = None,
+                       session: Optional[Session] = None) -> int:
+        # skip_conflicts_on: the other columns of a unique constraint that includes the replaced column.
+        # rows whose new value already exists with the same values in them are left untouched
+        table_column = column.class_.__table__.c[column.name]
+        update_stmt = (update(table_column.table)
+                       .where(table_column == bindparam('old_value'))
+                       .values({column.name: bindparam('new_value')}))
+        if skip_conflicts_on is not None:
+            existing_table = table_column.table.alias()
+            update_stmt = update_stmt.where(~exists().where(
+                existing_table.c[column.name] == bindparam('new_value'),
+                *[existing_table.c[conflict_column.name] == table_column.table.c[conflict_column.name]
+                  for conflict_column in skip_conflicts_on]))
+        replaced_count = 0
+        with self.__use_session(session) as session:
+            for replacements_chunk in Helper.split_in_chunks(replacements,
+                                                             chunk_size or self._config.insert_chunk_size):
+                cursor_result = session.execute(update_stmt.execution_options(preserve_rowcount=True),
+                                                [{'old_value': old_value, 'new_value': new_value}
+                                                 for old_value, new_value in replacements_chunk])
+                replaced_count += cursor_result.rowcount
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'replaced_count ({column}): {replaced_count}')
+        return replaced_count
+
+    @staticmethod
+    def __build_select(columns: Sequence[InstrumentedAttribute],
+                       filter_criterion: Optional[Sequence[BinaryExpression | bool]]) -> Select:
+        select_stmt = select(*columns)
+        if filter_criterion is not None:
+            select_stmt = select_stmt.where(*filter_criterion)
+        return select_stmt
+
+    @staticmethod
+    def __get_pandas_dtypes(columns: Sequence[InstrumentedAttribute]) -> dict[str, str]:
+        # nullable extension dtypes, so integer and boolean columns with NULLs do not fall back to object/float
+        pandas_dtypes = {}
+        for col in columns:
+            for column_type, pandas_dtype in ((Boolean, 'boolean'), (Integer, 'Int64'), (Float, 'Float64'),
+                                              (String, 'string')):
+                if isinstance(col.type, column_type):
+                    pandas_dtypes[col.name] = pandas_dtype
+                    break
+        return pandas_dtypes
+
+    @staticmethod
+    def __get_arrow_schema(columns: Sequence[InstrumentedAttribute]) -> 'pyarrow.Schema':
+        import pyarrow
+
+        arrow_fields = []
+        for col in columns:
+            arrow_type = pyarrow.string()
+            for column_type, column_arrow_type in ((Boolean, pyarrow.bool_()), (Integer, pyarrow.int64()),
+                                                   (Float, pyarrow.float64()), (DateTime, pyarrow.timestamp('us'))):
+                if isinstance(col.type, column_type):
+                    arrow_type = column_arrow_type
+                    break
+            arrow_fields.append(pyarrow.field(col.name, arrow_type))
+        return pyarrow.schema(arrow_fields)
 
     @base_method
     def get_columns(self,
                     columns: Sequence[InstrumentedAttribute],
-                    filter_criterion: Optional[Sequence[BinaryExpression | bool]] = None) -> pandas.DataFrame:
-        with self.__session.begin() as session:
-            query_result = session.query(*columns)
-            if filter_criterion is not None:
-                query_result = query_result.filter(*filter_criterion)
-            pandas_result = pandas.read_sql(sql=query_result.statement, con=self.__engine)
+                    filter_criterion: Optional[Sequence[BinaryExpression | bool]] = None,
+                    typed_dtypes: bool = False,
+                    session: Optional[Session] = None) -> 'pandas.DataFrame':
+        import pandas  # deferred: only needed for reads
+
+        with self.__use_session(session) as session:
+            pandas_result = pandas.read_sql_query(sql=self.__build_select(columns, filter_criterion),
+                                                  con=session.connection(),
+                                                  dtype=self.__get_pandas_dtypes(columns) if typed_dtypes else None)
             if self._dynamic_verbose_level != VerboseLevel.NONE:
                 self._logger.debug(TermLoggerType.SHORT, f'pandas_result:\n{str(pandas_result)}')
             return pandas_result
 
+    def __stream_partitions(self,
+                            select_stmt: Select,
+                            chunk_size: int,
+                            session: Optional[Session]) -> Iterator[Sequence[Row]]:
+        with self.__use_session(session) as session:
+            # a server-side cursor on postgres: only one chunk of rows is held on the client at a time
+            streamed_result = session.connection().execution_options(stream_results=True,
+                                                                     max_row_buffer=chunk_size).execute(select_stmt)
+            yield from streamed_result.partitions(chunk_size)
+
+    @base_method
+    def iter_columns(self,
+                     columns: Sequence[InstrumentedAttribute],
+                     filter_criterion: Optional[Sequence[BinaryExpression | bool]] = None,
+                     chunk_size: Optional[int] = None,
+                     output_format: str = 'pandas',
+                     typed_dtypes: bool = True,
+                     session: Optional[Session] = None) -> Iterator['pandas.DataFrame | pyarrow.RecordBatch']:
+        # rows are fetched while iterating, so the session stays open until the iterator is exhausted or closed
+        columns_names = list(map(lambda col: (col.name), columns))
+        partitions = self.__stream_partitions(self.__build_select(columns, filter_criterion),
+                                              chunk_size or self._config.read_chunk_size,
+                                              session)
+
+        if output_format == 'pandas':
+            import pandas
+
+            pandas_dtypes = self.__get_pandas_dtypes(columns) if typed_dtypes else {}
+            return (pandas.DataFrame.from_records(partition, columns=columns_names).astype(pandas_dtypes)
+                    for partition in partitions)
+        elif output_format == 'arrow':
+            import pyarrow
+
+            arrow_schema = self.__get_arrow_schema(columns)
+            return (pyarrow.RecordBatch.from_pylist([row._asdict() for row in partition], schema=arrow_schema)
+                    for partition in partitions)
+        raise UnsupportedReadFormat(f'Unsupported read format: "{output_format}". Available: pandas, arrow.')
+
     @base_method
     def destroy(self):
         super().destroy()
-        self.__engine.dispose()
+        EngineRegistry.release(self.__engine)
@@ -0,0 +1,188 @@
+import hashlib
+import os
+import threading
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import (create_engine, event, inspect, insert, literal, select, text, Column, Connection, DateTime,
+                        Engine, MetaData, String, Table, UniqueConstraint)
+from sqlalchemy.engine import URL
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+
+
+class SchemaMismatch(Exception):
+    pass
+
+
+class EngineRegistry:
+    __lock = threading.Lock()
+    __engines: dict[tuple, list] = {}  # key: [engine, references count]
+    __checked_schemas: set[tuple[str, str]] = set()
+
+    __schema_metadata = MetaData()
+    __schema_versions_table = Table('SchemaVersions', __schema_metadata,
+                                    Column('Fingerprint', String(64), primary_key=True),
+                                    Column('CreatedOn', DateTime(), default=datetime.now))
+
+    @staticmethod
+    def __get_key(url: URL, engine_params: dict[str, Any], connect_pragmas: Optional[dict[str, Any]]) -> tuple:
+        return (url.render_as_string(hide_password=False),
+                tuple(sorted(engine_params.items())),
+                tuple(sorted((connect_pragmas or {}).items())))
+
+    @staticmethod
+    def set_pragmas(engine: Engine, connect_pragmas: dict[str, Any]):
+        def set_connection_pragmas(dbapi_connection, _):
+            cursor = dbapi_connection.cursor()
+            for pragma_name, pragma_value in connect_pragmas.items():
+                cursor.execute(f'PRAGMA {pragma_name}={pragma_value}')
+            cursor.close()
+
+        event.listen(engine, 'connect', set_connection_pragmas)
+
+    @classmethod
+    def acquire(cls, url: URL, connect_pragmas: Optional[dict[str, Any]] = None, **engine_params) -> Engine:
+        # one engine, hence one pool, per url and pool settings in the whole process
+        key = cls.__get_key(url, engine_params, connect_pragmas)
+        with cls.__lock:
+            registered_engine = cls.__engines.get(key)
+            if registered_engine is None:
+                engine = create_engine(url, **engine_params)
+                if connect_pragmas:
+                    cls.set_pragmas(engine, connect_pragmas)
+                registered_engine = cls.__engines[key] = [engine, 0]
+            registered_engine[1] += 1
+            return registered_engine[0]
+
+    @classmethod
+    def release(cls, engine: Engine):
+        with cls.__lock:
+            for key, registered_engine in list(cls.__engines.items()):
+                if registered_engine[0] is engine:
+                    registered_engine[1] -= 1
+                    if registered_engine[1] <= 0:
+                        del cls.__engines[key]
+                        engine.dispose()
+                    return
+
+    @classmethod
+    def get_references_count(cls, engine: Engine) -> int:
+        with cls.__lock:
+            return sum(registered_engine[1] for registered_engine in cls.__engines.values()
+                       if registered_engine[0] is engine)
+
+    @staticmethod
+    def __get_unique_columns(table: Table) -> list[tuple[str, ...]]:
+        return sorted(tuple(sorted(constraint.columns.keys())) for constraint in table.constraints
+                      if isinstance(constraint, UniqueConstraint))
+
+    @staticmethod
+    def get_schema_fingerprint(metadata: MetaData) -> str:
+        schema_description = repr(sorted((table.name,
+                                          sorted((column.name, str(column.type), column.nullable, column.primary_key)
+                                                 for column in table.columns),
+                                          sorted((str(index.name), tuple(index.columns.keys()), index.unique)
+                                                 for index in table.indexes),
+                                          EngineRegistry.__get_unique_columns(table))
+                                         for table in metadata.tables.values()))
+        return hashlib.blake2b(schema_description.encode('utf-8'), digest_size=16).hexdigest()
+
+    @staticmethod
+    def __build_added_column(connection: Connection, table: Table, column: Column) -> Optional[str]:
+        # existing rows get the scalar default of the column, if any
+        default_value = column.default.arg if column.default is not None and column.default.is_scalar else None
+        if column.primary_key or (not column.nullable and default_value is None):
+            return None
+        dialect = connection.dialect
+        column_ddl = f'{dialect.identifier_preparer.quote(column.name)} {column.type.compile(dialect=dialect)}'
+        if default_value is not None:
+            default_literal = literal(default_value, column.type).compile(dialect=dialect,
+                                                                          compile_kwargs={'literal_binds': True})
+            column_ddl += f' DEFAULT {default_literal}'
+        if not column.nullable:
+            column_ddl += ' NOT NULL'
+        return f'ALTER TABLE {dialect.identifier_preparer.format_table(table)} ADD COLUMN {column_ddl}'
+
+    @classmethod
+    def __migrate(cls, connection: Connection, metadata: MetaData):
+        # create_all never alters existing tables: their missing columns and indexes are added here, and whatever
+        # cannot be added in place is reported instead of recording a schema the database does not match
+        inspector = inspect(connection)
+        mismatches = []
+        for table in metadata.sorted_tables:
+            live_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in live_columns:
+                    added_column_ddl = cls.__build_added_column(connection, table, column)
+                    if added_column_ddl is None:
+                        mismatches.append(f'column {table.name}.{column.name} cannot be added to existing rows')
+                    else:
+                        connection.execute(text(added_column_ddl))
+
+            live_indexes = inspector.get_indexes(table.name)
+            live_index_names = {index['name'] for index in live_indexes}
+            for index in table.indexes:
+                if index.name not in live_index_names:
+                    index.create(bind=connection)
+
+            live_unique_columns = {tuple(sorted(constraint['column_names']))
+                                   for constraint in inspector.get_unique_constraints(table.name)}
+            live_unique_columns |= {tuple(sorted(index['column_names'])) for index in live_indexes if index['unique']}
+            for unique_columns in cls.__get_unique_columns(table):
+                if unique_columns not in live_unique_columns:
+                    mismatches.append(f'unique constraint {table.name}({", ".join(unique_columns)}) is missing')
+
+        if len(mismatches) > 0:
+            raise SchemaMismatch(f'The database does not match the schema and cannot be migrated in place: '
+                                 f'{"; ".join(mismatches)}.')
+
+    @classmethod
+    def __is_schema_recorded(cls, connection: Connection, fingerprint: str) -> bool:
+        return connection.execute(select(cls.__schema_versions_table.c.Fingerprint)
+                                  .where(cls.__schema_versions_table.c.Fingerprint == fingerprint)).first() is not None
+
+    @classmethod
+    def ensure_schema(cls, engine: Engine, metadata: MetaData) -> bool:
+        # tables are only created, or migrated, when this exact schema was never recorded on this database
+        schema_key = (engine.url.render_as_string(hide_password=False), cls.get_schema_fingerprint(metadata))
+        with cls.__lock:
+            if schema_key in cls.__checked_schemas:
+                return False
+
+        try:
+            with engine.begin() as connection:
+                cls.__schema_metadata.create_all(bind=connection)
+                is_created = not cls.__is_schema_recorded(connection, schema_key[1])
+                if is_created:
+                    metadata.create_all(bind=connection)
+                    cls.__migrate(connection, metadata)
+                    connection.execute(insert(cls.__schema_versions_table).values(Fingerprint=schema_key[1]))
+        except (IntegrityError, OperationalError, ProgrammingError):
+            # another process created or migrated the same schema concurrently
+            with engine.connect() as connection:
+                if not cls.__is_schema_recorded(connection, schema_key[1]):
+                    raise
+            is_created = False
+
+        with cls.__lock:
+            cls.__checked_schemas.add(schema_key)
+        return is_created
+
+    @classmethod
+    def forget_schema(cls, engine: Engine):
+        with engine.begin() as connection:
+            cls.__schema_metadata.drop_all(bind=connection)
+        url = engine.url.render_as_string(hide_password=False)
+        with cls.__lock:
+            cls.__checked_schemas = {schema_key for schema_key in cls.__checked_schemas if schema_key[0] != url}
+
+    @classmethod
+    def reset_after_fork(cls):
+        # pooled connections belong to the parent: children drop them without closing, and build their own
+        cls.__lock = threading.Lock()
+        for registered_engine in cls.__engines.values():
+            registered_engine[0].dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=EngineRegistry.reset_after_fork)
@@ -0,0 +1,110 @@
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from source.db_tables import EpochMetrics
+from source.libs.base_class import BaseConfig, VerboseLevel, base_method, BaseClass
+from source.libs.db_manager import DBManager
+from source.libs.helper import Helper
+from source.types.logger_types import TermLoggerType
+
+
+@dataclass
+class Config(BaseConfig):
+    dbconn_dbname: str  # the database file for sqlite
+    dbconn_username: Optional[str] = None
+    dbconn_host: str = 'localhost'
+    dbconn_drivername: str = 'postgresql'  # or 'sqlite'
+    flush_batch_size: int = 256
+    flush_interval_in_sec: float = 5.0
+    queue_max_size: int = 100000
+
+
+class EpochMetricsWriter(BaseClass):
+
+    def __init__(self, config: dict, default_verbose_level: Optional[VerboseLevel] = None):
+        super().__init__(Config, config, default_verbose_level)
+
+        # always its own db manager: it is used from the writer thread, and the verbose state of base methods
+        # is per instance (the engine, hence the connection pool, is still shared within the process)
+        self.__db_manager = None
+        self.__initialize_dbm()
+
+        self.__records_queue = queue.Queue(maxsize=self._config.queue_max_size)
+        self.__written_records_count = 0
+        self.__writer_thread = threading.Thread(target=self.__write_records,
+                                                name=f'{self.__class__.__name__}Writer',
+                                                daemon=True)
+        self.__writer_thread.start()
+
+        self._logger.info(TermLoggerType.ALL, f'{Helper.get_fully_qualified_name(self.__class__)} was initialized')
+
+    @base_method
+    def __initialize_dbm(self):
+        self.__db_manager = DBManager(config=DBManager.build_owned_config(self))
+
+    @property
+    def written_records_count(self) -> int:
+        return self.__written_records_count
+
+    def __insert_records(self, pending_records: list[EpochMetrics]):
+        try:
+            inserted_count = self.__db_manager.insert(pending_records).inserted
+        except Exception as exception:  # a failed batch must not stop the writer, nor the training
+            self._logger.error(TermLoggerType.ALL, f'Epoch metrics were lost ({len(pending_records)}): {exception!r}')
+        else:
+            self.__written_records_count += inserted_count
+        pending_records.clear()
+
+    def __write_records(self):
+        # records are batched until the batch is full, the interval elapses or a flush is requested
+        pending_records = []
+        pending_markers = []
+        is_running = True
+        while is_running:
+            timeout = self._config.flush_interval_in_sec if len(pending_records) > 0 else None
+            try:
+                record = self.__records_queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+            else:
+                if record is None:
+                    is_running = False
+                elif isinstance(record, threading.Event):
+                    pending_markers.append(record)
+                else:
+                    pending_records.append(record)
+
+            if (record is None or isinstance(record, threading.Event)
+                    or len(pending_records) >= self._config.flush_batch_size):
+                if len(pending_records) > 0:
+                    self.__insert_records(pending_records)
+                for marker in pending_markers:
+                    marker.set()
+                pending_markers.clear()
+
+    def record(self,
+               params_id: int,
+               epoch: int,
+               loss: Optional[float],
+               val_loss: Optional[float],
+               wall_time_in_sec: float):
+        self.__records_queue.put(EpochMetrics(ParamsID=params_id,
+                                              Epoch=epoch,
+                                              Loss=loss,
+                                              ValLoss=val_loss,
+                                              WallTimeInSec=wall_time_in_sec))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        flushed_event = threading.Event()
+        self.__records_queue.put(flushed_event)
+        return flushed_event.wait(timeout)
+
+    @base_method
+    def destroy(self):
+        self.__records_queue.put(None)  # pending records are written before the writer stops
+        self.__writer_thread.join()
+        self._logger.info(TermLoggerType.ALL, f'Written epoch metrics: {self.__written_records_count}')
+        super().destroy()
+        self.__db_manager.destroy()
@@ -1,23 +1,33 @@
 import hashlib
+import functools
 import json
 import os
 import re
-from collections.abc import Sequence, Callable
+from collections.abc import Sequence, Callable, Iterable, Iterator
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 from typing import Any
 
-import git
-
 
 class Helper:
+    CODE_VERSION_ENV_VAR = 'AITTD_CODE_VERSION'
 
     @staticmethod
     def get_last_git_tag() -> str:
+        import git  # deferred: importing GitPython is slow and only needed here
+
         repo = git.Repo(Helper.build_paths('.'), search_parent_directories=True)
         last_tag = repo.tags[0].name
         return last_tag
 
+    @staticmethod
+    @functools.cache
+    def get_code_version() -> str:
+        # resolved once per process; the environment variable skips git entirely
+        return os.environ.get(Helper.CODE_VERSION_ENV_VAR) or Helper.get_last_git_tag()
+
     @staticmethod
     def generate_dict_hash(data: dict, encondig: str = 'utf-8') -> str:
         stringified_data = Helper.recursively_stringify_objects(data)
@@ -31,6 +41,27 @@ class Helper:
         md5_generated_hash = md5_hashlib.hexdigest()
         return md5_generated_hash
 
+    @staticmethod
+    def generate_file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+        blake2b_hashlib = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as file:
+            while chunk := file.read(chunk_size):
+                blake2b_hashlib.update(chunk)
+        return blake2b_hashlib.hexdigest()
+
+    @staticmethod
+    @contextmanager
+    def lock_file(path: Path) -> Iterator[None]:
+        # exclusive advisory lock, across processes and threads (each holder opens its own descriptor)
+        import fcntl  # deferred: posix only
+
+        with open(path, 'a') as locked_file:
+            fcntl.flock(locked_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(locked_file, fcntl.LOCK_UN)
+
     @staticmethod
     def ensure_folder(raw_path: str) -> Path:
         resolved_path = Helper.build_paths(raw_path)
@@ -60,6 +91,12 @@ class Helper:
         else:
             return False
 
+    @staticmethod
+    def split_in_chunks(values: Iterable, chunk_size: int) -> Iterator[list]:
+        iterator = iter(values)
+        while chunk := list(islice(iterator, chunk_size)):
+            yield chunk
+
     @staticmethod
     def beautify_json(json_object: Any) -> str:
         stringified_objects = Helper.recursively_stringify_objects(json_object)
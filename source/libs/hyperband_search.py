@@ -0,0 +1,177 @@
+import dataclasses
+import math
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Optional
+
+from source.db_tables import SearchRungs
+from source.libs.base_class import BaseConfig, VerboseLevel, base_method, BaseClass
+from source.libs.db_manager import DBManager
+from source.libs.pipeline_params_manager import PipelineParamsManager
+from source.libs.search_strategies import RandomSearch
+from source.types.logger_types import TermLoggerType
+from source.types.pipeline_params_types import PipelineParams, PipelineParamsCombinations
+from source.types.search_types import RungResult
+
+
+@dataclass
+class Config(BaseConfig):
+    dbconn_dbname: str  # the database file for sqlite
+    search_name: str
+    dbconn_username: Optional[str] = None
+    dbconn_host: str = 'localhost'
+    dbconn_drivername: str = 'postgresql'  # or 'sqlite'
+    reduction_factor: int = 3  # eta: only the top 1 / eta of each rung is promoted
+    min_budget: int = 1  # in FitMaxEpochs
+    max_budget: Optional[int] = None  # None: the FitMaxEpochs of the candidates
+    maximize_score: bool = False  # scores are losses by default
+    seed: Optional[int] = None
+
+
+class HyperbandSearch(BaseClass):
+
+    def __init__(self,
+                 config: dict,
+                 pipeline_params_manager: Optional[PipelineParamsManager] = None,
+                 db_manager: Optional[DBManager] = None,
+                 default_verbose_level: Optional[VerboseLevel] = None):
+        super().__init__(Config, config, default_verbose_level)
+
+        self.__pipeline_params_manager = pipeline_params_manager
+        self.__owns_pipeline_params_manager = pipeline_params_manager is None
+        self.__db_manager = db_manager
+        self.__owns_db_manager = db_manager is None
+        self.__initialize_managers()
+
+    @base_method
+    def __initialize_managers(self):
+        if self.__owns_db_manager:
+            self.__db_manager = DBManager(config=DBManager.build_owned_config(self))
+        if self.__owns_pipeline_params_manager:
+            # the db manager is shared, and the logs are named after this owner like it
+            self.__pipeline_params_manager = PipelineParamsManager(
+                config={'dbconn_dbname': self._config.dbconn_dbname,
+                        'logs_folder': self._config.logs_folder,
+                        'short_term_logger_filename': 'HyperbandSearch_PipelineParamsManager_short_term.bwpylog',
+                        'long_term_logger_filename': 'HyperbandSearch_PipelineParamsManager_long_term.bwpylog'},
+                db_manager=self.__db_manager)
+
+    def __with_budget(self, params: PipelineParams, budget: int) -> PipelineParams:
+        # a different budget is a different trained model, hence a different hash (in the manager's scheme)
+        budgeted_params = dataclasses.replace(params, FitMaxEpochs=budget)
+        budgeted_params.Hash = self.__pipeline_params_manager.hash_params(budgeted_params)
+        return budgeted_params
+
+    def __get_sort_key(self, rung_result: RungResult) -> float:
+        if math.isnan(rung_result.score):
+            return math.inf
+        return -rung_result.score if self._config.maximize_score else rung_result.score
+
+    @base_method
+    def __evaluate_rung(self,
+                        candidates: Sequence[PipelineParams],
+                        evaluate: Callable[[PipelineParams], float],
+                        bracket: int,
+                        rung: int,
+                        budget: int,
+                        promoted_count: int) -> list[RungResult]:
+        rung_results = []
+        for params in candidates:
+            budgeted_params = self.__with_budget(params, budget)
+            try:
+                score = float(evaluate(budgeted_params))
+            except Exception as exception:
+                self._logger.error(TermLoggerType.ALL, f'Evaluation failed for {budgeted_params.Hash}: {exception!r}')
+                score = math.nan
+            rung_results.append(RungResult(params=budgeted_params, bracket=bracket, rung=rung, budget=budget,
+                                           score=score))
+
+        for rung_result in sorted(rung_results, key=self.__get_sort_key)[:promoted_count]:
+            rung_result.promoted = not math.isnan(rung_result.score)
+        self.__store_rung(rung_results)
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'bracket: {bracket} | rung: {rung} | budget: {budget} | '
+                                                     f'evaluated: {len(rung_results)} | promoted: {promoted_count}')
+        return rung_results
+
+    @base_method
+    def __store_rung(self, rung_results: Sequence[RungResult]):
+        stored_params = self.__pipeline_params_manager.store_in_db(map(lambda result: (result.params), rung_results))
+        params_ids = {params_hash: params_id for (params_hash, _), params_id in stored_params.items()}
+        # a search run again under the same name overwrites the scores of the evaluations it repeats
+        self.__db_manager.upsert([SearchRungs(SearchName=self._config.search_name,
+                                              ParamsID=params_ids[rung_result.params.Hash],
+                                              Bracket=rung_result.bracket,
+                                              Rung=rung_result.rung,
+                                              Budget=rung_result.budget,
+                                              Score=None if math.isnan(rung_result.score) else rung_result.score,
+                                              Promoted=rung_result.promoted)
+                                  for rung_result in rung_results],
+                                 conflict_columns=[SearchRungs.SearchName, SearchRungs.Bracket, SearchRungs.Rung,
+                                                   SearchRungs.ParamsID])
+
+    @base_method
+    def run_successive_halving(self,
+                               candidates: Sequence[PipelineParams],
+                               evaluate: Callable[[PipelineParams], float],
+                               min_budget: Optional[int] = None,
+                               bracket: int = 0) -> list[RungResult]:
+        eta = self._config.reduction_factor
+        max_budget = self._config.max_budget or max(map(lambda params: (params.FitMaxEpochs), candidates))
+        budget = min_budget or self._config.min_budget
+        rungs_count = max(0, math.floor(math.log(max_budget / budget, eta) + 1e-9)) + 1
+
+        results = []
+        survivors = list(candidates)
+        for rung in range(rungs_count):
+            rung_budget = max_budget if rung == rungs_count - 1 else round(budget * eta ** rung)
+            promoted_count = 0 if rung == rungs_count - 1 else max(1, len(survivors) // eta)
+            rung_results = self.__evaluate_rung(survivors, evaluate, bracket, rung, rung_budget, promoted_count)
+            results.extend(rung_results)
+            # survivors keep their original params, the budget is applied again on every rung
+            survivors = [params for params, rung_result in zip(survivors, rung_results) if rung_result.promoted]
+            if len(survivors) == 0:
+                break
+        return results
+
+    @base_method
+    def run_hyperband(self,
+                      pipeline_combinations: PipelineParamsCombinations,
+                      evaluate: Callable[[PipelineParams], float]) -> list[RungResult]:
+        eta = self._config.reduction_factor
+        max_budget = self._config.max_budget or max(pipeline_combinations.FitMaxEpochs)
+        brackets_count = max(0, math.floor(math.log(max_budget / self._config.min_budget, eta) + 1e-9)) + 1
+
+        results = []
+        # from the most exploratory bracket (many candidates, small budget) to plain full-budget training
+        for bracket in reversed(range(brackets_count)):
+            candidates_count = math.ceil(brackets_count / (bracket + 1) * eta ** bracket)
+            seed = None if self._config.seed is None else self._config.seed + bracket
+            candidates = self.__pipeline_params_manager.sample_combinations(
+                pipeline_combinations, RandomSearch(candidates_count, seed))
+            results.extend(self.run_successive_halving(candidates,
+                                                       evaluate,
+                                                       min_budget=max(1, round(max_budget / eta ** bracket)),
+                                                       bracket=bracket))
+
+        best_result = self.get_best(results)
+        if best_result is not None:
+            self._logger.info(TermLoggerType.ALL, f'Best: {best_result.params.Hash} | score: {best_result.score} | '
+                                                  f'budget: {best_result.budget} | evaluations: {len(results)}')
+        return results
+
+    def get_best(self, results: Sequence[RungResult]) -> Optional[RungResult]:
+        # only results trained with the full budget are comparable
+        max_budget = max(map(lambda result: (result.budget), results), default=None)
+        full_budget_results = [result for result in results
+                               if result.budget == max_budget and not math.isnan(result.score)]
+        return min(full_budget_results, key=self.__get_sort_key, default=None)
+
+    @base_method
+    def destroy(self):
+        super().destroy()
+        if self.__owns_pipeline_params_manager:
+            self.__pipeline_params_manager.destroy()
+        if self.__owns_db_manager:
+            self.__db_manager.destroy()
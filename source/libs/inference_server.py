@@ -0,0 +1,292 @@
+import dataclasses
+import functools
+import json
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Any
+
+import numpy
+from sqlalchemy import select
+
+from source.db_tables import Params, Training
+from source.libs.artifact_store import ArtifactStore
+from source.libs.base_class import BaseConfig, VerboseLevel, base_method, BaseClass
+from source.libs.db_manager import DBManager
+from source.libs.helper import Helper
+from source.types.inference_types import InferenceMetrics
+from source.types.logger_types import TermLoggerType
+
+PredictFunction = Callable[[numpy.ndarray], numpy.ndarray]
+ModelLoader = Callable[[str], tuple[PredictFunction, Optional[int]]]  # predict function and features per row
+
+
+@dataclass
+class Config(BaseConfig):
+    dbconn_dbname: str  # the database file for sqlite
+    params_hash: str
+    dbconn_username: Optional[str] = None
+    dbconn_host: str = 'localhost'
+    dbconn_drivername: str = 'postgresql'  # or 'sqlite'
+    code_version: Optional[str] = None  # None: resolved by Helper.get_code_version
+    artifacts_folder: Optional[Path] = None  # None: model paths are never resolved as artifact URIs
+    max_batch_size: int = 32
+    max_wait_in_ms: float = 5.0
+    queue_max_size: int = 10000
+    latency_samples: int = 4096
+    http_host: str = '127.0.0.1'
+    http_port: Optional[int] = None  # None: no http front end; 0: any free port
+    http_predict_timeout_in_sec: float = 30.0
+
+
+class ModelNotFound(Exception):
+    pass
+
+
+class InvalidWindowShape(Exception):
+    pass
+
+
+class PredictionsMismatch(Exception):
+    pass
+
+
+class InferenceServerStopped(Exception):
+    pass
+
+
+def pack_keras_model(model) -> list[numpy.ndarray]:
+    # the artifact of a model: its architecture as utf-8 json, followed by its weights
+    return [numpy.frombuffer(model.to_json().encode('utf-8'), dtype=numpy.uint8), *model.get_weights()]
+
+
+def unpack_keras_model(arrays: Sequence[numpy.ndarray]):
+    import keras  # deferred: loading the backend takes seconds
+
+    model = keras.models.model_from_json(bytes(arrays[0]).decode('utf-8'))
+    model.set_weights(arrays[1:])
+    return model
+
+
+def load_keras_model(model_path: str,
+                     artifact_store: Optional[ArtifactStore] = None) -> tuple[PredictFunction, Optional[int]]:
+    import keras  # deferred: loading the backend takes seconds
+
+    if artifact_store is not None and artifact_store.is_uri(model_path):
+        model = unpack_keras_model(artifact_store.load(model_path))
+    else:
+        model = keras.models.load_model(model_path)
+    return lambda windows: (numpy.asarray(model(windows, training=False))), model.input_shape[-1]
+
+
+class InferenceServer(BaseClass):
+
+    def __init__(self,
+                 config: dict,
+                 model_loader: Optional[ModelLoader] = None,  # None: load_keras_model
+                 db_manager: Optional[DBManager] = None,
+                 default_verbose_level: Optional[VerboseLevel] = None):
+        super().__init__(Config, config, default_verbose_level)
+
+        self.__db_manager = db_manager
+        self.__owns_db_manager = db_manager is None
+        if self.__owns_db_manager:
+            self.__initialize_dbm()
+
+        self.__window_width, model_path = self.__resolve_model()
+        if model_loader is None:
+            artifact_store = None if self._config.artifacts_folder is None \
+                else ArtifactStore({'folder': self._config.artifacts_folder})
+            model_loader = functools.partial(load_keras_model, artifact_store=artifact_store)
+        self.__predict, self.__features_count = model_loader(model_path)
+
+        self.__requests_queue = queue.Queue(maxsize=self._config.queue_max_size)
+        self.__submit_lock = threading.Lock()
+        self.__is_stopped = False
+        self.__metrics_lock = threading.Lock()
+        self.__latencies_in_sec = deque(maxlen=self._config.latency_samples)
+        self.__metrics = InferenceMetrics()
+        self.__start_time = time.perf_counter()
+        self.__batcher_thread = threading.Thread(target=self.__run_batches,
+                                                 name=f'{self.__class__.__name__}Batcher',
+                                                 daemon=True)
+        self.__batcher_thread.start()
+
+        self.__http_server = None
+        self.__http_thread = None
+        if self._config.http_port is not None:
+            self.__start_http_server()
+
+        self._logger.info(TermLoggerType.ALL, f'{Helper.get_fully_qualified_name(self.__class__)} was initialized '
+                                              f'({self._config.params_hash}: {model_path})')
+
+    @base_method
+    def __initialize_dbm(self):
+        self.__db_manager = DBManager(config=DBManager.build_owned_config(self))
+
+    @base_method
+    def __resolve_model(self) -> tuple[int, str]:
+        code_version = self._config.code_version or Helper.get_code_version()
+        model_stmt = (select(Params.WindowWidth, Training.ModelPath)
+                      .join(Training, Training.ParamsID == Params.ID)
+                      .where(Params.Hash == self._config.params_hash, Params.CodeVersion == code_version))
+        with self.__db_manager.begin() as session:
+            model_row = session.execute(model_stmt).first()
+        if model_row is None:
+            raise ModelNotFound(f'No trained model for "{self._config.params_hash}" ({code_version}).')
+        return model_row.WindowWidth, model_row.ModelPath
+
+    @property
+    def window_width(self) -> int:
+        return self.__window_width
+
+    @property
+    def http_address(self) -> Optional[tuple[str, int]]:
+        return None if self.__http_server is None else self.__http_server.server_address[:2]
+
+    def __collect_batch(self, first_request: tuple) -> tuple[list[tuple], bool]:
+        # the first request opens the batch, which closes when full, when the wait expires or on the stop signal
+        batch = [first_request]
+        deadline = time.perf_counter() + self._config.max_wait_in_ms / 1000
+        while len(batch) < self._config.max_batch_size:
+            remaining_time = deadline - time.perf_counter()
+            try:
+                request = self.__requests_queue.get(timeout=remaining_time) if remaining_time > 0 \
+                    else self.__requests_queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:  # handled once the current batch is done
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def __fail_batch(self, batch: list[tuple], exception: Exception):
+        for _, future, _ in batch:
+            future.set_exception(exception)
+        with self.__metrics_lock:
+            self.__metrics.errors += len(batch)
+
+    def __run_batches(self):
+        is_stopping = False
+        while not is_stopping and (first_request := self.__requests_queue.get()) is not None:
+            batch, is_stopping = self.__collect_batch(first_request)
+            # requests cancelled while queued are dropped
+            batch = [request for request in batch if request[1].set_running_or_notify_cancel()]
+            if len(batch) == 0:
+                continue
+            try:
+                predictions = self.__predict(numpy.stack([window for window, _, _ in batch]))
+                if len(predictions) != len(batch):
+                    raise PredictionsMismatch(f'The model returned {len(predictions)} predictions '
+                                              f'for a batch of {len(batch)} windows.')
+            except Exception as exception:
+                self.__fail_batch(batch, exception)
+                continue
+
+            finished_time = time.perf_counter()
+            for (_, future, submitted_time), prediction in zip(batch, predictions):
+                future.set_result(prediction)
+            with self.__metrics_lock:
+                self.__metrics.requests += len(batch)
+                self.__metrics.batches += 1
+                self.__latencies_in_sec.extend(finished_time - submitted_time for _, _, submitted_time in batch)
+
+    def submit(self, window: numpy.ndarray) -> Future:
+        window = numpy.asarray(window, dtype=numpy.float32)
+        if window.ndim != 2 or window.shape[0] != self.__window_width \
+                or (self.__features_count is not None and window.shape[1] != self.__features_count):
+            raise InvalidWindowShape(f'Expected a window of {self.__window_width} rows and '
+                                     f'{self.__features_count or "any"} features, got {window.shape}.')
+        future = Future()
+        # checked under the lock, so no request is queued after the stop signal
+        with self.__submit_lock:
+            if self.__is_stopped:
+                raise InferenceServerStopped(f'The inference server for "{self._config.params_hash}" was stopped.')
+            self.__requests_queue.put((window, future, time.perf_counter()))
+        return future
+
+    def predict(self, window: numpy.ndarray, timeout: Optional[float] = None) -> numpy.ndarray:
+        return self.submit(window).result(timeout)
+
+    def get_metrics(self) -> InferenceMetrics:
+        with self.__metrics_lock:
+            metrics = dataclasses.replace(self.__metrics)
+            latencies_in_ms = numpy.array(self.__latencies_in_sec) * 1000
+        if metrics.batches > 0:
+            metrics.mean_batch_size = metrics.requests / metrics.batches
+        if len(latencies_in_ms) > 0:
+            metrics.latency_p50_in_ms, metrics.latency_p90_in_ms, metrics.latency_p99_in_ms = \
+                map(float, numpy.percentile(latencies_in_ms, [50, 90, 99]))
+        metrics.throughput_per_sec = metrics.requests / (time.perf_counter() - self.__start_time)
+        return metrics
+
+    def __start_http_server(self):
+        inference_server = self
+        predict_timeout_in_sec = self._config.http_predict_timeout_in_sec
+
+        class InferenceRequestHandler(BaseHTTPRequestHandler):
+
+            def __send_json(self, status: int, payload: dict[str, Any]):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/metrics':
+                    self.__send_json(200, dataclasses.asdict(inference_server.get_metrics()))
+                else:
+                    self.__send_json(404, {'error': f'Unknown path: {self.path}'})
+
+            def do_POST(self):
+                if self.path != '/predict':
+                    self.__send_json(404, {'error': f'Unknown path: {self.path}'})
+                    return
+                try:
+                    payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                    prediction = inference_server.predict(payload['window'], timeout=predict_timeout_in_sec)
+                except (ValueError, KeyError, InvalidWindowShape) as exception:
+                    self.__send_json(400, {'error': str(exception)})
+                except InferenceServerStopped as exception:
+                    self.__send_json(503, {'error': str(exception)})
+                except TimeoutError:
+                    self.__send_json(504, {'error': 'The prediction timed out.'})
+                except Exception as exception:
+                    self.__send_json(500, {'error': repr(exception)})
+                else:
+                    self.__send_json(200, {'prediction': prediction.tolist()})
+
+            def log_message(self, message_format: str, *args):
+                pass  # requests are accounted for in the metrics
+
+        self.__http_server = ThreadingHTTPServer((self._config.http_host, self._config.http_port),
+                                                 InferenceRequestHandler)
+        self.__http_server.daemon_threads = True
+        self.__http_thread = threading.Thread(target=self.__http_server.serve_forever,
+                                              name=f'{self.__class__.__name__}Http',
+                                              daemon=True)
+        self.__http_thread.start()
+        self._logger.info(TermLoggerType.ALL, f'Serving on http://{self.http_address[0]}:{self.http_address[1]}')
+
+    @base_method
+    def destroy(self):
+        if self.__http_server is not None:
+            self.__http_server.shutdown()
+            self.__http_server.server_close()
+            self.__http_thread.join()
+        with self.__submit_lock:
+            self.__is_stopped = True
+            self.__requests_queue.put(None)  # queued requests are answered before the batcher stops
+        self.__batcher_thread.join()
+        self._logger.info(TermLoggerType.ALL, f'Inference metrics: {self.get_metrics()}')
+        super().destroy()
+        if self.__owns_db_manager:
+            self.__db_manager.destroy()
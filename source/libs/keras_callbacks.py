@@ -0,0 +1,34 @@
+import time
+from typing import Optional
+
+from source.libs.epoch_metrics_writer import EpochMetricsWriter
+from source.libs.median_stopping_pruner import MedianStoppingPruner
+
+
+def build_epoch_metrics_callback(params_id: int,
+                                 metrics_writer: EpochMetricsWriter,
+                                 pruner: Optional[MedianStoppingPruner] = None,
+                                 monitor: str = 'val_loss'):
+    # keras is only imported once a model is actually trained
+    import keras
+
+    class EpochMetricsCallback(keras.callbacks.Callback):
+
+        def __init__(self):
+            super().__init__()
+            self.__start_time = None
+
+        def on_train_begin(self, logs: Optional[dict] = None):
+            self.__start_time = time.perf_counter()
+
+        def on_epoch_end(self, epoch: int, logs: Optional[dict] = None):
+            logs = logs or {}
+            metrics_writer.record(params_id=params_id,
+                                  epoch=epoch,
+                                  loss=logs.get('loss'),
+                                  val_loss=logs.get('val_loss'),
+                                  wall_time_in_sec=time.perf_counter() - self.__start_time)
+            if pruner is not None and pruner.should_prune(params_id, epoch, logs.get(monitor)):
+                self.model.stop_training = True
+
+    return EpochMetricsCallback()
@@ -0,0 +1,172 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, TYPE_CHECKING
+
+from sqlalchemy import select, delete, func, insert, literal, cast, text, true, String, Select, Subquery
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from source.db_tables import Params, Layers, Training, EpochMetrics, RunSummaries
+from source.libs.base_class import BaseConfig, VerboseLevel, base_method, BaseClass
+from source.libs.db_manager import DBManager
+from source.libs.helper import Helper
+from source.types.logger_types import TermLoggerType
+
+if TYPE_CHECKING:
+    import pandas
+
+
+@dataclass
+class Config(BaseConfig):
+    dbconn_dbname: str  # the database file for sqlite
+    dbconn_username: Optional[str] = None
+    dbconn_host: str = 'localhost'
+    dbconn_drivername: str = 'postgresql'  # or 'sqlite'
+    code_version: Optional[str] = None  # None: resolved by Helper.get_code_version
+    stack_shape_separator: str = '-'
+
+
+class UnsupportedGrouping(Exception):
+    pass
+
+
+class Leaderboard(BaseClass):
+    __GROUPING_COLUMNS = {'StackShape': RunSummaries.StackShape,
+                          'WindowWidth': RunSummaries.WindowWidth,
+                          'LayersCount': RunSummaries.LayersCount}
+
+    def __init__(self,
+                 config: dict,
+                 db_manager: Optional[DBManager] = None,
+                 default_verbose_level: Optional[VerboseLevel] = None):
+        super().__init__(Config, config, default_verbose_level)
+
+        self.__db_manager = db_manager
+        self.__owns_db_manager = db_manager is None
+        if self.__owns_db_manager:
+            self.__initialize_dbm()
+
+        self._logger.info(TermLoggerType.ALL, f'{Helper.get_fully_qualified_name(self.__class__)} was initialized')
+
+    @base_method
+    def __initialize_dbm(self):
+        self.__db_manager = DBManager(config=DBManager.build_owned_config(self))
+
+    def __build_stacks(self, dialect_name: str, params_ids: Select) -> Subquery:
+        # units joined in layer order: postgres orders within the aggregate, sqlite (before 3.44 it has no ordered
+        # aggregates) concatenates over a window ordered by layer, whose rows all carry the whole stack
+        separator = self._config.stack_shape_separator
+        if dialect_name == 'postgresql':
+            stack_shape = func.string_agg(cast(Layers.Units, String),
+                                          aggregate_order_by(literal(separator), Layers.LayerIndex))
+            return (select(Layers.ParamsID, stack_shape.label('StackShape'), func.count().label('LayersCount'))
+                    .where(Layers.ParamsID.in_(params_ids))
+                    .group_by(Layers.ParamsID)
+                    .subquery())
+
+        stack_shape = func.group_concat(cast(Layers.Units, String), separator).over(partition_by=Layers.ParamsID,
+                                                                                    order_by=Layers.LayerIndex,
+                                                                                    rows=(None, None))
+        layers_count = func.count().over(partition_by=Layers.ParamsID)
+        return (select(Layers.ParamsID, stack_shape.label('StackShape'), layers_count.label('LayersCount'))
+                .where(Layers.ParamsID.in_(params_ids))
+                .distinct()
+                .subquery())
+
+    @base_method
+    def refresh(self, code_version: Optional[str] = None) -> int:
+        code_version = code_version or self._config.code_version or Helper.get_code_version()
+        versioned_params_ids = select(Params.ID).where(Params.CodeVersion == code_version)
+
+        with self.__db_manager.begin() as session:
+            stacks = self.__build_stacks(session.connection().dialect.name, versioned_params_ids)
+            metrics = (select(EpochMetrics.ParamsID,
+                              func.min(EpochMetrics.ValLoss).label('BestValLoss'),
+                              func.min(EpochMetrics.Loss).label('BestLoss'),
+                              func.count().label('EpochsCount'))
+                       .where(EpochMetrics.ParamsID.in_(versioned_params_ids))
+                       .group_by(EpochMetrics.ParamsID)
+                       .subquery())
+
+            refreshed_on = datetime.now()
+            summaries = (select(Params.ID, Params.CodeVersion, Params.WindowWidth,
+                                stacks.c.StackShape, stacks.c.LayersCount,
+                                metrics.c.BestValLoss, metrics.c.BestLoss, metrics.c.EpochsCount,
+                                Training.DurationInSec,
+                                literal(refreshed_on), literal(refreshed_on))
+                         .outerjoin(stacks, stacks.c.ParamsID == Params.ID)
+                         .outerjoin(metrics, metrics.c.ParamsID == Params.ID)
+                         .outerjoin(Training, Training.ParamsID == Params.ID)
+                         .where(Params.CodeVersion == code_version))
+
+            # rebuilt in a single transaction, so readers see either the previous or the new summaries
+            session.execute(delete(RunSummaries).where(RunSummaries.CodeVersion == code_version))
+            cursor_result = session.execute(insert(RunSummaries)
+                                            .from_select(['ParamsID', 'CodeVersion', 'WindowWidth',
+                                                          'StackShape', 'LayersCount',
+                                                          'BestValLoss', 'BestLoss', 'EpochsCount',
+                                                          'DurationInSec', 'CreatedOn', 'UpdatedOn'],
+                                                         summaries)
+                                            .execution_options(preserve_rowcount=True))
+            if session.connection().dialect.name == 'postgresql':
+                # fresh statistics, so the planner picks the summary indexes right after a rebuild
+                session.execute(text(f'ANALYZE "{RunSummaries.__tablename__}"'))
+
+        self._logger.info(TermLoggerType.ALL, f'Refreshed run summaries ({code_version}): {cursor_result.rowcount}')
+        return cursor_result.rowcount
+
+    @base_method
+    def get_top_k(self,
+                  k: int,
+                  group_by: Optional[str] = None,
+                  code_version: Optional[str] = None) -> 'pandas.DataFrame':
+        import pandas  # deferred: only needed for reads
+
+        code_version = code_version or self._config.code_version or Helper.get_code_version()
+        grouping_column = None
+        if group_by is not None:
+            grouping_column = self.__GROUPING_COLUMNS.get(group_by)
+            if grouping_column is None:
+                raise UnsupportedGrouping(f'Unsupported grouping: "{group_by}". '
+                                          f'Available: {", ".join(self.__GROUPING_COLUMNS.keys())}.')
+
+        ranking_order = (RunSummaries.BestValLoss, RunSummaries.ParamsID)
+        summaries = select(RunSummaries.ParamsID, RunSummaries.WindowWidth, RunSummaries.StackShape,
+                           RunSummaries.LayersCount, RunSummaries.BestValLoss, RunSummaries.BestLoss,
+                           RunSummaries.EpochsCount, RunSummaries.DurationInSec) \
+            .where(RunSummaries.CodeVersion == code_version, RunSummaries.BestValLoss.is_not(None))
+
+        with self.__db_manager.begin() as session:
+            if grouping_column is None:
+                top_k = (summaries.add_columns(func.row_number().over(order_by=ranking_order).label('Rank'))
+                         .order_by(*ranking_order)
+                         .limit(k)
+                         .subquery())
+            elif session.connection().dialect.name == 'postgresql':
+                # one index range scan per group instead of ranking the whole history
+                groups = (select(grouping_column)
+                          .where(RunSummaries.CodeVersion == code_version, grouping_column.is_not(None))
+                          .distinct()
+                          .subquery('groups'))
+                group_top_k = (summaries.add_columns(func.row_number().over(order_by=ranking_order).label('Rank'))
+                               .where(grouping_column == groups.c[group_by])
+                               .order_by(*ranking_order)
+                               .limit(k)
+                               .lateral('group_top_k'))
+                top_k = select(group_top_k).select_from(groups).join(group_top_k, true()).subquery()
+            else:
+                ranked_summaries = summaries.add_columns(func.row_number().over(partition_by=grouping_column,
+                                                                                order_by=ranking_order).label('Rank'))
+                ranked_summaries = ranked_summaries.subquery()
+                top_k = select(ranked_summaries).where(ranked_summaries.c.Rank <= k).subquery()
+
+            # hashes are only joined for the selected runs
+            top_k_stmt = (select(Params.Hash, top_k)
+                          .join(Params, Params.ID == top_k.c.ParamsID)
+                          .order_by(*([] if group_by is None else [top_k.c[group_by]]), top_k.c.Rank))
+            return pandas.read_sql_query(sql=top_k_stmt, con=session.connection())
+
+    @base_method
+    def destroy(self):
+        super().destroy()
+        if self.__owns_db_manager:
+            self.__db_manager.destroy()
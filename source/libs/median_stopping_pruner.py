@@ -0,0 +1,113 @@
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select, func
+
+from source.db_tables import EpochMetrics, Params
+from source.libs.base_class import BaseConfig, VerboseLevel, base_method, BaseClass
+from source.libs.db_manager import DBManager
+from source.libs.helper import Helper
+from source.types.logger_types import TermLoggerType
+
+
+@dataclass
+class Config(BaseConfig):
+    dbconn_dbname: str  # the database file for sqlite
+    dbconn_username: Optional[str] = None
+    dbconn_host: str = 'localhost'
+    dbconn_drivername: str = 'postgresql'  # or 'sqlite'
+    metric: str = 'ValLoss'  # an EpochMetrics column, lower is better
+    warmup_epochs: int = 3
+    min_peers: int = 5
+    peers_refresh_interval_in_sec: float = 30.0
+    code_version: Optional[str] = None  # None: resolved by Helper.get_code_version
+
+
+class MedianStoppingPruner(BaseClass):
+    # only runs sharing these (and the code version) have losses on a comparable scale
+    __PEER_GROUP_COLUMNS = (Params.DatasetPath, Params.DatasetTimeFilter, Params.ColToPredict, Params.CompileLossFn)
+
+    def __init__(self,
+                 config: dict,
+                 db_manager: Optional[DBManager] = None,
+                 default_verbose_level: Optional[VerboseLevel] = None):
+        super().__init__(Config, config, default_verbose_level)
+
+        self.__db_manager = db_manager
+        self.__owns_db_manager = db_manager is None
+        if self.__owns_db_manager:
+            self.__initialize_dbm()
+
+        self.__code_version = self._config.code_version or Helper.get_code_version()
+        self.__metric_column = getattr(EpochMetrics, self._config.metric)
+        self.__peer_groups: dict[int, Optional[tuple]] = {}
+        self.__peers_values: dict[tuple, tuple[float, dict[int, float]]] = {}
+        self.__best_values: dict[int, float] = {}
+
+        self._logger.info(TermLoggerType.ALL, f'{Helper.get_fully_qualified_name(self.__class__)} was initialized')
+
+    @base_method
+    def __initialize_dbm(self):
+        self.__db_manager = DBManager(config=DBManager.build_owned_config(self))
+
+    @base_method
+    def __get_peer_group(self, params_id: int) -> Optional[tuple]:
+        if params_id not in self.__peer_groups:
+            with self.__db_manager.begin() as session:
+                peer_group = session.execute(select(*self.__PEER_GROUP_COLUMNS)
+                                             .where(Params.ID == params_id)).one_or_none()
+            self.__peer_groups[params_id] = None if peer_group is None else tuple(peer_group)
+        return self.__peer_groups[params_id]
+
+    @base_method
+    def __get_peers_values(self, epoch: int, peer_group: tuple) -> dict[int, float]:
+        # peers are reloaded at most once per interval, epoch and group, not on every call
+        refreshed_on, peers_values = self.__peers_values.get((epoch, peer_group), (None, None))
+        if refreshed_on is not None and time.monotonic() - refreshed_on < self._config.peers_refresh_interval_in_sec:
+            return peers_values
+
+        # the best value of each peer up to this epoch, for the peers that reached it
+        peers_stmt = (select(EpochMetrics.ParamsID, func.min(self.__metric_column))
+                      .join(Params, Params.ID == EpochMetrics.ParamsID)
+                      .where(EpochMetrics.Epoch <= epoch,
+                             Params.CodeVersion == self.__code_version,
+                             *[column == value for column, value in zip(self.__PEER_GROUP_COLUMNS, peer_group)],
+                             self.__metric_column.is_not(None))
+                      .group_by(EpochMetrics.ParamsID)
+                      .having(func.max(EpochMetrics.Epoch) == epoch))
+        with self.__db_manager.begin() as session:
+            peers_values = dict(session.execute(peers_stmt).all())
+        self.__peers_values[(epoch, peer_group)] = (time.monotonic(), peers_values)
+        return peers_values
+
+    @base_method
+    def should_prune(self, params_id: int, epoch: int, value: Optional[float]) -> bool:
+        if value is not None:
+            self.__best_values[params_id] = min(value, self.__best_values.get(params_id, value))
+        if epoch < self._config.warmup_epochs or params_id not in self.__best_values:
+            return False
+        peer_group = self.__get_peer_group(params_id)
+        if peer_group is None:  # not stored, so there is nothing to compare it with
+            return False
+
+        peers_values = [peer_value for peer_id, peer_value in self.__get_peers_values(epoch, peer_group).items()
+                        if peer_id != params_id]
+        if len(peers_values) < self._config.min_peers:
+            return False
+
+        # best values reached so far on both sides, so a single noisy epoch does not stop a run
+        median_value = statistics.median(peers_values)
+        is_pruned = self.__best_values[params_id] > median_value
+        if is_pruned:
+            self._logger.info(TermLoggerType.ALL, f'Pruned: {params_id} at epoch {epoch} '
+                                                  f'({self.__best_values[params_id]} > median {median_value})')
+            del self.__best_values[params_id]
+        return is_pruned
+
+    @base_method
+    def destroy(self):
+        super().destroy()
+        if self.__owns_db_manager:
+            self.__db_manager.destroy()
@@ -1,6 +1,11 @@
 import inspect
 import logging
 import logging.handlers
+import queue
+import sys
+import threading
+import time
+import traceback
 from collections.abc import Sequence
 from dataclasses import dataclass
 from pathlib import Path
@@ -9,6 +14,7 @@ from typing import Optional
 import dacite
 
 from source.libs.helper import Helper
+from source.types.logger_types import TraceMode, OverflowPolicy
 
 
 @dataclass(frozen=True)
@@ -33,6 +39,16 @@ class Config:
     rfh_backup_count: int = 3
     outter_internals_scope_halt_list: tuple = ('_worker', '<module>', 'main', '_run', 'wrapper_func')
     callable_names_skip_list: tuple = ('base_method_wrapper',)
+    trace_mode: str = TraceMode.FAST
+    trace_cache_max_entries: int = 4096
+
+
+@dataclass
+class AsyncConfig:
+    enabled: bool = False
+    queue_max_size: int = 10000
+    overflow_policy: str = OverflowPolicy.BLOCK
+    sample_every: int = 10
 
 
 class UnavailableNameException(Exception):
@@ -40,15 +56,29 @@ class UnavailableNameException(Exception):
 
 
 class MultiRotatingLogger:
-    def __init__(self, configs: Sequence[dict]):
+    def __init__(self, configs: Sequence[dict], async_config: Optional[dict] = None):
         self.__configs: list[Config] = []
         if len(configs) > 0:
             self.__load_configs(configs)
+        self.__async_config = dacite.from_dict(AsyncConfig, async_config or {})
 
         self.__loggers = []
+        self.__trace_cache: dict[tuple, str] = {}
 
         self.__build_loggers()
 
+        self.__entries_queue: Optional[queue.Queue] = None
+        self.__writer_thread: Optional[threading.Thread] = None
+        self.__overflowed_entries_count = 0
+        self.__dropped_entries_count = 0
+        self.__counters_lock = threading.Lock()
+        if self.__async_config.enabled:
+            self.__start_writer()
+
+    @property
+    def dropped_entries_count(self) -> int:
+        return self.__dropped_entries_count
+
     def __load_configs(self, configs: Sequence[dict]):
         def get_sanitized_filename():
             raw_filename = configs[config_index]["rfh_filename"].stem  # last extension is removed
@@ -84,31 +114,125 @@ class MultiRotatingLogger:
             logger.addHandler(rotating_file_handler)
             self.__loggers.append(logger)
 
-    def __format_message(self, logger_index: int, message: str, prefix: str, method_name: str):
-        def build_stacktrace():
-            stack = inspect.stack()
-            trace = ''
-            logger_class_outter_level_reached = False
-            has_first_stack_level_been_logged = False
-            stack_function_name_index = 3
-            for level in range(len(stack)):
-                stack_level_name = str(stack[level][stack_function_name_index])
-                if stack_level_name in self.__configs[logger_index].outter_internals_scope_halt_list:
-                    # skip internals scope and beyond
-                    break
-                elif stack_level_name in self.__configs[logger_index].callable_names_skip_list:
-                    # skip specific callables
-                    continue
-                elif logger_class_outter_level_reached:  # skip this class functions
-                    if has_first_stack_level_been_logged:
-                        trace = self.__configs[logger_index].custom_entry_format_trace_separator + trace
-                    trace = stack_level_name + trace
-                    has_first_stack_level_been_logged = True
-                if not logger_class_outter_level_reached and stack_level_name == method_name:
-                    logger_class_outter_level_reached = True
-            return trace
-
-        trace = build_stacktrace()
+    @staticmethod
+    def __build_full_trace(config_obj: Config, method_name: str) -> str:
+        stack = inspect.stack()
+        trace = ''
+        logger_class_outter_level_reached = False
+        has_first_stack_level_been_logged = False
+        stack_function_name_index = 3
+        for level in range(len(stack)):
+            stack_level_name = str(stack[level][stack_function_name_index])
+            if stack_level_name in config_obj.outter_internals_scope_halt_list:
+                # skip internals scope and beyond
+                break
+            elif stack_level_name in config_obj.callable_names_skip_list:
+                # skip specific callables
+                continue
+            elif logger_class_outter_level_reached:  # skip this class functions
+                if has_first_stack_level_been_logged:
+                    trace = config_obj.custom_entry_format_trace_separator + trace
+                trace = stack_level_name + trace
+                has_first_stack_level_been_logged = True
+            if not logger_class_outter_level_reached and stack_level_name == method_name:
+                logger_class_outter_level_reached = True
+        return trace
+
+    def __build_fast_trace(self, config_obj: Config, method_name: str) -> str:
+        # same rules as the full trace, but only code objects are read while walking the frames
+        frame = sys._getframe(1)
+        traced_codes = []
+        logger_class_outter_level_reached = False
+        while frame is not None:
+            code = frame.f_code
+            frame = frame.f_back
+            if code.co_name in config_obj.outter_internals_scope_halt_list:
+                break
+            elif code.co_name in config_obj.callable_names_skip_list:
+                continue
+            elif logger_class_outter_level_reached:
+                traced_codes.append(code)
+            if not logger_class_outter_level_reached and code.co_name == method_name:
+                logger_class_outter_level_reached = True
+
+        cache_key = (config_obj.custom_entry_format_trace_separator, *traced_codes)
+        trace = self.__trace_cache.get(cache_key)
+        if trace is None:
+            if len(self.__trace_cache) >= config_obj.trace_cache_max_entries:
+                self.__trace_cache.clear()
+            trace = config_obj.custom_entry_format_trace_separator.join(
+                map(lambda traced_code: (traced_code.co_name), reversed(traced_codes)))
+            self.__trace_cache[cache_key] = trace
+        return trace
+
+    def __build_trace(self, config_obj: Config, method_name: str) -> str:
+        match config_obj.trace_mode:
+            case TraceMode.OFF:
+                return ''
+            case TraceMode.FULL:
+                return self.__build_full_trace(config_obj, method_name)
+            case _:
+                return self.__build_fast_trace(config_obj, method_name)
+
+    def __start_writer(self):
+        self.__entries_queue = queue.Queue(maxsize=self.__async_config.queue_max_size)
+        self.__writer_thread = threading.Thread(target=self.__write_entries,
+                                                name=f'{self.__class__.__name__}Writer',
+                                                daemon=True)
+        self.__writer_thread.start()
+
+    def __write_entry(self, entry: tuple):
+        logger_index, method_name, message, prefix, trace, created = entry
+        logger = self.__loggers[logger_index]
+        record = logger.makeRecord(logger.name, logging.getLevelName(method_name.upper()), '(async)', 0,
+                                   self.__format_message(logger_index, message, prefix, trace), None, None)
+        record.created = created
+        record.msecs = int(created * 1000) % 1000
+        logger.handle(record)
+
+    def __write_entries(self):
+        # formatting, writing and rotation all happen here, away from the callers
+        while True:
+            entry = self.__entries_queue.get()
+            try:
+                if entry is None:
+                    return
+                self.__write_entry(entry)
+            except Exception:
+                # reported like a failing logging handler: one bad entry must not stop the writer
+                sys.stderr.write(f'--- {self.__class__.__name__}: entry could not be written ---\n')
+                traceback.print_exc(file=sys.stderr)
+            finally:
+                # always acknowledged, otherwise flush and destroy would wait forever
+                self.__entries_queue.task_done()
+
+    def __enqueue_entry(self, entry: tuple):
+        try:
+            self.__entries_queue.put_nowait(entry)
+            return
+        except queue.Full:
+            pass
+
+        # entries are logged from any thread
+        with self.__counters_lock:
+            self.__overflowed_entries_count += 1
+            match self.__async_config.overflow_policy:
+                case OverflowPolicy.DROP:
+                    is_dropped = True
+                case OverflowPolicy.SAMPLE:
+                    is_dropped = self.__overflowed_entries_count % self.__async_config.sample_every != 0
+                case _:
+                    is_dropped = False
+            if is_dropped:
+                self.__dropped_entries_count += 1
+        if not is_dropped:
+            self.__entries_queue.put(entry)
+
+    def flush(self):
+        if self.__entries_queue is not None:
+            self.__entries_queue.join()
+
+    def __format_message(self, logger_index: int, message: str, prefix: str, trace: str):
         entry_payload = self.__configs[logger_index].custom_entry_format_string.format(trace, message)
         entry_payload = entry_payload.replace('\n', '\n' + prefix)
         return entry_payload
@@ -123,14 +247,35 @@ class MultiRotatingLogger:
             message = message.replace('\n', ' ')
         if type(loggers_indexes) is int:
             loggers_indexes = [loggers_indexes]
+
+        # loggers sharing the same trace settings share the trace of this entry
+        traces = {}
         for logger_index in loggers_indexes:
+            config_obj = self.__configs[logger_index]
+            trace_settings = (config_obj.trace_mode,
+                              config_obj.outter_internals_scope_halt_list,
+                              config_obj.callable_names_skip_list,
+                              config_obj.custom_entry_format_trace_separator)
+            if trace_settings not in traces:
+                traces[trace_settings] = self.__build_trace(config_obj, method_name)
+            if self.__entries_queue is not None:
+                if self.__loggers[logger_index].isEnabledFor(logging.getLevelName(method_name.upper())):
+                    self.__enqueue_entry((logger_index, method_name, message, log_prefix,
+                                          traces[trace_settings], time.time()))
+                continue
             getattr(self.__loggers[logger_index],
                     method_name)(self.__format_message(logger_index,
                                                        message,
                                                        log_prefix,
-                                                       method_name))
+                                                       traces[trace_settings]))
 
     def destroy(self):
+        if self.__writer_thread is not None:
+            self.__entries_queue.put(None)  # pending entries are written before the writer stops
+            self.__writer_thread.join()
+            self.__writer_thread = None
+            self.__entries_queue = None
+
         def close_handlers(logger):
             for handler in logger.handlers:
                 logger.removeHandler(handler)
@@ -0,0 +1,66 @@
+import dataclasses
+import hashlib
+import json
+from collections.abc import Sequence
+from typing import Any
+
+from source.libs.combination_space import CartesianProduct
+from source.libs.helper import Helper
+from source.types.pipeline_params_types import PipelineParams
+
+
+class ParamsHasher:
+    VERSION_PREFIX = 'v2-'
+    DIGEST_SIZE = 16
+
+    def __init__(self, cartesian_product: CartesianProduct):
+        self.__keys = cartesian_product.keys
+        self.__factors = list(cartesian_product.factors.values())
+        self.__value_digests: list[dict[int, bytes]] = [{} for _ in self.__keys]
+        # field digests are always combined in the same order, whatever the declaration order
+        self.__combination_order = sorted(range(len(self.__keys)), key=lambda position: (str(self.__keys[position])))
+
+    @staticmethod
+    def __drop_nested_none(value: Any) -> Any:
+        # unset layer options are omitted by unfold_combinations but present as None in LayerParams
+        if isinstance(value, dict):
+            return {key: ParamsHasher.__drop_nested_none(item) for key, item in value.items() if item is not None}
+        return value
+
+    @staticmethod
+    def canonicalize(value: Any) -> str:
+        stringified_value = Helper.recursively_stringify_objects(ParamsHasher.__drop_nested_none(value))
+        return json.dumps(stringified_value, sort_keys=True, separators=(',', ':'), default=str)
+
+    @staticmethod
+    def digest_field(key: str | int, value: Any) -> bytes:
+        encoded_field = f'{key}={ParamsHasher.canonicalize(value)}'.encode('utf-8')
+        return hashlib.blake2b(encoded_field, digest_size=ParamsHasher.DIGEST_SIZE).digest()
+
+    @staticmethod
+    def combine_digests(digests: Sequence[bytes]) -> str:
+        combined_digest = hashlib.blake2b(b''.join(digests), digest_size=ParamsHasher.DIGEST_SIZE)
+        return ParamsHasher.VERSION_PREFIX + combined_digest.hexdigest()
+
+    @staticmethod
+    def hash_fields(fields: dict[str | int, Any]) -> str:
+        sorted_keys = sorted(fields.keys(), key=str)
+        return ParamsHasher.combine_digests([ParamsHasher.digest_field(key, fields[key]) for key in sorted_keys])
+
+    @staticmethod
+    def hash_params(pipeline_params: PipelineParams, hash_param_key: str = 'Hash') -> str:
+        fields = dataclasses.asdict(pipeline_params)
+        del fields[hash_param_key]
+        return ParamsHasher.hash_fields(fields)
+
+    def __get_value_digest(self, position: int, digit: int) -> bytes:
+        position_digests = self.__value_digests[position]
+        value_digest = position_digests.get(digit)
+        if value_digest is None:
+            value_digest = self.digest_field(self.__keys[position], self.__factors[position][digit])
+            position_digests[digit] = value_digest
+        return value_digest
+
+    def hash_digits(self, digits: Sequence[int]) -> str:
+        return self.combine_digests([self.__get_value_digest(position, digits[position])
+                                     for position in self.__combination_order])
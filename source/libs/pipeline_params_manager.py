@@ -1,40 +1,63 @@
 import dataclasses
-from collections.abc import Sequence, Callable
+from collections.abc import Sequence, Callable, Iterable, Iterator
 from dataclasses import dataclass
-from functools import reduce
 from typing import Optional, Any
 
-from pandas import DataFrame
+from sqlalchemy import select, func, or_, and_, ColumnElement
+from sqlalchemy.orm import Session
 
 from source.libs.base_class import BaseConfig, VerboseLevel, base_method, BaseClass
+from source.libs.bloom_filter import BloomFilter
+from source.libs.combination_space import CartesianProduct, ChainedSequence, MappedSequence
 from source.libs.db_manager import DBManager
 from source.libs.helper import Helper
-from source.db_tables import Params, Layers
+from source.libs.params_hasher import ParamsHasher
+from source.libs.search_strategies import GridSearch, RandomSearch, LatinHypercubeSearch
+from source.db_tables import Params, Layers, Training, States
+from source.types.filter_types import SkipSummary
+from source.types.hash_types import HashScheme
 from source.types.logger_types import TermLoggerType
 from source.types.pipeline_params_types import LayerParams, PipelineParams, PipelineParamsCombinations
+from source.types.status_types import StatusType
+
+
+SearchStrategy = GridSearch | RandomSearch | LatinHypercubeSearch
 
 
 @dataclass
 class Config(BaseConfig):
-    dbconn_username: str
-    dbconn_dbname: str
+    dbconn_dbname: str  # the database file for sqlite
+    dbconn_username: Optional[str] = None
+    dbconn_host: str = 'localhost'
+    dbconn_drivername: str = 'postgresql'  # or 'sqlite'
     hash_param_key: str = 'Hash'
     stack_param_key: str = 'Stack'
+    store_chunk_size: int = 10000
+    code_version: Optional[str] = None  # None: resolved by Helper.get_code_version
+    hash_scheme: int = HashScheme.CANONICAL
+    hash_migration_chunk_size: int = 10000
+    skip_filter_stream_chunk_size: int = 10000
+    skip_filter_bloom_threshold: Optional[int] = None  # None: known hashes are always kept in a set
+    skip_filter_bloom_false_positive_rate: float = 0.001
+    skip_filter_confirm_chunk_size: int = 1000
 
 
 class PipelineParamsManager(BaseClass):
 
-    def __init__(self, config: dict, default_verbose_level: Optional[VerboseLevel] = None):
+    def __init__(self,
+                 config: dict,
+                 db_manager: Optional[DBManager] = None,
+                 default_verbose_level: Optional[VerboseLevel] = None):
         super().__init__(Config, config, default_verbose_level)
 
-        self.__db_manager = None
-        self.__initialize_dbm()
+        self.__db_manager = db_manager
+        self.__owns_db_manager = db_manager is None
+        if self.__owns_db_manager:
+            self.__initialize_dbm()
 
     @base_method
     def __initialize_dbm(self):
-        self.__db_manager = DBManager(config={'conn_username': self._config.dbconn_username,
-                                              'conn_dbname': self._config.dbconn_dbname,
-                                              'logs_folder': self._config.logs_folder},
+        self.__db_manager = DBManager(config=DBManager.build_owned_config(self),
                                       # default_verbose_level=VerboseLevel.LOCAL,
                                       )
 
@@ -47,51 +70,63 @@ class PipelineParamsManager(BaseClass):
         return copied_params
 
     @base_method
-    def __generate_cartesian_product(self, factors: dict[str | int, list[Any]]) -> list[dict[str | int, Any]]:
-        total_combinations = reduce(lambda a, b: (a * len(b)), factors.values(), 1)
-        products_list = []
+    def __generate_cartesian_product(self, factors: dict[str | int, Sequence[Any]]) -> CartesianProduct:
+        cartesian_product = CartesianProduct(factors)
 
         if self._dynamic_verbose_level != VerboseLevel.NONE:
-            self._logger.debug(TermLoggerType.SHORT, f'total_combinations: {total_combinations}')
-
-        for counter in range(total_combinations):
-            quotient = counter
-            product = {}
-            for key, values in zip(factors.keys(), factors.values()):
-                quotient, remainder = divmod(quotient, len(values))
-                product[key] = values[remainder]
-
-                if self._dynamic_verbose_level != VerboseLevel.NONE:
-                    self._logger.debug(TermLoggerType.SHORT, f'counter: {counter}')
-                    self._logger.debug(TermLoggerType.SHORT, f'key: {key} | values({len(values)}): {str(values)}')
-                    self._logger.debug(TermLoggerType.SHORT, f'quotient: {quotient} | remainder: {remainder}')
-
-            products_list.append(product)
+            self._logger.debug(TermLoggerType.SHORT, f'total_combinations: {len(cartesian_product)}')
+            self._logger.debug(TermLoggerType.SHORT, f'radixes: {cartesian_product.radixes}')
 
-            if self._dynamic_verbose_level != VerboseLevel.NONE:
-                self._logger.debug(TermLoggerType.SHORT, f'product:\n{Helper.beautify_json(product)}')
-
-        return products_list
+        return cartesian_product
 
     @base_method
-    def __build_objects(self, plain_data: list[dict[str, Any]]) -> list[PipelineParams]:
+    def __build_object(self, data_dict: dict[str, Any], params_hash: str) -> PipelineParams:
         def build_stack(stack: dict[int, dict[str, Any]]) -> dict[int, LayerParams]:
             built_stack = {}
             for key, values in zip(stack.keys(), stack.values()):
                 built_stack[key] = LayerParams(**values)
             return built_stack
 
-        built_objects = []
-        for data_dict in plain_data:
-            data_dict[self._config.hash_param_key] = Helper.generate_dict_hash(data_dict)
-            data_dict[self._config.stack_param_key] = build_stack(
-                data_dict[self._config.stack_param_key])
-            built_objects.append(PipelineParams(**data_dict))
+        data_dict[self._config.hash_param_key] = params_hash
+        data_dict[self._config.stack_param_key] = build_stack(
+            data_dict[self._config.stack_param_key])
+        built_object = PipelineParams(**data_dict)
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'built_object:\n{Helper.beautify_json(data_dict)}')
 
-        return built_objects
+        return built_object
 
     @base_method
-    def unfold_combinations(self, pipeline_combinations: PipelineParamsCombinations) -> list[PipelineParams]:
+    def hash_params(self, pipeline_params: PipelineParams) -> str:
+        # with the configured scheme, for params changed after being unfolded (e.g. another budget)
+        if self._config.hash_scheme == HashScheme.CANONICAL:
+            return ParamsHasher.hash_params(pipeline_params, self._config.hash_param_key)
+        data_dict = dataclasses.asdict(pipeline_params)
+        del data_dict[self._config.hash_param_key]
+        # the same plain layers that are hashed while unfolding, where unset options are left out
+        data_dict[self._config.stack_param_key] = {
+            layer_index: self.__clear_empty_params(layer_params)
+            for layer_index, layer_params in data_dict[self._config.stack_param_key].items()}
+        return Helper.generate_dict_hash(data_dict)
+
+    @base_method
+    def __build_objects(self, plain_data: CartesianProduct, indexes: Optional[Sequence[int]] = None) -> MappedSequence:
+        params_hasher = ParamsHasher(plain_data) if self._config.hash_scheme == HashScheme.CANONICAL else None
+
+        def build_indexed_object(index: int) -> PipelineParams:
+            digits = plain_data.get_digits(index)
+            data_dict = plain_data.get_by_digits(digits)
+            if params_hasher is None:
+                params_hash = Helper.generate_dict_hash(data_dict)
+            else:
+                params_hash = params_hasher.hash_digits(digits)
+            return self.__build_object(data_dict, params_hash)
+
+        return MappedSequence(range(len(plain_data)) if indexes is None else indexes, build_indexed_object)
+
+    @base_method
+    def __unfold_plain_combinations(self, pipeline_combinations: PipelineParamsCombinations) -> CartesianProduct:
         plain_pipeline_combinations = dataclasses.asdict(pipeline_combinations)
         plain_mutable_pipeline = plain_pipeline_combinations.copy()
         for key, values in zip(plain_pipeline_combinations.keys(), plain_pipeline_combinations.values()):
@@ -105,15 +140,54 @@ class PipelineParamsManager(BaseClass):
                             layer_combinations = self.__clear_empty_params(layer_combinations)
                             unfolded_layer = self.__generate_cartesian_product(layer_combinations)
                             unfolded_layers_stack[layer_index] = unfolded_layer
-                        unfolded_stacks.extend(self.__generate_cartesian_product(unfolded_layers_stack))
-                    plain_mutable_pipeline[key] = unfolded_stacks
+                        unfolded_stacks.append(self.__generate_cartesian_product(unfolded_layers_stack))
+                    plain_mutable_pipeline[key] = ChainedSequence(unfolded_stacks)
                     break
-        unfolded_pipeline = self.__generate_cartesian_product(plain_mutable_pipeline)
+        return self.__generate_cartesian_product(plain_mutable_pipeline)
+
+    @base_method
+    def unfold_combinations(self, pipeline_combinations: PipelineParamsCombinations) -> MappedSequence:
+        # lazy: combinations are built on access, either by index or while iterating
+        unfolded_pipeline = self.__unfold_plain_combinations(pipeline_combinations)
         return self.__build_objects(unfolded_pipeline)
 
     @base_method
-    def store_in_db(self, pipeline_params: Sequence[PipelineParams]):
-        code_version = Helper.get_last_git_tag()
+    def sample_combinations(self,
+                            pipeline_combinations: PipelineParamsCombinations,
+                            search_strategy: SearchStrategy) -> MappedSequence:
+        unfolded_pipeline = self.__unfold_plain_combinations(pipeline_combinations)
+        selected_indexes = search_strategy.select_indexes(unfolded_pipeline)
+
+        if len(selected_indexes) < search_strategy.samples_count:
+            self._logger.warning(TermLoggerType.ALL, f'Requested samples: {search_strategy.samples_count}, but the '
+                                                     f'space only has {len(unfolded_pipeline)} combinations')
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'selected_combinations ({search_strategy.__class__.__name__}): '
+                                                     f'{len(selected_indexes)} of {len(unfolded_pipeline)}')
+        return self.__build_objects(unfolded_pipeline, selected_indexes)
+
+    @base_method
+    def migrate_legacy_hashes(self, pipeline_combinations: PipelineParamsCombinations) -> int:
+        # rewrites stored legacy hashes of these combinations, in every code version, to the canonical scheme.
+        # legacy rows already stored again under their canonical hash (in the same code version) are kept as they are
+        unfolded_pipeline = self.__unfold_plain_combinations(pipeline_combinations)
+        params_hasher = ParamsHasher(unfolded_pipeline)
+
+        def build_replacements() -> Iterator[tuple[str, str]]:
+            for index in range(len(unfolded_pipeline)):
+                digits = unfolded_pipeline.get_digits(index)
+                yield (Helper.generate_dict_hash(unfolded_pipeline.get_by_digits(digits)),
+                       params_hasher.hash_digits(digits))
+
+        migrated_count = self.__db_manager.replace_values(Params.Hash, build_replacements(),
+                                                          skip_conflicts_on=[Params.CodeVersion],
+                                                          chunk_size=self._config.hash_migration_chunk_size)
+        self._logger.info(TermLoggerType.ALL, f'Migrated hashes: {migrated_count}')
+        return migrated_count
+
+    @base_method
+    def store_in_db(self, pipeline_params: Iterable[PipelineParams]) -> dict[tuple[str, str], int]:
+        code_version = self._config.code_version or Helper.get_code_version()
 
         def stringify_callable(obj: Callable) -> str:
             if obj is None:
@@ -121,66 +195,136 @@ class PipelineParamsManager(BaseClass):
             else:
                 return Helper.get_fully_qualified_name(obj)
 
-        def store_params():
-            def build_params_records() -> list[Params]:
-                params_records = []
-                for params in pipeline_params:
-                    params_records.append(Params(
-                        Hash=params.Hash,
-                        CodeVersion=code_version,
-                        ColToPredict=params.ColumnToPredict,
-                        WindowWidth=params.WindowWidth,
-                        SetTrainingFlag=params.SetTrainingFlag,
-                        UseResidualWrapper=params.UseResidualWrapper,
-                        PrependBatchNormLayer=params.PrependBatchNormLayer,
-                        FitMaxEpochs=params.FitMaxEpochs,
-                        FitPatience=params.FitPatience,
-                        CompileLossFn=stringify_callable(params.CompileLossFunction),
-                        CompileOptimizer=stringify_callable(params.CompileOptimizer),
-                        DatasetPath=str(params.DatasetPath),
-                        DatasetTimeFilter=str(params.DatasetTimeFilter),
-                        DatasetShuffle=params.DatasetShuffle,
-                        DatasetBatchSize=params.DatasetBatchSize,
-                    ))
-                return params_records
-
-            params_records = build_params_records()
-            self.__db_manager.insert(params_records)
-
-        store_params()
-        new_hashes = list(map(lambda params: (params.Hash), pipeline_params))
-
-        def get_new_signatures() -> DataFrame:
-            new_signatures = self.__db_manager.get_columns(columns=[Params.ID, Params.Hash, Params.CodeVersion],
-                                                           filter_criterion=[Params.Hash.in_(new_hashes)])
-            return new_signatures
-
-        new_signatures = get_new_signatures()
-
-        def store_layers():
-            def build_layers_records() -> list[Layers]:
-                layers_records = []
-                for params in pipeline_params:
-                    for layer_index, layer_params in zip(params.Stack.keys(), params.Stack.values()):
-                        params_signature = new_signatures.loc[(new_signatures['Hash'] == params.Hash)
-                                                              & (new_signatures['CodeVersion'] == code_version)]
-                        params_id = params_signature.ID.iloc[0]
-                        layers_records.append(Layers(
-                            ParamsID=int(params_id),
-                            LayerIndex=layer_index,
-                            Units=layer_params.Units,
-                            KernelInitializer=stringify_callable(layer_params.KernelInitializer),
-                            KernelRegularizer=stringify_callable(layer_params.KernelRegularizer),
-                            Activation=stringify_callable(layer_params.Activation),
-                        ))
-                return layers_records
-
-            layers_records = build_layers_records()
-            self.__db_manager.insert(layers_records)
-
-        store_layers()
+        def build_params_records(params_chunk: Sequence[PipelineParams]) -> list[Params]:
+            params_records = []
+            for params in params_chunk:
+                params_records.append(Params(
+                    Hash=params.Hash,
+                    CodeVersion=code_version,
+                    ColToPredict=params.ColumnToPredict,
+                    WindowWidth=params.WindowWidth,
+                    SetTrainingFlag=params.SetTrainingFlag,
+                    UseResidualWrapper=params.UseResidualWrapper,
+                    PrependBatchNormLayer=params.PrependBatchNormLayer,
+                    FitMaxEpochs=params.FitMaxEpochs,
+                    FitPatience=params.FitPatience,
+                    CompileLossFn=stringify_callable(params.CompileLossFunction),
+                    CompileOptimizer=stringify_callable(params.CompileOptimizer),
+                    DatasetPath=str(params.DatasetPath),
+                    DatasetTimeFilter=str(params.DatasetTimeFilter),
+                    DatasetShuffle=params.DatasetShuffle,
+                    DatasetBatchSize=params.DatasetBatchSize,
+                ))
+            return params_records
+
+        def build_layers_records(params_chunk: Sequence[PipelineParams]) -> Iterator[Layers]:
+            for params in params_chunk:
+                params_id = params_ids[(params.Hash, code_version)]
+                for layer_index, layer_params in zip(params.Stack.keys(), params.Stack.values()):
+                    yield Layers(
+                        ParamsID=params_id,
+                        LayerIndex=layer_index,
+                        Units=layer_params.Units,
+                        KernelInitializer=stringify_callable(layer_params.KernelInitializer),
+                        KernelRegularizer=stringify_callable(layer_params.KernelRegularizer),
+                        Activation=stringify_callable(layer_params.Activation),
+                    )
+
+        params_ids = {}
+        with self.__db_manager.begin() as session:
+            for params_chunk in Helper.split_in_chunks(pipeline_params, self._config.store_chunk_size):
+                stored_signatures = self.__db_manager.insert_returning(
+                    build_params_records(params_chunk),
+                    conflict_columns=[Params.Hash, Params.CodeVersion],
+                    returning_columns=[Params.ID, Params.Hash, Params.CodeVersion],
+                    session=session)
+                for signature in stored_signatures:
+                    params_ids[(signature.Hash, signature.CodeVersion)] = signature.ID
+                self.__db_manager.bulk_insert(build_layers_records(params_chunk), session=session)
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'stored_params: {len(params_ids)}')
+
+        return params_ids
+
+    @staticmethod
+    def __get_done_condition(session: Session, code_version: str) -> ColumnElement[bool]:
+        # trained, completed, or running under a lease that has not expired yet (leases use the server time)
+        server_now = DBManager.build_utc_now(session.connection().dialect.name)
+        in_progress_condition = and_(States.Status == StatusType.RUNNING,
+                                     or_(States.LeaseExpiresOn.is_(None), States.LeaseExpiresOn >= server_now))
+        done_states_ids = select(States.ParamsID).where(or_(States.Status == StatusType.COMPLETED,
+                                                            in_progress_condition))
+        return and_(Params.CodeVersion == code_version,
+                    or_(Params.ID.in_(select(Training.ParamsID)), Params.ID.in_(done_states_ids)))
+
+    @base_method
+    def __load_done_hashes(self, code_version: str) -> set[str] | BloomFilter:
+        with self.__db_manager.begin() as session:
+            done_condition = self.__get_done_condition(session, code_version)
+            done_count = session.execute(select(func.count()).select_from(Params).where(done_condition)).scalar_one()
+            bloom_threshold = self._config.skip_filter_bloom_threshold
+            if bloom_threshold is not None and done_count > bloom_threshold:
+                done_hashes = BloomFilter(done_count, self._config.skip_filter_bloom_false_positive_rate)
+            else:
+                done_hashes = set()
+            # streamed, so the whole history never has to be held as rows
+            hashes_result = session.execute(select(Params.Hash)
+                                            .where(done_condition)
+                                            .execution_options(yield_per=self._config.skip_filter_stream_chunk_size))
+            done_hashes.update(hashes_result.scalars())
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'done_hashes: {len(done_hashes)} '
+                                                     f'({done_hashes.__class__.__name__})')
+        return done_hashes
+
+    @base_method
+    def __confirm_done_hashes(self, code_version: str, candidate_hashes: Sequence[str]) -> set[str]:
+        with self.__db_manager.begin() as session:
+            confirmed_hashes = session.execute(select(Params.Hash)
+                                               .where(self.__get_done_condition(session, code_version),
+                                                      Params.Hash.in_(candidate_hashes))).scalars()
+            return set(confirmed_hashes)
+
+    @base_method
+    def filter_pending(self,
+                       pipeline_params: Iterable[PipelineParams]) -> tuple[Iterator[PipelineParams], SkipSummary]:
+        # the summary is filled in while the returned iterator is consumed
+        code_version = self._config.code_version or Helper.get_code_version()
+        done_hashes = self.__load_done_hashes(code_version)
+        skip_summary = SkipSummary(known_hashes=len(done_hashes))
+
+        def filter_set() -> Iterator[PipelineParams]:
+            for params in pipeline_params:
+                skip_summary.total += 1
+                if params.Hash in done_hashes:
+                    skip_summary.skipped += 1
+                else:
+                    yield params
+
+        def filter_bloom() -> Iterator[PipelineParams]:
+            # Bloom filter hits are confirmed against the db in chunks, keeping the original order
+            for params_chunk in Helper.split_in_chunks(pipeline_params, self._config.skip_filter_confirm_chunk_size):
+                candidate_hashes = [params.Hash for params in params_chunk if params.Hash in done_hashes]
+                confirmed_hashes = self.__confirm_done_hashes(code_version, candidate_hashes) \
+                    if len(candidate_hashes) > 0 else set()
+                pending_chunk = [params for params in params_chunk if params.Hash not in confirmed_hashes]
+                skip_summary.total += len(params_chunk)
+                skip_summary.skipped += len(params_chunk) - len(pending_chunk)
+                skip_summary.false_positives += len(candidate_hashes) - (len(params_chunk) - len(pending_chunk))
+                yield from pending_chunk
+
+        def log_summary(pending_params: Iterator[PipelineParams]) -> Iterator[PipelineParams]:
+            yield from pending_params
+            self._logger.info(TermLoggerType.ALL, f'Skipped combinations: {skip_summary.skipped} '
+                                                  f'of {skip_summary.total} | pending: {skip_summary.pending}')
+
+        pending_params = filter_bloom() if isinstance(done_hashes, BloomFilter) else filter_set()
+        return log_summary(pending_params), skip_summary
 
     @base_method
     def destroy(self):
         super().destroy()
-        self.__db_manager.destroy()
+        if self.__owns_db_manager:
+            self.__db_manager.destroy()
@@ -0,0 +1,118 @@
+import json
+import random
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+
+@dataclass
+class _CallStats:
+    calls: int = 0
+    inclusive_ns: int = 0
+    exclusive_ns: int = 0
+    samples_ns: list[int] = field(default_factory=list)
+
+
+class Profiler:
+    enabled: bool = True
+    samples_per_method: int = 1024
+    collapsed_stack_separator: str = ';'
+
+    __lock = threading.Lock()
+    __thread_state = threading.local()
+    __methods_stats: dict[str, _CallStats] = {}
+    __tree_stats: dict[tuple[str, ...], _CallStats] = {}
+    __random_generator = random.Random(0)
+
+    @classmethod
+    def __get_call_stack(cls) -> list[list]:
+        call_stack = getattr(cls.__thread_state, 'call_stack', None)
+        if call_stack is None:
+            call_stack = cls.__thread_state.call_stack = []
+        return call_stack
+
+    @classmethod
+    def enter(cls, name: str):
+        # each level keeps [name, children inclusive time]
+        cls.__get_call_stack().append([name, 0])
+
+    @classmethod
+    def exit(cls, elapsed_ns: int):
+        call_stack = cls.__get_call_stack()
+        path = tuple(map(lambda level: (level[0]), call_stack))
+        name, children_ns = call_stack.pop()
+        if len(call_stack) > 0:
+            call_stack[-1][1] += elapsed_ns
+        cls.__record(name, path, elapsed_ns, elapsed_ns - children_ns)
+
+    @classmethod
+    def record(cls, name: str, elapsed_ns: int):
+        # for calls that interleave on the same thread (e.g. coroutines), which cannot be nested in a call stack
+        cls.__record(name, (name,), elapsed_ns, elapsed_ns)
+
+    @classmethod
+    def __record(cls, name: str, path: tuple[str, ...], elapsed_ns: int, exclusive_ns: int):
+        with cls.__lock:
+            method_stats = cls.__methods_stats.setdefault(name, _CallStats())
+            method_stats.calls += 1
+            method_stats.inclusive_ns += elapsed_ns
+            method_stats.exclusive_ns += exclusive_ns
+            # reservoir sampling keeps percentiles representative with bounded memory
+            if len(method_stats.samples_ns) < cls.samples_per_method:
+                method_stats.samples_ns.append(elapsed_ns)
+            else:
+                sample_index = cls.__random_generator.randrange(method_stats.calls)
+                if sample_index < cls.samples_per_method:
+                    method_stats.samples_ns[sample_index] = elapsed_ns
+
+            node_stats = cls.__tree_stats.setdefault(path, _CallStats())
+            node_stats.calls += 1
+            node_stats.inclusive_ns += elapsed_ns
+            node_stats.exclusive_ns += exclusive_ns
+
+    @staticmethod
+    def __get_percentile(sorted_samples: list[int], percentile: float) -> int:
+        if len(sorted_samples) == 0:
+            return 0
+        return sorted_samples[min(len(sorted_samples) - 1, int(percentile / 100 * len(sorted_samples)))]
+
+    @classmethod
+    def get_report(cls, percentiles: tuple[float, ...] = (50, 90, 99)) -> dict[str, Any]:
+        with cls.__lock:
+            methods_report = {}
+            for name, method_stats in cls.__methods_stats.items():
+                sorted_samples = sorted(method_stats.samples_ns)
+                methods_report[name] = {
+                    'calls': method_stats.calls,
+                    'inclusive_ns': method_stats.inclusive_ns,
+                    'exclusive_ns': method_stats.exclusive_ns,
+                    'percentiles_ns': {f'p{percentile:g}': cls.__get_percentile(sorted_samples, percentile)
+                                       for percentile in percentiles},
+                }
+            tree_report = [{'path': list(path),
+                            'calls': node_stats.calls,
+                            'inclusive_ns': node_stats.inclusive_ns,
+                            'exclusive_ns': node_stats.exclusive_ns}
+                           for path, node_stats in cls.__tree_stats.items()]
+        return {'methods': methods_report, 'tree': tree_report}
+
+    @classmethod
+    def export_json(cls, path: Path):
+        with open(path, 'w') as json_file:
+            json.dump(cls.get_report(), json_file, indent=4)
+
+    @classmethod
+    def export_collapsed(cls, path: Path):
+        # "frame;frame;frame weight" lines, as consumed by flamegraph.pl and speedscope (weights in ns)
+        with cls.__lock:
+            lines = [f'{cls.collapsed_stack_separator.join(path)} {node_stats.exclusive_ns}'
+                     for path, node_stats in cls.__tree_stats.items()]
+        with open(path, 'w') as collapsed_file:
+            collapsed_file.write('\n'.join(lines) + '\n')
+
+    @classmethod
+    def reset(cls):
+        with cls.__lock:
+            cls.__methods_stats.clear()
+            cls.__tree_stats.clear()
@@ -0,0 +1,58 @@
+import math
+import random
+from collections.abc import Sequence
+from typing import Optional
+
+from source.libs.combination_space import CartesianProduct
+
+
+class GridSearch:
+    samples_count = 0  # the whole space, whatever its size
+
+    def select_indexes(self, space: CartesianProduct) -> Sequence[int]:
+        return range(len(space))
+
+
+class RandomSearch:
+
+    def __init__(self, samples_count: int, seed: Optional[int] = None):
+        self.__samples_count = samples_count
+        self.__seed = seed
+
+    @property
+    def samples_count(self) -> int:
+        return self.__samples_count
+
+    def select_indexes(self, space: CartesianProduct) -> Sequence[int]:
+        # sampling a range does not materialize the space
+        random_generator = random.Random(self.__seed)
+        return random_generator.sample(range(len(space)), min(self.__samples_count, len(space)))
+
+
+class LatinHypercubeSearch:
+
+    def __init__(self, samples_count: int, seed: Optional[int] = None):
+        self.__samples_count = samples_count
+        self.__seed = seed
+
+    @property
+    def samples_count(self) -> int:
+        return self.__samples_count
+
+    def select_indexes(self, space: CartesianProduct) -> Sequence[int]:
+        # every factor is split in samples_count strata and each stratum is drawn exactly once
+        random_generator = random.Random(self.__seed)
+        samples_count = min(self.__samples_count, len(space))
+        digits_per_factor = []
+        for radix in space.radixes:
+            strata = list(range(samples_count))
+            random_generator.shuffle(strata)
+            digits_per_factor.append([math.floor((stratum + random_generator.random()) / samples_count * radix)
+                                      for stratum in strata])
+
+        # factors with fewer values than samples repeat digits, so duplicated points are dropped
+        # and replaced by random ones, keeping the requested count (capped at the size of the space)
+        selected_indexes = dict.fromkeys(space.get_index(digits) for digits in zip(*digits_per_factor))
+        while len(selected_indexes) < samples_count:
+            selected_indexes.setdefault(random_generator.randrange(len(space)))
+        return list(selected_indexes.keys())
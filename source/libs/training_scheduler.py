@@ -0,0 +1,193 @@
+import multiprocessing
+import os
+import queue
+import time
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import select
+
+from source.db_tables import Params, Training
+from source.libs.base_class import BaseConfig, VerboseLevel, base_method, BaseClass
+from source.libs.db_manager import DBManager
+from source.libs.helper import Helper
+from source.types.logger_types import TermLoggerType
+from source.types.pipeline_params_types import PipelineParams
+
+_THREAD_BUDGET_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS')
+_INTER_OP_THREADS_ENV_VAR = 'TF_NUM_INTEROP_THREADS'
+
+
+@dataclass
+class Config(BaseConfig):
+    dbconn_dbname: str  # the database file for sqlite
+    dbconn_username: Optional[str] = None
+    dbconn_host: str = 'localhost'
+    dbconn_drivername: str = 'postgresql'  # or 'sqlite'
+    intra_op_threads_per_worker: int = 1
+    inter_op_threads_per_worker: int = 1
+    max_workers: Optional[int] = None  # None: available cores // intra_op_threads_per_worker
+    pin_workers_to_cores: bool = True
+    max_pending_tasks_per_worker: int = 2
+    results_batch_size: int = 16
+    code_version: Optional[str] = None  # None: resolved by Helper.get_code_version
+    mp_start_method: str = 'spawn'  # forking a process with an initialized backend is not safe
+
+
+def _initialize_worker(cores_queue: multiprocessing.Queue, intra_op_threads: int, inter_op_threads: int):
+    # must run before the training backend is imported, since it reads these on initialization
+    for env_var in _THREAD_BUDGET_ENV_VARS:
+        os.environ[env_var] = str(intra_op_threads)
+    os.environ[_INTER_OP_THREADS_ENV_VAR] = str(inter_op_threads)
+
+    try:
+        cores = cores_queue.get(timeout=1)
+    except queue.Empty:  # replacement workers run unpinned
+        cores = None
+    if cores is not None:
+        os.sched_setaffinity(0, cores)
+
+
+def _run_training(train_function: Callable[[PipelineParams], str | Path],
+                  pipeline_params: PipelineParams) -> tuple[str | Path, float]:
+    start_time = time.perf_counter()
+    model_path = train_function(pipeline_params)
+    return model_path, time.perf_counter() - start_time
+
+
+class TrainingScheduler(BaseClass):
+
+    def __init__(self,
+                 config: dict,
+                 db_manager: Optional[DBManager] = None,
+                 default_verbose_level: Optional[VerboseLevel] = None):
+        super().__init__(Config, config, default_verbose_level)
+
+        self.__db_manager = db_manager
+        self.__owns_db_manager = db_manager is None
+        if self.__owns_db_manager:
+            self.__initialize_dbm()
+
+        self._logger.info(TermLoggerType.ALL, f'{Helper.get_fully_qualified_name(self.__class__)} was initialized')
+
+    @base_method
+    def __initialize_dbm(self):
+        self.__db_manager = DBManager(config=DBManager.build_owned_config(self))
+
+    @base_method
+    def __allocate_cores(self) -> list[Optional[set[int]]]:
+        available_cores = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') \
+            else list(range(os.cpu_count() or 1))
+        threads_per_worker = self._config.intra_op_threads_per_worker
+        workers_count = self._config.max_workers or max(1, len(available_cores) // threads_per_worker)
+
+        cores_per_worker = []
+        for worker_index in range(workers_count):
+            worker_cores = None
+            if self._config.pin_workers_to_cores and hasattr(os, 'sched_setaffinity'):
+                first_core = (worker_index * threads_per_worker) % len(available_cores)
+                worker_cores = {available_cores[(first_core + offset) % len(available_cores)]
+                                for offset in range(threads_per_worker)}
+            cores_per_worker.append(worker_cores)
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'cores_per_worker: {cores_per_worker}')
+        return cores_per_worker
+
+    @staticmethod
+    def __build_training_record(params_id: int, model_path: str | Path, duration_in_sec: float) -> Training:
+        return Training(ParamsID=params_id,
+                        DurationString=str(timedelta(seconds=round(duration_in_sec))),
+                        DurationInSec=round(duration_in_sec),
+                        ModelPath=str(model_path))
+
+    @base_method
+    def __build_training_records(self,
+                                 code_version: str,
+                                 finished_results: Sequence[tuple[str, str | Path, float]]) -> list[Training]:
+        params_hashes = [params_hash for params_hash, _, _ in finished_results]
+        with self.__db_manager.begin() as session:
+            params_ids = dict(session.execute(select(Params.Hash, Params.ID)
+                                              .where(Params.CodeVersion == code_version,
+                                                     Params.Hash.in_(params_hashes))).tuples().all())
+
+        training_records = []
+        for params_hash, model_path, duration_in_sec in finished_results:
+            params_id = params_ids.get(params_hash)
+            if params_id is None:
+                self._logger.error(TermLoggerType.ALL, f'Params not stored for {params_hash} ({code_version}), '
+                                                       f'the training of {model_path} was not recorded')
+                continue
+            training_records.append(self.__build_training_record(params_id, model_path, duration_in_sec))
+        return training_records
+
+    @base_method
+    def run(self,
+            pipeline_params: Iterable[PipelineParams],
+            train_function: Callable[[PipelineParams], str | Path]) -> dict[str, str]:
+        code_version = self._config.code_version or Helper.get_code_version()
+        cores_per_worker = self.__allocate_cores()
+        mp_context = multiprocessing.get_context(self._config.mp_start_method)
+        cores_queue = mp_context.Queue()
+        for worker_cores in cores_per_worker:
+            cores_queue.put(worker_cores)
+
+        trained_models = {}
+        pending_results = []
+
+        def flush_results():
+            # the params IDs are resolved once per batch of results
+            training_records = self.__build_training_records(code_version, pending_results)
+            pending_results.clear()
+            # a retrained combination replaces its previous model
+            self.__db_manager.upsert(training_records, conflict_columns=[Training.ParamsID])
+
+        def collect(finished_futures: Iterable[Future]):
+            for future in finished_futures:
+                params = running_tasks.pop(future)
+                try:
+                    model_path, duration_in_sec = future.result()
+                except Exception as exception:
+                    self._logger.error(TermLoggerType.ALL, f'Training failed for {params.Hash}: {exception!r}')
+                    continue
+                trained_models[params.Hash] = str(model_path)
+                pending_results.append((params.Hash, model_path, duration_in_sec))
+                if self._dynamic_verbose_level != VerboseLevel.NONE:
+                    self._logger.debug(TermLoggerType.SHORT, f'{params.Hash} trained in {duration_in_sec:.3f}s')
+            if len(pending_results) >= self._config.results_batch_size:
+                flush_results()
+
+        # submissions are bounded so that lazy combination spaces are consumed as workers free up
+        max_running_tasks = len(cores_per_worker) * self._config.max_pending_tasks_per_worker
+        running_tasks: dict[Future, PipelineParams] = {}
+        try:
+            with ProcessPoolExecutor(max_workers=len(cores_per_worker),
+                                     mp_context=mp_context,
+                                     initializer=_initialize_worker,
+                                     initargs=(cores_queue,
+                                               self._config.intra_op_threads_per_worker,
+                                               self._config.inter_op_threads_per_worker)) as executor:
+                for params in pipeline_params:
+                    if len(running_tasks) >= max_running_tasks:
+                        finished_futures, _ = wait(running_tasks.keys(), return_when=FIRST_COMPLETED)
+                        collect(finished_futures)
+                    running_tasks[executor.submit(_run_training, train_function, params)] = params
+                while len(running_tasks) > 0:
+                    finished_futures, _ = wait(running_tasks.keys(), return_when=FIRST_COMPLETED)
+                    collect(finished_futures)
+        finally:
+            # results collected before an interruption are still recorded
+            if len(pending_results) > 0:
+                flush_results()
+        self._logger.info(TermLoggerType.ALL, f'Trained models: {len(trained_models)}')
+        return trained_models
+
+    @base_method
+    def destroy(self):
+        super().destroy()
+        if self.__owns_db_manager:
+            self.__db_manager.destroy()
@@ -0,0 +1,80 @@
+import math
+from collections.abc import Iterator
+from typing import Optional
+
+import numpy
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class InvalidWindowWidth(Exception):
+    pass
+
+
+class InvalidBatchSize(Exception):
+    pass
+
+
+class WindowDataset:
+
+    def __init__(self,
+                 features: numpy.ndarray,
+                 targets: numpy.ndarray,
+                 window_width: int,
+                 batch_size: int,
+                 shuffle: bool = False,
+                 target_offset: int = 1,
+                 seed: Optional[int] = None):
+        if window_width < 1:
+            raise InvalidWindowWidth(f'The window width must be at least 1, got {window_width}.')
+        samples_count = len(features) - window_width - target_offset + 1
+        if samples_count <= 0:
+            raise InvalidWindowWidth(f'A window width of {window_width} (target offset: {target_offset}) '
+                                     f'does not fit in {len(features)} rows, so there would be no samples.')
+        if batch_size < 1:
+            raise InvalidBatchSize(f'The batch size must be at least 1, got {batch_size}.')
+
+        self.__features = features
+        self.__targets = targets
+        self.__batch_size = batch_size
+        self.__shuffle = shuffle
+        self.__random_generator = numpy.random.default_rng(seed)
+
+        # strided views over the raw rows: (samples, window_width, features), nothing is materialized
+        windows = sliding_window_view(features, window_width, axis=0)
+        self.__windows = numpy.moveaxis(windows, -1, 1)[:samples_count]
+        self.__window_targets = targets[window_width - 1 + target_offset:][:samples_count]
+
+    @property
+    def windows(self) -> numpy.ndarray:
+        return self.__windows
+
+    @property
+    def targets(self) -> numpy.ndarray:
+        return self.__window_targets
+
+    @property
+    def samples_count(self) -> int:
+        return len(self.__windows)
+
+    @property
+    def nbytes(self) -> int:
+        # memory actually held, as opposed to the virtual size of the windows view
+        return self.__features.nbytes + self.__targets.nbytes
+
+    def __len__(self) -> int:
+        return math.ceil(self.samples_count / self.__batch_size)
+
+    def get_batch(self,
+                  batch_index: int,
+                  samples_order: Optional[numpy.ndarray] = None) -> tuple[numpy.ndarray, numpy.ndarray]:
+        batch_slice = slice(batch_index * self.__batch_size, (batch_index + 1) * self.__batch_size)
+        if samples_order is None:
+            return self.__windows[batch_slice], self.__window_targets[batch_slice]
+        # fancy indexing only copies the windows of this batch
+        batch_indexes = samples_order[batch_slice]
+        return self.__windows[batch_indexes], self.__window_targets[batch_indexes]
+
+    def __iter__(self) -> Iterator[tuple[numpy.ndarray, numpy.ndarray]]:
+        samples_order = self.__random_generator.permutation(self.samples_count) if self.__shuffle else None
+        for batch_index in range(len(self)):
+            yield self.get_batch(batch_index, samples_order)
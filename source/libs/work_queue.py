@@ -0,0 +1,156 @@
+import os
+import socket
+import uuid
+from collections.abc import Sequence, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, update, or_, and_, func, ColumnElement
+from sqlalchemy.orm import Session
+
+from source.db_tables import EnumStatus, States
+from source.libs.base_class import BaseConfig, VerboseLevel, base_method, BaseClass
+from source.libs.db_manager import DBManager
+from source.libs.helper import Helper
+from source.types.db_types import InsertResult
+from source.types.logger_types import TermLoggerType
+from source.types.status_types import StatusType
+
+
+@dataclass
+class Config(BaseConfig):
+    dbconn_dbname: str  # the database file for sqlite
+    dbconn_username: Optional[str] = None
+    dbconn_host: str = 'localhost'
+    dbconn_drivername: str = 'postgresql'  # or 'sqlite'
+    worker_name: Optional[str] = None  # defaults to the hostname, pid and a random suffix
+    lease_duration_in_sec: int = 300
+    lease_max_attempts: Optional[int] = None  # None: expired leases are always reclaimable, otherwise they fail
+
+
+class WorkQueue(BaseClass):
+
+    def __init__(self,
+                 config: dict,
+                 db_manager: Optional[DBManager] = None,
+                 default_verbose_level: Optional[VerboseLevel] = None):
+        super().__init__(Config, config, default_verbose_level)
+
+        self.__worker_name = self._config.worker_name or self.__build_worker_name()
+        self.__db_manager = db_manager
+        self.__owns_db_manager = db_manager is None
+        if self.__owns_db_manager:
+            self.__initialize_dbm()
+        self.__seed_statuses()
+
+        self._logger.info(TermLoggerType.ALL, f'{Helper.get_fully_qualified_name(self.__class__)} was initialized')
+
+    @base_method
+    def __initialize_dbm(self):
+        self.__db_manager = DBManager(config=DBManager.build_owned_config(self))
+
+    @base_method
+    def __seed_statuses(self):
+        with self.__db_manager.begin() as session:
+            for status_id, description in StatusType.DESCRIPTIONS.items():
+                session.merge(EnumStatus(ID=status_id, Description=description))
+
+    @staticmethod
+    def __build_worker_name() -> str:
+        # unique per process, so workers sharing a host never act on each other's leases
+        return f'{socket.gethostname()[:45]}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    @staticmethod
+    def __get_server_now(session: Session) -> ColumnElement[datetime]:
+        return DBManager.build_utc_now(session.connection().dialect.name)
+
+    def __get_lease_expiration(self, session: Session) -> ColumnElement[datetime]:
+        return DBManager.build_utc_now(session.connection().dialect.name, self._config.lease_duration_in_sec)
+
+    @staticmethod
+    def __get_attempts() -> ColumnElement[int]:
+        # rows written before the column existed, or without its default, count as never attempted
+        return func.coalesce(States.Attempts, 0)
+
+    def __fail_exhausted(self, session: Session) -> list[int]:
+        exhausted_stmt = (update(States)
+                          .where(States.Status == StatusType.RUNNING,
+                                 States.LeaseExpiresOn < self.__get_server_now(session),
+                                 self.__get_attempts() >= self._config.lease_max_attempts)
+                          .values(Status=StatusType.FAILED, LeaseExpiresOn=None)
+                          .returning(States.ParamsID))
+        failed_ids = list(session.execute(exhausted_stmt).scalars())
+        if len(failed_ids) > 0:
+            self._logger.warning(TermLoggerType.ALL, f'Failed after {self._config.lease_max_attempts} attempts: '
+                                                     f'{failed_ids}')
+        return failed_ids
+
+    @base_method
+    def enqueue(self, params_ids: Iterable[int]) -> InsertResult:
+        states_records = (States(ParamsID=params_id, Status=StatusType.PENDING, Attempts=0)
+                          for params_id in params_ids)
+        return self.__db_manager.bulk_insert(states_records)
+
+    @base_method
+    def claim_next(self, n: int = 1) -> list[int]:
+        with self.__db_manager.begin() as session:
+            if self._config.lease_max_attempts is not None:
+                self.__fail_exhausted(session)
+
+            expired_lease_condition = and_(States.Status == StatusType.RUNNING,
+                                           States.LeaseExpiresOn < self.__get_server_now(session))
+            # rows locked by other workers are skipped instead of waited on
+            claimable_ids = (select(States.ParamsID)
+                             .where(or_(States.Status == StatusType.PENDING, expired_lease_condition))
+                             .order_by(States.ParamsID)
+                             .limit(n)
+                             .with_for_update(skip_locked=True))
+            claim_stmt = (update(States)
+                          .where(States.ParamsID.in_(claimable_ids.scalar_subquery()))
+                          .values(Status=StatusType.RUNNING,
+                                  SetBy=self.__worker_name,
+                                  LeaseExpiresOn=self.__get_lease_expiration(session),
+                                  Attempts=self.__get_attempts() + 1)
+                          .returning(States.ParamsID))
+            claimed_ids = list(session.execute(claim_stmt).scalars())
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'claimed_ids ({self.__worker_name}): {claimed_ids}')
+        return claimed_ids
+
+    def __update_held(self, params_ids: Sequence[int], renew_lease: bool = False, **values) -> list[int]:
+        # only leases still held by this worker can be updated
+        with self.__db_manager.begin() as session:
+            if renew_lease:
+                values['LeaseExpiresOn'] = self.__get_lease_expiration(session)
+            update_stmt = (update(States)
+                           .where(States.ParamsID.in_(params_ids),
+                                  States.Status == StatusType.RUNNING,
+                                  States.SetBy == self.__worker_name)
+                           .values(**values)
+                           .returning(States.ParamsID))
+            updated_ids = list(session.execute(update_stmt).scalars())
+
+        if self._dynamic_verbose_level != VerboseLevel.NONE:
+            self._logger.debug(TermLoggerType.SHORT, f'updated_ids: {updated_ids} | values: {values}')
+        return updated_ids
+
+    @base_method
+    def heartbeat(self, params_ids: Sequence[int]) -> list[int]:
+        return self.__update_held(params_ids, renew_lease=True)
+
+    @base_method
+    def complete(self, params_ids: Sequence[int]) -> list[int]:
+        return self.__update_held(params_ids, Status=StatusType.COMPLETED, LeaseExpiresOn=None)
+
+    @base_method
+    def fail(self, params_ids: Sequence[int], requeue: bool = False) -> list[int]:
+        status = StatusType.PENDING if requeue else StatusType.FAILED
+        return self.__update_held(params_ids, Status=status, LeaseExpiresOn=None)
+
+    @base_method
+    def destroy(self):
+        super().destroy()
+        if self.__owns_db_manager:
+            self.__db_manager.destroy()
@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class InsertResult:
+    inserted: int = 0
+    skipped: int = 0
+
+    @property
+    def processed(self) -> int:
+        return self.inserted + self.skipped
+
+    def add(self, processed: int, inserted: int):
+        self.inserted += inserted
+        self.skipped += processed - inserted
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class SkipSummary:
+    total: int = 0
+    skipped: int = 0
+    known_hashes: int = 0
+    false_positives: int = 0  # only when a Bloom filter is used
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.skipped
@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class HashScheme:
+    LEGACY = 1  # md5 over the sorted "key=value" strings (Helper.generate_dict_hash)
+    CANONICAL = 2  # blake2b over cached per-value digests (ParamsHasher), prefixed with "v2-"
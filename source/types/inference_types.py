@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class InferenceMetrics:
+    requests: int = 0
+    batches: int = 0
+    errors: int = 0
+    mean_batch_size: float = 0.0
+    latency_p50_in_ms: float = 0.0
+    latency_p90_in_ms: float = 0.0
+    latency_p99_in_ms: float = 0.0
+    throughput_per_sec: float = 0.0
@@ -6,3 +6,17 @@ class TermLoggerType:
     SHORT = 0
     LONG = 1
     ALL = [SHORT, LONG]
+
+
+@dataclass(frozen=True)
+class TraceMode:
+    FULL = 'full'  # inspect.stack(): slow, kept as a reference implementation
+    FAST = 'fast'  # raw frames, resolved traces are cached per call site
+    OFF = 'off'
+
+
+@dataclass(frozen=True)
+class OverflowPolicy:
+    BLOCK = 'block'
+    DROP = 'drop'
+    SAMPLE = 'sample'  # keeps one of every "sample_every" overflowing entries, waiting for room
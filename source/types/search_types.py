@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+from source.types.pipeline_params_types import PipelineParams
+
+
+@dataclass
+class RungResult:
+    params: PipelineParams
+    bracket: int
+    rung: int
+    budget: int
+    score: float
+    promoted: bool = False
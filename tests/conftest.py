@@ -0,0 +1,51 @@
+import os
+import uuid
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+
+from source.libs.db_manager import DBManager
+
+POSTGRES_DBNAME_ENV_VAR = 'AITTD_TEST_PG_DBNAME'
+POSTGRES_USERNAME_ENV_VAR = 'AITTD_TEST_PG_USERNAME'
+POSTGRES_HOST_ENV_VAR = 'AITTD_TEST_PG_HOST'
+
+
+@pytest.fixture
+def logs_config(tmp_path: Path) -> Callable[[str], dict]:
+    # logger names are process-wide, so every instance created by a test gets its own log files
+    def build_logs_config(name: str) -> dict:
+        unique_name = f'{name}_{uuid.uuid4().hex[:8]}'
+        return {'logs_folder': tmp_path,
+                'short_term_logger_filename': f'{unique_name}_short_term.bwpylog',
+                'long_term_logger_filename': f'{unique_name}_long_term.bwpylog'}
+
+    return build_logs_config
+
+
+def get_postgres_config() -> dict:
+    if POSTGRES_DBNAME_ENV_VAR not in os.environ:
+        pytest.skip(f'{POSTGRES_DBNAME_ENV_VAR} is not set')
+    return {'conn_drivername': 'postgresql',
+            'conn_dbname': os.environ[POSTGRES_DBNAME_ENV_VAR],
+            'conn_username': os.environ.get(POSTGRES_USERNAME_ENV_VAR),
+            'conn_host': os.environ.get(POSTGRES_HOST_ENV_VAR, 'localhost')}
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def conn_config(request: pytest.FixtureRequest, tmp_path: Path) -> dict:
+    # sqlite always runs; postgres only when a test database is configured, since its tables are dropped
+    if request.param == 'sqlite':
+        return {'conn_drivername': 'sqlite', 'conn_dbname': str(tmp_path / 'aittd.db')}
+    return get_postgres_config()
+
+
+@pytest.fixture
+def db_manager(conn_config: dict, logs_config: Callable[[str], dict]) -> Iterator[DBManager]:
+    db_manager = DBManager(config={**conn_config, **logs_config('DBManager')})
+    db_manager.drop_all_tables()
+    db_manager.create_all_tables()
+    yield db_manager
+    db_manager.drop_all_tables()
+    db_manager.destroy()
@@ -0,0 +1,97 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy
+import pytest
+
+from source.libs.artifact_store import ArtifactStore, ArtifactNotFound
+
+
+def build_store(tmp_path: Path, **config) -> ArtifactStore:
+    return ArtifactStore({'folder': tmp_path / 'artifacts', **config})
+
+
+def build_arrays(seed: int, size: int = 1000) -> list[numpy.ndarray]:
+    generator = numpy.random.default_rng(seed)
+    return [generator.random((size, 4)).astype(numpy.float32), numpy.arange(size, dtype=numpy.int64)]
+
+
+def assert_arrays_equal(actual: list[numpy.ndarray], expected: list[numpy.ndarray]):
+    assert len(actual) == len(expected)
+    for actual_array, expected_array in zip(actual, expected):
+        assert actual_array.dtype == expected_array.dtype
+        numpy.testing.assert_array_equal(actual_array, expected_array)
+
+
+def test_round_trip(tmp_path):
+    artifact_store = build_store(tmp_path)
+    arrays = build_arrays(0)
+
+    uri = artifact_store.put(arrays)
+
+    assert uri == artifact_store.build_uri(ArtifactStore.get_digest(arrays))
+    mapped_arrays = artifact_store.load(uri)
+    assert all(isinstance(array, numpy.memmap) for array in mapped_arrays)
+    assert_arrays_equal(mapped_arrays, arrays)
+    assert_arrays_equal(artifact_store.load(artifact_store.parse_uri(uri), mmap=False), arrays)
+    with pytest.raises(ArtifactNotFound):
+        artifact_store.load(artifact_store.build_uri('0' * 40))
+
+
+def test_identical_arrays_are_stored_once(tmp_path):
+    artifact_store = build_store(tmp_path)
+    arrays = build_arrays(0)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        uris = set(executor.map(lambda _: artifact_store.put([array.copy() for array in arrays]), range(8)))
+
+    assert len(uris) == 1
+    assert artifact_store.get_usage()['objects'] == 1
+    # the copies compressed by the writers that lost the race were not left behind
+    assert list((tmp_path / 'artifacts' / 'objects').glob('*/*.tmp.npz')) == []
+    assert artifact_store.put(build_arrays(1)) not in uris
+    assert artifact_store.get_usage()['objects'] == 2
+
+
+def get_object_paths(tmp_path: Path) -> dict[str, Path]:
+    return {object_path.stem: object_path for object_path in (tmp_path / 'artifacts' / 'objects').glob('*/*.npz')}
+
+
+def test_garbage_collection_keeps_protected_digests(tmp_path):
+    artifact_store = build_store(tmp_path)
+    uris = [artifact_store.put(build_arrays(seed)) for seed in range(4)]
+    digests = list(map(artifact_store.parse_uri, uris))
+    object_bytes = artifact_store.get_usage()['bytes'] // len(uris)
+    # one access per second, oldest first, since a fast enough filesystem gives them all the same mtime
+    for access_index, digest in enumerate(digests):
+        os.utime(get_object_paths(tmp_path)[digest], (access_index, access_index))
+
+    # the least recently used unprotected ones go first, until the store fits
+    artifact_store.load(uris[0])
+    assert artifact_store.collect_garbage(protected=[uris[1]], max_bytes=int(2.5 * object_bytes)) > 0
+    assert set(get_object_paths(tmp_path)) == {digests[0], digests[1]}
+    assert artifact_store.collect_garbage(protected=uris, max_bytes=0) == 0
+
+    assert artifact_store.collect_garbage(protected=[digests[1]], remove_unprotected=True) > 0
+    assert set(get_object_paths(tmp_path)) == {digests[1]}
+    assert_arrays_equal(artifact_store.load(uris[1]), build_arrays(1))
+    with pytest.raises(ArtifactNotFound):
+        artifact_store.load(uris[0])
+
+
+def test_mapped_arrays_survive_eviction(tmp_path):
+    arrays = [build_arrays(seed, size=10_000) for seed in range(3)]
+    extracted_bytes = sum(array.nbytes for array in arrays[0])
+    artifact_store = build_store(tmp_path, extracted_max_bytes=int(1.5 * extracted_bytes))
+    uris = [artifact_store.put(seed_arrays) for seed_arrays in arrays]
+
+    # only one extracted copy fits, so each load evicts the previous one
+    mapped_arrays = [artifact_store.load(uri) for uri in uris[:2]]
+    assert not (tmp_path / 'artifacts' / 'extracted' / artifact_store.parse_uri(uris[0])).exists()
+    assert artifact_store.collect_garbage(protected=[uris[2]], remove_unprotected=True) > 0
+
+    for seed_mapped_arrays, seed_arrays in zip(mapped_arrays, arrays):
+        assert_arrays_equal(seed_mapped_arrays, seed_arrays)
+    usage = artifact_store.get_usage()
+    assert (usage['objects'], usage['extracted_bytes']) == (1, 0)
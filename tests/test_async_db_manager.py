@@ -0,0 +1,110 @@
+import asyncio
+from collections.abc import Callable, Awaitable
+from typing import Any
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from source.db_tables import EnumStatus, Params, States
+from source.libs.async_db_manager import AsyncDBManager
+from source.libs.base_class import VerboseLevel
+from source.libs.db_manager import DBManager, RecordsMismatchException
+from source.types.status_types import StatusType
+
+
+ASYNC_DRIVERNAMES = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+psycopg'}
+
+
+@pytest.fixture
+def async_db_config(conn_config: dict, db_manager: DBManager, logs_config: Callable[[str], dict]) -> dict:
+    # the same database as db_manager, through an asyncio capable driver
+    with db_manager.begin() as session:
+        for status_id, description in StatusType.DESCRIPTIONS.items():
+            session.merge(EnumStatus(ID=status_id, Description=description))
+    return {**conn_config, 'conn_drivername': ASYNC_DRIVERNAMES[conn_config['conn_drivername']],
+            **logs_config('AsyncDBManager')}
+
+
+def run_scenario(config: dict, scenario: Callable[[AsyncDBManager], Awaitable[Any]]) -> Any:
+    async def run():
+        async_db_manager = AsyncDBManager(config)
+        try:
+            return await scenario(async_db_manager)
+        finally:
+            await async_db_manager.destroy()
+
+    return asyncio.run(run())
+
+
+def build_params(first_index: int, count: int) -> list[Params]:
+    return [Params(Hash=f'hash_{index}', CodeVersion='v1') for index in range(first_index, first_index + count)]
+
+
+def test_session_commits_or_rolls_back_as_a_whole(async_db_config):
+    async def scenario(async_db_manager: AsyncDBManager):
+        async with async_db_manager.begin() as session:
+            insert_result = await async_db_manager.insert(build_params(0, 5), chunk_size=2, session=session)
+        with pytest.raises(RuntimeError):
+            async with async_db_manager.begin() as session:
+                await async_db_manager.insert(build_params(5, 5), session=session)
+                raise RuntimeError('interrupted')
+        return insert_result, await async_db_manager.get_columns([Params.Hash])
+
+    insert_result, stored_params = run_scenario(async_db_config, scenario)
+
+    assert (insert_result.inserted, insert_result.skipped) == (5, 0)
+    assert set(stored_params['Hash']) == {params.Hash for params in build_params(0, 5)}
+
+
+def test_concurrent_writes_and_reads(async_db_config):
+    async def scenario(async_db_manager: AsyncDBManager):
+        writes = async_db_manager.insert_concurrently(build_params(0, 50), chunk_size=7)
+        reads = [async_db_manager.get_columns([Params.ID]) for _ in range(4)]
+        insert_result, *_ = await asyncio.gather(writes, *reads)
+        reinsert_result = await async_db_manager.insert_concurrently(build_params(0, 50), chunk_size=7)
+
+        params_ids = list((await async_db_manager.get_columns([Params.ID]))['ID'])
+        await async_db_manager.insert_concurrently([States(ParamsID=params_id, Status=StatusType.PENDING)
+                                                    for params_id in params_ids], chunk_size=7)
+        statuses = {params_id: StatusType.RUNNING if index % 2 else StatusType.COMPLETED
+                    for index, params_id in enumerate(params_ids)}
+        updated_count = await async_db_manager.update_states(statuses, set_by='worker', chunk_size=7)
+        return insert_result, reinsert_result, updated_count, statuses, \
+            await async_db_manager.get_columns([States.ParamsID, States.Status, States.SetBy])
+
+    config = {**async_db_config, 'max_concurrent_writes': 2, 'pool_size': 3}
+    insert_result, reinsert_result, updated_count, statuses, stored_states = run_scenario(config, scenario)
+
+    assert (insert_result.inserted, insert_result.skipped) == (50, 0)
+    assert (reinsert_result.inserted, reinsert_result.skipped) == (0, 50)
+    assert updated_count == 50
+    assert dict(zip(stored_states['ParamsID'], stored_states['Status'])) == statuses
+    assert set(stored_states['SetBy']) == {'worker'}
+
+
+def test_errors_propagate_and_only_fail_their_own_chunk(async_db_config):
+    async def scenario(async_db_manager: AsyncDBManager):
+        with pytest.raises(RecordsMismatchException):
+            await async_db_manager.insert([*build_params(0, 1), States(ParamsID=1)])
+        # a single write at a time, so the chunks before the invalid one are all committed
+        with pytest.raises(IntegrityError):
+            await async_db_manager.insert_concurrently([*build_params(0, 6), Params(Hash='no_code_version')],
+                                                       chunk_size=3)
+        return await async_db_manager.get_columns([Params.Hash])
+
+    stored_params = run_scenario({**async_db_config, 'max_concurrent_writes': 1}, scenario)
+
+    assert set(stored_params['Hash']) == {params.Hash for params in build_params(0, 6)}
+
+
+def test_verbose_level_only_applies_to_its_own_call(async_db_config):
+    async def scenario(async_db_manager: AsyncDBManager):
+        await asyncio.gather(async_db_manager.insert(build_params(0, 2), verbose_level=VerboseLevel.LOCAL),
+                             async_db_manager.insert(build_params(2, 2)))
+
+    run_scenario(async_db_config, scenario)
+
+    log_path = async_db_config['logs_folder'] / async_db_config['short_term_logger_filename']
+    log_lines = log_path.read_text().splitlines()
+    assert sum('Calling: insert' in log_line for log_line in log_lines) == 1
+    assert sum('insert_result: InsertResult(inserted=2, skipped=0)' in log_line for log_line in log_lines) == 1
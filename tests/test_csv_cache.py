@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pandas
+from pandas import DataFrame
+
+from source.libs.csv_cache import CsvCache
+
+
+class CountingParser:
+
+    def __init__(self):
+        self.parsed_paths = []
+
+    def parse(self, path: Path) -> DataFrame:
+        self.parsed_paths.append(path)
+        return pandas.read_csv(path)
+
+
+def write_csv(path: Path, rows_count: int) -> Path:
+    DataFrame({'Time': pandas.date_range('2024-01-01', periods=rows_count, freq='h').astype(str),
+               'Value': range(rows_count)}).to_csv(path, index=False)
+    return path
+
+
+def get_entries_bytes(cache_folder: Path) -> int:
+    return sum(entry_path.stat().st_size for entry_path in cache_folder.glob('*.feather'))
+
+
+def test_unchanged_files_are_read_from_the_cache(tmp_path):
+    csv_path = write_csv(tmp_path / 'dataset.csv', 100)
+    counting_parser = CountingParser()
+    csv_cache = CsvCache({'folder': tmp_path / 'cache'})
+
+    missed_dataframe, was_cached_on_miss = csv_cache.load(csv_path, counting_parser.parse)
+    hit_dataframe, was_cached_on_hit = csv_cache.load(csv_path, counting_parser.parse)
+    # the index is on disk, so other instances (e.g. other workers) share it
+    shared_dataframe, was_cached_by_other = CsvCache({'folder': tmp_path / 'cache'}).load(csv_path,
+                                                                                          counting_parser.parse)
+
+    assert (was_cached_on_miss, was_cached_on_hit, was_cached_by_other) == (False, True, True)
+    assert counting_parser.parsed_paths == [csv_path]
+    pandas.testing.assert_frame_equal(hit_dataframe, missed_dataframe)
+    pandas.testing.assert_frame_equal(shared_dataframe, missed_dataframe)
+
+
+def test_changed_files_are_parsed_again(tmp_path):
+    csv_path = write_csv(tmp_path / 'dataset.csv', 100)
+    counting_parser = CountingParser()
+    csv_cache = CsvCache({'folder': tmp_path / 'cache'})
+    csv_cache.load(csv_path, counting_parser.parse)
+
+    write_csv(csv_path, 50)
+    changed_dataframe, was_cached = csv_cache.load(csv_path, counting_parser.parse)
+
+    assert not was_cached
+    assert len(changed_dataframe) == 50
+    assert counting_parser.parsed_paths == [csv_path, csv_path]
+    # the same content under another name is the same entry
+    _, was_cached_copy = csv_cache.load(write_csv(tmp_path / 'copy.csv', 50), counting_parser.parse)
+    assert was_cached_copy
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    csv_paths = [write_csv(tmp_path / f'dataset_{rows_count}.csv', rows_count) for rows_count in (1000, 1001, 1002)]
+    counting_parser = CountingParser()
+    CsvCache({'folder': tmp_path / 'probe'}).load(csv_paths[0], pandas.read_csv)
+    entry_bytes = get_entries_bytes(tmp_path / 'probe')
+    csv_cache = CsvCache({'folder': tmp_path / 'cache', 'max_bytes': int(2.5 * entry_bytes)})
+
+    for csv_path in [*csv_paths, csv_paths[0]]:
+        csv_cache.load(csv_path, counting_parser.parse)
+
+    # the third entry evicted the first one, which had to be parsed again
+    assert counting_parser.parsed_paths == [*csv_paths, csv_paths[0]]
+    assert get_entries_bytes(tmp_path / 'cache') <= int(2.5 * entry_bytes)
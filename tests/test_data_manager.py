@@ -0,0 +1,86 @@
+from collections.abc import Callable
+from datetime import datetime
+from typing import Optional
+
+import pandas
+import pytest
+from pandas import DataFrame
+
+from source.libs.data_manager import DataManager, UnsortedTimeField
+
+ROWS_COUNT = 48
+
+
+def build_dataframe(rows_count: int = ROWS_COUNT) -> DataFrame:
+    return DataFrame({'Time': pandas.date_range('2024-01-01', periods=rows_count, freq='h').astype(str),
+                      'Value': [float(index) for index in range(rows_count)]})
+
+
+def build_manager(logs_config: Callable[[str], dict], dataframe: Optional[DataFrame] = None, **config) -> DataManager:
+    return DataManager(config={'default_field_name': 'Time', **logs_config('DataManager'), **config},
+                       dataframe=dataframe)
+
+
+TIME_RANGES = [(datetime(2024, 1, 1, 5), datetime(2024, 1, 1, 17)),
+               (None, datetime(2024, 1, 2, 3, 30)),
+               (datetime(2024, 1, 1, 23, 59), None),
+               (datetime(2023, 1, 1), datetime(2023, 6, 1)),
+               (None, None)]
+
+
+@pytest.mark.parametrize('time_from, time_to', TIME_RANGES)
+@pytest.mark.parametrize('count_from_start, count_to_end', [(None, None), (8, None), (None, 3), (8, 3)])
+def test_indexed_time_filter_matches_the_mask(logs_config, time_from, time_to, count_from_start, count_to_end):
+    def filter_rows(use_index: bool) -> DataFrame:
+        return build_manager(logs_config, build_dataframe()).time_filter(time_from=time_from, time_to=time_to,
+                                                                         count_from_start=count_from_start,
+                                                                         count_to_end=count_to_end,
+                                                                         use_index=use_index)
+
+    pandas.testing.assert_frame_equal(filter_rows(use_index=True), filter_rows(use_index=False))
+
+
+def test_unsorted_time_field_fallbacks(logs_config):
+    unsorted_dataframe = build_dataframe().sample(frac=1, random_state=0)
+    time_from, time_to = TIME_RANGES[0]
+    masked_rows = build_manager(logs_config, unsorted_dataframe).time_filter(time_from=time_from, time_to=time_to)
+
+    def filter_rows(unsorted_fallback: str) -> DataFrame:
+        return build_manager(logs_config, unsorted_dataframe, time_filter_unsorted_fallback=unsorted_fallback) \
+            .time_filter(time_from=time_from, time_to=time_to, use_index=True)
+
+    pandas.testing.assert_frame_equal(filter_rows('mask'), masked_rows)
+    pandas.testing.assert_frame_equal(filter_rows('sort'), masked_rows.sort_values('Time'))
+    with pytest.raises(UnsortedTimeField):
+        filter_rows('raise')
+
+
+@pytest.mark.parametrize('time_from, time_to', TIME_RANGES)
+@pytest.mark.parametrize('assume_sorted', [False, True])
+def test_chunked_range_read_matches_a_full_read(tmp_path, logs_config, time_from, time_to, assume_sorted):
+    csv_path = tmp_path / 'dataset.csv'
+    build_dataframe().to_csv(csv_path, index=False)
+    data_manager = build_manager(logs_config)
+    data_manager.load_csv(csv_path)
+    expected_rows = data_manager.time_filter(time_from=time_from, time_to=time_to)
+
+    # chunks that do not divide the rows evenly, so a range can start and end inside any of them
+    range_rows = build_manager(logs_config).load_csv_range(csv_path, time_from=time_from, time_to=time_to,
+                                                           chunk_size=7, assume_sorted=assume_sorted)
+
+    pandas.testing.assert_frame_equal(range_rows, expected_rows)
+
+
+def test_chunked_range_read_of_an_unsorted_file(tmp_path, logs_config):
+    csv_path = tmp_path / 'dataset.csv'
+    unsorted_dataframe = build_dataframe().sample(frac=1, random_state=0)
+    unsorted_dataframe.to_csv(csv_path, index=False)
+    time_from, time_to = TIME_RANGES[0]
+
+    # the file is not sorted after all, so reading must not stop at the first row past time_to
+    range_rows = build_manager(logs_config).load_csv_range(csv_path, time_from=time_from, time_to=time_to,
+                                                           columns=['Value'], chunk_size=5, assume_sorted=True)
+
+    expected_values = build_dataframe()['Value'].iloc[5:17]
+    assert list(range_rows.columns) == ['Time', 'Value']
+    assert sorted(range_rows['Value']) == list(expected_values)
@@ -0,0 +1,63 @@
+import pandas
+import pyarrow
+import pytest
+from sqlalchemy import select, func
+
+from source.db_tables import Params
+from source.libs.db_manager import UnsupportedReadFormat
+
+
+def build_params(indexes: range, code_version: str = 'v1') -> list[Params]:
+    return [Params(Hash=f'hash_{index}', CodeVersion=code_version, WindowWidth=index % 7 or None)
+            for index in indexes]
+
+
+def test_bulk_insert_counts_inserted_and_skipped_rows(db_manager):
+    db_manager.insert(build_params(range(0, 500)))
+
+    # in several chunks, the first of which overlaps rows that already exist
+    insert_result = db_manager.bulk_insert(build_params(range(250, 2250)), chunk_size=300)
+
+    assert (insert_result.inserted, insert_result.skipped) == (1750, 250)
+    with db_manager.begin() as session:
+        rows_count, window_widths_count, created_on_count = session.execute(
+            select(func.count(), func.count(Params.WindowWidth), func.count(Params.CreatedOn))).one()
+    # NULLs are kept, and client-side defaults are filled in for every row
+    assert (rows_count, created_on_count) == (2250, 2250)
+    assert window_widths_count == sum(1 for index in range(2250) if index % 7 != 0)
+    assert db_manager.bulk_insert(build_params(range(0, 10))).inserted == 0
+    assert db_manager.bulk_insert(build_params(range(0, 10), code_version='v2')).inserted == 10
+
+
+def test_bulk_insert_of_nothing(db_manager):
+    insert_result = db_manager.bulk_insert(iter([]))
+
+    assert (insert_result.inserted, insert_result.skipped) == (0, 0)
+
+
+def test_iter_columns_streams_every_row_in_chunks(db_manager):
+    db_manager.bulk_insert(build_params(range(2500)))
+    db_manager.bulk_insert(build_params(range(100), code_version='v2'))
+    columns = [Params.Hash, Params.WindowWidth]
+    filter_criterion = [Params.CodeVersion == 'v1']
+    expected_rows = db_manager.get_columns(columns, filter_criterion)
+    null_window_widths_count = sum(1 for index in range(2500) if index % 7 == 0)
+
+    pandas_chunks = list(db_manager.iter_columns(columns, filter_criterion, chunk_size=1000))
+    arrow_chunks = list(db_manager.iter_columns(columns, filter_criterion, chunk_size=1000, output_format='arrow'))
+
+    assert list(map(len, pandas_chunks)) == [1000, 1000, 500]
+    assert [arrow_chunk.num_rows for arrow_chunk in arrow_chunks] == [1000, 1000, 500]
+    pandas_rows = pandas.concat(pandas_chunks)
+    assert sorted(pandas_rows['Hash']) == sorted(expected_rows['Hash'])
+    # integer columns with NULLs keep their type instead of falling back to floats
+    assert str(pandas_rows['WindowWidth'].dtype) == 'Int64'
+    assert pandas_rows['WindowWidth'].isna().sum() == null_window_widths_count
+    assert all(arrow_chunk.schema.field('WindowWidth').type == pyarrow.int64() for arrow_chunk in arrow_chunks)
+    assert sum(arrow_chunk.column('WindowWidth').null_count for arrow_chunk in arrow_chunks) == \
+           null_window_widths_count
+
+
+def test_iter_columns_rejects_unknown_formats(db_manager):
+    with pytest.raises(UnsupportedReadFormat):
+        db_manager.iter_columns([Params.Hash], output_format='csv')
@@ -0,0 +1,69 @@
+import sqlite3
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+from source.db_tables import States
+from source.libs.db_manager import DBManager
+from source.libs.engine_registry import EngineRegistry, SchemaMismatch
+
+# the tables as first released, before leases (States) and the search columns (Params) were added
+BASELINE_SCHEMA = '''
+CREATE TABLE "EnumStatus" ("ID" INTEGER NOT NULL PRIMARY KEY, "Description" VARCHAR(128),
+                           "CreatedOn" DATETIME, "UpdatedOn" DATETIME);
+CREATE TABLE "Params" ("ID" INTEGER NOT NULL PRIMARY KEY, "Hash" VARCHAR(128) NOT NULL,
+                       "CodeVersion" VARCHAR(64) NOT NULL, "WindowWidth" INTEGER,
+                       "CreatedOn" DATETIME, "UpdatedOn" DATETIME{params_constraints});
+CREATE TABLE "States" ("ParamsID" INTEGER NOT NULL PRIMARY KEY REFERENCES "Params" ("ID"),
+                       "Status" INTEGER REFERENCES "EnumStatus" ("ID"), "SetBy" VARCHAR(64),
+                       "CreatedOn" DATETIME, "UpdatedOn" DATETIME);
+INSERT INTO "EnumStatus" ("ID", "Description") VALUES (1, 'Pending');
+INSERT INTO "Params" ("ID", "Hash", "CodeVersion", "WindowWidth") VALUES (1, 'hash', 'v1', 60);
+INSERT INTO "States" ("ParamsID", "Status") VALUES (1, 1);
+'''
+
+
+def create_baseline_database(database_path: Path, params_constraints: str = ', UNIQUE ("Hash", "CodeVersion")'):
+    with sqlite3.connect(database_path) as connection:
+        connection.executescript(BASELINE_SCHEMA.format(params_constraints=params_constraints))
+    connection.close()
+
+
+def open_db_manager(database_path: Path, logs_config: Callable[[str], dict]) -> DBManager:
+    return DBManager(config={'conn_drivername': 'sqlite', 'conn_dbname': str(database_path),
+                             **logs_config('DBManager')})
+
+
+def get_recorded_fingerprints(database_path: Path) -> list[str]:
+    with sqlite3.connect(database_path) as connection:
+        return [row[0] for row in connection.execute('SELECT "Fingerprint" FROM "SchemaVersions"')]
+
+
+def test_baseline_database_is_migrated(tmp_path, logs_config):
+    database_path = tmp_path / 'baseline.db'
+    create_baseline_database(database_path)
+
+    db_manager = open_db_manager(database_path, logs_config)
+    with db_manager.begin() as session:
+        migrated_state = session.execute(select(States.ParamsID, States.LeaseExpiresOn, States.Attempts)).one()
+    db_manager.destroy()
+
+    assert tuple(migrated_state) == (1, None, 0)
+    with sqlite3.connect(database_path) as connection:
+        states_indexes = {row[1] for row in connection.execute('PRAGMA index_list("States")')}
+        params_columns = {row[1] for row in connection.execute('PRAGMA table_info("Params")')}
+    assert 'ix_States_Status_LeaseExpiresOn' in states_indexes
+    assert {'ColToPredict', 'DatasetPath', 'FitMaxEpochs'} <= params_columns
+    assert get_recorded_fingerprints(database_path) == [EngineRegistry.get_schema_fingerprint(DBManager.Base.metadata)]
+
+
+def test_schema_is_not_recorded_when_it_cannot_be_migrated(tmp_path, logs_config):
+    database_path = tmp_path / 'baseline.db'
+    create_baseline_database(database_path, params_constraints='')
+
+    with pytest.raises(SchemaMismatch, match=r'Params\(CodeVersion, Hash\)'):
+        open_db_manager(database_path, logs_config)
+
+    assert get_recorded_fingerprints(database_path) == []
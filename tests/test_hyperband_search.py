@@ -0,0 +1,83 @@
+import dataclasses
+import math
+from collections import Counter
+from collections.abc import Callable
+
+from sqlalchemy import select
+
+from source.db_tables import Params, SearchRungs
+from source.libs.db_manager import DBManager
+from source.libs.hyperband_search import HyperbandSearch
+from source.types.hash_types import HashScheme
+from source.types.pipeline_params_types import PipelineParams
+from test_pipeline_params_manager import COMBINATIONS, build_manager
+
+# 12 window widths x 2 units x 2 shuffles, enough for the largest bracket
+HYPERBAND_COMBINATIONS = dataclasses.replace(COMBINATIONS, WindowWidth=list(range(10, 130, 10)), FitMaxEpochs=[9])
+
+
+def build_search(db_manager: DBManager, logs_config: Callable[[str], dict], **config) -> HyperbandSearch:
+    return HyperbandSearch(config={'dbconn_dbname': 'unused', 'search_name': 'search', 'reduction_factor': 3,
+                                   'seed': 0, **logs_config('HyperbandSearch'), **config},
+                           pipeline_params_manager=build_manager(db_manager, logs_config, HashScheme.CANONICAL, 'v1'),
+                           db_manager=db_manager)
+
+
+def evaluate(params: PipelineParams) -> float:
+    # a loss that only depends on the combination, so the best ones are known in advance
+    return params.WindowWidth + params.Stack[0].Units / 100
+
+
+def test_hyperband_rungs(db_manager, logs_config):
+    hyperband_search = build_search(db_manager, logs_config)
+
+    results = hyperband_search.run_hyperband(HYPERBAND_COMBINATIONS, evaluate)
+
+    # eta 3 and budgets from 1 to 9: 3 brackets, of 9, 5 and 3 candidates
+    rungs = Counter((result.bracket, result.rung, result.budget) for result in results)
+    assert rungs == {(2, 0, 1): 9, (2, 1, 3): 3, (2, 2, 9): 1, (1, 0, 3): 5, (1, 1, 9): 1, (0, 0, 9): 3}
+    promotions = Counter((result.bracket, result.rung) for result in results if result.promoted)
+    assert promotions == {(2, 0): 3, (2, 1): 1, (1, 0): 1}
+    # each rung trains with its own budget, hence its own hash
+    assert all(result.params.FitMaxEpochs == result.budget for result in results)
+    assert len({result.params.Hash for result in results}) == len({(result.params.WindowWidth,
+                                                                    result.params.Stack[0].Units,
+                                                                    result.params.DatasetShuffle,
+                                                                    result.budget) for result in results})
+
+    # the best of each rung is promoted
+    for (bracket, rung), promoted_count in promotions.items():
+        rung_results = [result for result in results if (result.bracket, result.rung) == (bracket, rung)]
+        best_scores = sorted(result.score for result in rung_results)[:promoted_count]
+        assert sorted(result.score for result in rung_results if result.promoted) == best_scores
+    best_result = hyperband_search.get_best(results)
+    assert best_result.budget == 9
+    assert best_result.score == min(result.score for result in results if result.budget == 9)
+
+    with db_manager.begin() as session:
+        stored_rungs = session.execute(select(SearchRungs.Bracket, SearchRungs.Rung, SearchRungs.Budget,
+                                              SearchRungs.Promoted, Params.FitMaxEpochs)
+                                       .join(Params, Params.ID == SearchRungs.ParamsID)).all()
+    assert Counter((bracket, rung, budget) for bracket, rung, budget, _, _ in stored_rungs) == rungs
+    assert sum(promoted for _, _, _, promoted, _ in stored_rungs) == sum(promotions.values())
+    assert all(budget == fit_max_epochs for _, _, budget, _, fit_max_epochs in stored_rungs)
+
+
+def test_successive_halving_skips_failed_evaluations(db_manager, logs_config):
+    hyperband_search = build_search(db_manager, logs_config, min_budget=1, max_budget=9)
+    pipeline_params_manager = build_manager(db_manager, logs_config, HashScheme.CANONICAL, 'v1')
+    candidates = list(pipeline_params_manager.unfold_combinations(HYPERBAND_COMBINATIONS))[:9]
+
+    def failing_evaluate(params: PipelineParams) -> float:
+        if params.WindowWidth == 10:
+            raise ValueError('diverged')
+        return evaluate(params)
+
+    results = hyperband_search.run_successive_halving(candidates, failing_evaluate)
+
+    # the failed evaluation would have been the best one: it scores NaN and the next ones are promoted instead
+    first_rung = [result for result in results if result.rung == 0]
+    assert [math.isnan(result.score) for result in first_rung] == [True] + [False] * 8
+    assert [result.params.WindowWidth for result in first_rung if result.promoted] == [20, 30, 40]
+    assert [(result.params.WindowWidth, result.budget) for result in results if result.rung > 0] == \
+           [(20, 3), (30, 3), (40, 3), (20, 9)]
@@ -0,0 +1,121 @@
+import json
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Callable
+from typing import Optional
+
+import numpy
+import pytest
+
+from source.db_tables import Params, Training
+from source.libs.db_manager import DBManager
+from source.libs.inference_server import (InferenceServer, InvalidWindowShape, PredictionsMismatch,
+                                          InferenceServerStopped, PredictFunction)
+
+WINDOW_WIDTH = 4
+FEATURES_COUNT = 3
+
+
+class StubModel:
+
+    def __init__(self, delay_in_sec: float = 0.0, predictions_count: Optional[int] = None):
+        self.batch_sizes = []
+        self.__delay_in_sec = delay_in_sec
+        self.__predictions_count = predictions_count
+
+    def load(self, _: str) -> tuple[PredictFunction, int]:
+        return self.predict, FEATURES_COUNT
+
+    def predict(self, windows: numpy.ndarray) -> numpy.ndarray:
+        self.batch_sizes.append(len(windows))
+        time.sleep(self.__delay_in_sec)
+        return windows.sum(axis=(1, 2))[:self.__predictions_count]
+
+
+def build_server(db_manager: DBManager,
+                 logs_config: Callable[[str], dict],
+                 stub_model: StubModel,
+                 **config) -> InferenceServer:
+    db_manager.insert([Params(Hash='hash', CodeVersion='v1', WindowWidth=WINDOW_WIDTH)])
+    db_manager.insert([Training(ParamsID=1, ModelPath='model.keras')])
+    return InferenceServer(config={'dbconn_dbname': 'unused', 'params_hash': 'hash', 'code_version': 'v1',
+                                   **logs_config('InferenceServer'), **config},
+                           model_loader=stub_model.load,
+                           db_manager=db_manager)
+
+
+def build_window(value: float) -> numpy.ndarray:
+    return numpy.full((WINDOW_WIDTH, FEATURES_COUNT), value)
+
+
+def test_concurrent_requests_are_batched(db_manager, logs_config):
+    stub_model = StubModel()
+    inference_server = build_server(db_manager, logs_config, stub_model, max_batch_size=4, max_wait_in_ms=500)
+
+    futures = [inference_server.submit(build_window(value)) for value in range(8)]
+    predictions = [future.result(timeout=5) for future in futures]
+    inference_server.destroy()
+
+    assert predictions == [value * WINDOW_WIDTH * FEATURES_COUNT for value in range(8)]
+    assert stub_model.batch_sizes == [4, 4]
+    metrics = inference_server.get_metrics()
+    assert (metrics.requests, metrics.batches, metrics.errors, metrics.mean_batch_size) == (8, 2, 0, 4.0)
+
+
+def test_windows_of_another_shape_are_rejected(db_manager, logs_config):
+    inference_server = build_server(db_manager, logs_config, StubModel())
+
+    for shape in [(WINDOW_WIDTH + 1, FEATURES_COUNT), (WINDOW_WIDTH, FEATURES_COUNT + 1), (WINDOW_WIDTH,)]:
+        with pytest.raises(InvalidWindowShape):
+            inference_server.submit(numpy.zeros(shape))
+    inference_server.destroy()
+
+
+def test_destroy_answers_queued_requests_then_rejects_new_ones(db_manager, logs_config):
+    stub_model = StubModel(delay_in_sec=0.05)
+    inference_server = build_server(db_manager, logs_config, stub_model, max_batch_size=2, queue_max_size=3)
+
+    # more requests than the queue holds, so some are still queued when the stop signal is sent
+    futures = [inference_server.submit(build_window(1)) for _ in range(10)]
+    inference_server.destroy()
+
+    assert [future.result(timeout=0) for future in futures] == [WINDOW_WIDTH * FEATURES_COUNT] * 10
+    with pytest.raises(InferenceServerStopped):
+        inference_server.submit(build_window(1))
+
+
+def test_missing_predictions_fail_the_whole_batch(db_manager, logs_config):
+    inference_server = build_server(db_manager, logs_config, StubModel(predictions_count=1),
+                                    max_batch_size=3, max_wait_in_ms=500)
+
+    futures = [inference_server.submit(build_window(value)) for value in range(3)]
+    for future in futures:
+        with pytest.raises(PredictionsMismatch):
+            future.result(timeout=5)
+    inference_server.destroy()
+
+    metrics = inference_server.get_metrics()
+    assert (metrics.requests, metrics.errors) == (0, 3)
+
+
+def test_http_front_end(db_manager, logs_config):
+    inference_server = build_server(db_manager, logs_config, StubModel(), http_port=0)
+    host, port = inference_server.http_address
+
+    def post_window(window: list) -> tuple[int, dict]:
+        request = urllib.request.Request(f'http://{host}:{port}/predict',
+                                         data=json.dumps({'window': window}).encode('utf-8'),
+                                         method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as error:
+            return error.code, json.load(error)
+
+    assert post_window(build_window(2).tolist()) == (200, {'prediction': 2.0 * WINDOW_WIDTH * FEATURES_COUNT})
+    status, payload = post_window([[1.0] * (FEATURES_COUNT + 1)] * WINDOW_WIDTH)
+    assert status == 400 and 'features' in payload['error']
+    with urllib.request.urlopen(f'http://{host}:{port}/metrics', timeout=5) as response:
+        assert json.load(response)['requests'] == 1
+    inference_server.destroy()
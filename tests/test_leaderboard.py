@@ -0,0 +1,94 @@
+from collections.abc import Callable
+
+from sqlalchemy import select
+
+from source.db_tables import Params, Layers, Training, EpochMetrics
+from source.libs.db_manager import DBManager
+from source.libs.leaderboard import Leaderboard
+
+# hash: (window width, units per layer, validation loss per epoch)
+HISTORY = {'a': (60, (64, 32, 1), (0.9, 0.4, 0.5)),
+           'b': (60, (64, 32, 1), (0.8, 0.3)),
+           'c': (120, (16, 1), (0.6, 0.2, 0.25, 0.3)),
+           'd': (120, (32, 64, 1), (0.7,)),
+           'e': (60, (16, 1), ())}
+
+
+def store_history(db_manager: DBManager, history: dict, code_version: str) -> dict[str, int]:
+    db_manager.insert([Params(Hash=params_hash, CodeVersion=code_version, WindowWidth=window_width)
+                       for params_hash, (window_width, _, _) in history.items()])
+    with db_manager.begin() as session:
+        params_ids = dict(session.execute(select(Params.Hash, Params.ID)
+                                          .where(Params.CodeVersion == code_version)).all())
+
+    # layers are stored in reverse, so the stack shape cannot rely on the insertion order
+    db_manager.insert([Layers(ParamsID=params_ids[params_hash], LayerIndex=layer_index, Units=units)
+                       for params_hash, (_, stack, _) in history.items()
+                       for layer_index, units in reversed(list(enumerate(stack)))])
+    store_epochs(db_manager, params_ids, history)
+    db_manager.insert([Training(ParamsID=params_id, DurationInSec=10 * params_id) for params_id in params_ids.values()])
+    return params_ids
+
+
+def store_epochs(db_manager: DBManager, params_ids: dict[str, int], history: dict, first_epoch: int = 0):
+    epochs_records = [EpochMetrics(ParamsID=params_ids[params_hash], Epoch=first_epoch + epoch,
+                                   Loss=val_loss / 2, ValLoss=val_loss)
+                      for params_hash, (_, _, val_losses) in history.items()
+                      for epoch, val_loss in enumerate(val_losses)]
+    if len(epochs_records) > 0:
+        db_manager.insert(epochs_records)
+
+
+def build_leaderboard(db_manager: DBManager, logs_config: Callable[[str], dict]) -> Leaderboard:
+    return Leaderboard(config={'dbconn_dbname': 'unused', 'code_version': 'v1', **logs_config('Leaderboard')},
+                       db_manager=db_manager)
+
+
+def test_refresh_summarizes_every_run(db_manager, logs_config):
+    params_ids = store_history(db_manager, HISTORY, 'v1')
+    store_history(db_manager, HISTORY, 'v2')
+    leaderboard = build_leaderboard(db_manager, logs_config)
+
+    assert leaderboard.refresh() == len(HISTORY)
+
+    top_k = leaderboard.get_top_k(len(HISTORY))
+    # runs without any epoch are summarized but not ranked
+    assert list(top_k['Hash']) == ['c', 'b', 'a', 'd']
+    assert list(top_k['Rank']) == [1, 2, 3, 4]
+    assert list(top_k['StackShape']) == ['16-1', '64-32-1', '64-32-1', '32-64-1']
+    assert list(top_k['LayersCount']) == [2, 3, 3, 3]
+    assert list(top_k['BestValLoss']) == [0.2, 0.3, 0.4, 0.7]
+    assert list(top_k['BestLoss']) == [0.1, 0.15, 0.2, 0.35]
+    assert list(top_k['EpochsCount']) == [4, 2, 3, 1]
+    assert list(top_k['DurationInSec']) == [10 * params_ids[params_hash] for params_hash in 'cbad']
+    assert list(leaderboard.get_top_k(2)['Hash']) == ['c', 'b']
+
+
+def test_get_top_k_per_group(db_manager, logs_config):
+    store_history(db_manager, HISTORY, 'v1')
+    leaderboard = build_leaderboard(db_manager, logs_config)
+    leaderboard.refresh()
+
+    top_k = leaderboard.get_top_k(1, group_by='StackShape')
+    assert dict(zip(top_k['StackShape'], top_k['Hash'])) == {'16-1': 'c', '32-64-1': 'd', '64-32-1': 'b'}
+    assert set(top_k['Rank']) == {1}
+
+    top_k = leaderboard.get_top_k(2, group_by='WindowWidth')
+    assert list(zip(top_k['WindowWidth'], top_k['Hash'], top_k['Rank'])) == [(60, 'b', 1), (60, 'a', 2),
+                                                                             (120, 'c', 1), (120, 'd', 2)]
+
+
+def test_refresh_picks_up_new_epochs(db_manager, logs_config):
+    params_ids = store_history(db_manager, HISTORY, 'v1')
+    leaderboard = build_leaderboard(db_manager, logs_config)
+    leaderboard.refresh()
+
+    store_epochs(db_manager, params_ids, {'d': (120, (32, 64, 1), (0.1,)), 'e': (60, (16, 1), (0.15, 0.5))},
+                 first_epoch=1)
+    # summaries are only rebuilt on refresh
+    assert list(leaderboard.get_top_k(2)['Hash']) == ['c', 'b']
+
+    assert leaderboard.refresh() == len(HISTORY)
+    top_k = leaderboard.get_top_k(len(HISTORY))
+    assert list(top_k['Hash']) == ['d', 'e', 'c', 'b', 'a']
+    assert list(top_k['EpochsCount']) == [2, 2, 4, 2, 3]
@@ -0,0 +1,73 @@
+from collections.abc import Callable
+
+from source.db_tables import EpochMetrics, Params
+from source.libs.db_manager import DBManager
+from source.libs.median_stopping_pruner import MedianStoppingPruner
+
+PEER_GROUP = {'CodeVersion': 'v1', 'DatasetPath': 'dataset.csv', 'DatasetTimeFilter': '2024-01',
+              'ColToPredict': 'Oracle', 'CompileLossFn': 'mse'}
+PEERS_COUNT = 6
+EPOCHS_COUNT = 5
+
+
+def build_pruner(db_manager: DBManager, logs_config: Callable[[str], dict], **config) -> MedianStoppingPruner:
+    return MedianStoppingPruner(config={'dbconn_dbname': 'unused', 'code_version': 'v1', 'warmup_epochs': 3,
+                                        'min_peers': 5, 'peers_refresh_interval_in_sec': 0,
+                                        **logs_config('MedianStoppingPruner'), **config},
+                                db_manager=db_manager)
+
+
+def store_params(db_manager: DBManager, params_hash: str, **peer_group) -> int:
+    return db_manager.insert_returning([Params(Hash=params_hash, **{**PEER_GROUP, **peer_group})],
+                                       conflict_columns=[Params.Hash, Params.CodeVersion],
+                                       returning_columns=[Params.ID])[0].ID
+
+
+def store_epochs(db_manager: DBManager, params_id: int, val_losses: list[float]):
+    db_manager.insert([EpochMetrics(ParamsID=params_id, Epoch=epoch, Loss=val_loss, ValLoss=val_loss)
+                       for epoch, val_loss in enumerate(val_losses)])
+
+
+def store_peers(db_manager: DBManager):
+    # the best losses of the comparable peers that reached each epoch are 1 to 6: a median of 3.5
+    for peer_index in range(PEERS_COUNT):
+        store_epochs(db_manager, store_params(db_manager, f'peer_{peer_index}'),
+                     [10.0] + [peer_index + 1.0] * (EPOCHS_COUNT - 1))
+    # none of these can lower the median: stopped early, or not comparable
+    store_epochs(db_manager, store_params(db_manager, 'stopped_early'), [0.1] * 3)
+    store_epochs(db_manager, store_params(db_manager, 'other_dataset', DatasetPath='other.csv'), [0.1] * EPOCHS_COUNT)
+    store_epochs(db_manager, store_params(db_manager, 'other_version', CodeVersion='v2'), [0.1] * EPOCHS_COUNT)
+
+
+def test_runs_above_the_peer_median_are_pruned(db_manager, logs_config):
+    store_peers(db_manager)
+    median_stopping_pruner = build_pruner(db_manager, logs_config)
+    better_id, worse_id = store_params(db_manager, 'better'), store_params(db_manager, 'worse')
+
+    # never during the warmup, however bad
+    assert not median_stopping_pruner.should_prune(worse_id, 1, 100.0)
+    assert not median_stopping_pruner.should_prune(better_id, 3, 3.0)
+    assert median_stopping_pruner.should_prune(worse_id, 3, 4.0)
+
+
+def test_best_value_so_far_is_compared(db_manager, logs_config):
+    store_peers(db_manager)
+    median_stopping_pruner = build_pruner(db_manager, logs_config)
+    noisy_id = store_params(db_manager, 'noisy')
+
+    # a single bad epoch after a good one does not stop the run, and missing values keep the best one
+    assert not median_stopping_pruner.should_prune(noisy_id, 2, 2.0)
+    assert not median_stopping_pruner.should_prune(noisy_id, 3, 50.0)
+    assert not median_stopping_pruner.should_prune(noisy_id, 4, None)
+
+
+def test_too_few_peers_or_unknown_runs_are_never_pruned(db_manager, logs_config):
+    store_peers(db_manager)
+    worse_id = store_params(db_manager, 'worse')
+
+    # the stopped, other-dataset and other-version runs are not counted as peers
+    assert not build_pruner(db_manager, logs_config, min_peers=PEERS_COUNT + 1).should_prune(worse_id, 3, 4.0)
+    # a peer is not its own peer
+    peer_id = store_params(db_manager, 'peer_5')
+    assert not build_pruner(db_manager, logs_config, min_peers=PEERS_COUNT).should_prune(peer_id, 3, 6.0)
+    assert not build_pruner(db_manager, logs_config).should_prune(worse_id + 1000, 3, 100.0)
@@ -0,0 +1,103 @@
+import logging
+import threading
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from source.libs.multi_rotating_logger import MultiRotatingLogger
+from source.types.logger_types import OverflowPolicy
+
+QUEUE_MAX_SIZE = 2
+
+
+class BlockingHandler(logging.Handler):
+    # holds the writer on its first entry, so the queue fills up deterministically
+
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.released = threading.Event()
+
+    def emit(self, record: logging.LogRecord):
+        self.entered.set()
+        self.released.wait(timeout=10)
+
+
+class BlockedLogger:
+
+    def __init__(self, tmp_path: Path, **async_config):
+        self.log_path = tmp_path / f'{uuid.uuid4().hex[:8]}.log'
+        logger_name = f'test_{self.log_path.stem}'
+        self.logger = MultiRotatingLogger([{'rfh_filename': self.log_path, 'logger_name': logger_name}],
+                                          async_config={'enabled': True, 'queue_max_size': QUEUE_MAX_SIZE,
+                                                        **async_config})
+        self.blocking_handler = BlockingHandler()
+        logging.getLogger(logger_name).addHandler(self.blocking_handler)
+
+        self.logger.info(0, 'entry_0')
+        assert self.blocking_handler.entered.wait(timeout=10)
+
+    def log_in_background(self, indexes: range) -> threading.Thread:
+        def log_entries():
+            for index in indexes:
+                self.logger.info(0, f'entry_{index}')
+
+        logging_thread = threading.Thread(target=log_entries)
+        logging_thread.start()
+        return logging_thread
+
+    def release(self, logging_thread: Optional[threading.Thread] = None) -> list[str]:
+        # the logging thread is done before the writer is stopped, so none of its entries come after the stop
+        self.blocking_handler.released.set()
+        if logging_thread is not None:
+            logging_thread.join()
+        self.logger.destroy()
+        return [line.split(': ')[-1] for line in self.log_path.read_text().splitlines()]
+
+
+@pytest.fixture
+def blocked_loggers() -> Iterator[list[BlockedLogger]]:
+    blocked_loggers = []
+    yield blocked_loggers
+    for blocked_logger in blocked_loggers:  # never leaves a writer waiting after a failed assertion
+        blocked_logger.blocking_handler.released.set()
+
+
+def test_drop_policy_discards_overflowing_entries(tmp_path, blocked_loggers):
+    blocked_loggers.append(blocked_logger := BlockedLogger(tmp_path, overflow_policy=OverflowPolicy.DROP))
+
+    for index in range(1, 11):
+        blocked_logger.logger.info(0, f'entry_{index}')
+
+    assert blocked_logger.logger.dropped_entries_count == 10 - QUEUE_MAX_SIZE
+    assert blocked_logger.release() == ['entry_0', 'entry_1', 'entry_2']
+
+
+def test_sample_policy_waits_for_one_of_every_n_overflowing_entries(tmp_path, blocked_loggers):
+    blocked_loggers.append(blocked_logger := BlockedLogger(tmp_path, overflow_policy=OverflowPolicy.SAMPLE,
+                                                           sample_every=4))
+
+    # entries 1 and 2 are queued, 3 to 5 are the first overflowing ones and are dropped
+    for index in range(1, 6):
+        blocked_logger.logger.info(0, f'entry_{index}')
+    # entry 6 is the fourth overflowing one: kept, so it waits for room
+    logging_thread = blocked_logger.log_in_background(range(6, 7))
+    logging_thread.join(timeout=0.2)
+    assert logging_thread.is_alive()
+
+    assert blocked_logger.release(logging_thread) == ['entry_0', 'entry_1', 'entry_2', 'entry_6']
+    assert blocked_logger.logger.dropped_entries_count == 3
+
+
+def test_block_policy_keeps_every_entry(tmp_path, blocked_loggers):
+    blocked_loggers.append(blocked_logger := BlockedLogger(tmp_path, overflow_policy=OverflowPolicy.BLOCK))
+
+    logging_thread = blocked_logger.log_in_background(range(1, 11))
+    logging_thread.join(timeout=0.2)
+    assert logging_thread.is_alive()
+
+    assert blocked_logger.release(logging_thread) == [f'entry_{index}' for index in range(11)]
+    assert blocked_logger.logger.dropped_entries_count == 0
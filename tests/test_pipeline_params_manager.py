@@ -0,0 +1,118 @@
+from collections.abc import Callable
+from pathlib import Path
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from source.db_tables import EnumStatus, Params, States, Training
+from source.libs.db_manager import DBManager
+from source.libs.pipeline_params_manager import PipelineParamsManager
+from source.types.hash_types import HashScheme
+from source.types.pipeline_params_types import PipelineParamsCombinations, LayerParamsCombinations
+from source.types.status_types import StatusType
+
+
+def activation():
+    pass
+
+
+def optimizer():
+    pass
+
+
+COMBINATIONS = PipelineParamsCombinations(
+    ColumnToPredict=['Oracle'],
+    WindowWidth=[60, 120],
+    SetTrainingFlag=[True],
+    UseResidualWrapper=[False],
+    PrependBatchNormLayer=[True],
+    FitMaxEpochs=[10],
+    FitPatience=[3],
+    CompileLossFunction=[activation],
+    CompileOptimizer=[optimizer],
+    Stack=[{0: LayerParamsCombinations(Units=[8, 16], Activation=[activation])}],
+    DatasetPath=[Path('dataset.csv')],
+    DatasetTimeFilter=[('2024-01-01 00:00', '2024-02-01 00:00')],
+    DatasetShuffle=[True, False],
+    DatasetBatchSize=[32])
+
+
+def build_manager(db_manager: DBManager,
+                  logs_config: Callable[[str], dict],
+                  hash_scheme: int,
+                  code_version: str,
+                  **config) -> PipelineParamsManager:
+    return PipelineParamsManager(config={'dbconn_dbname': 'unused',
+                                         'code_version': code_version,
+                                         'hash_scheme': hash_scheme,
+                                         **logs_config('PipelineParamsManager'),
+                                         **config},
+                                 db_manager=db_manager)
+
+
+def get_stored_hashes(db_manager: DBManager, code_version: str) -> set[str]:
+    with db_manager.begin() as session:
+        return set(session.execute(select(Params.Hash).where(Params.CodeVersion == code_version)).scalars())
+
+
+def test_migrate_legacy_hashes(db_manager, logs_config):
+    legacy_manager = build_manager(db_manager, logs_config, HashScheme.LEGACY, 'v1')
+    legacy_manager.store_in_db(legacy_manager.unfold_combinations(COMBINATIONS))
+    canonical_manager = build_manager(db_manager, logs_config, HashScheme.CANONICAL, 'v1')
+    canonical_hashes = {params.Hash for params in canonical_manager.unfold_combinations(COMBINATIONS)}
+
+    assert canonical_manager.migrate_legacy_hashes(COMBINATIONS) == len(canonical_hashes)
+    assert get_stored_hashes(db_manager, 'v1') == canonical_hashes
+    assert canonical_manager.migrate_legacy_hashes(COMBINATIONS) == 0
+
+
+def test_migrate_legacy_hashes_skips_rows_stored_again_canonically(db_manager, logs_config):
+    legacy_manager = build_manager(db_manager, logs_config, HashScheme.LEGACY, 'v1')
+    legacy_params = legacy_manager.unfold_combinations(COMBINATIONS)
+    legacy_manager.store_in_db(legacy_params)
+    other_version_manager = build_manager(db_manager, logs_config, HashScheme.LEGACY, 'v2')
+    other_version_manager.store_in_db(other_version_manager.unfold_combinations(COMBINATIONS))
+
+    # the usual case after upgrading: some combinations of v1 were already stored with the canonical hash
+    canonical_manager = build_manager(db_manager, logs_config, HashScheme.CANONICAL, 'v1')
+    canonical_params = canonical_manager.unfold_combinations(COMBINATIONS)
+    canonical_manager.store_in_db(canonical_params[:3])
+
+    migrated_count = canonical_manager.migrate_legacy_hashes(COMBINATIONS)
+
+    assert migrated_count == 2 * len(canonical_params) - 3
+    canonical_hashes = {params.Hash for params in canonical_params}
+    assert get_stored_hashes(db_manager, 'v2') == canonical_hashes
+    assert get_stored_hashes(db_manager, 'v1') == canonical_hashes | {params.Hash for params in legacy_params[:3]}
+
+
+@pytest.mark.parametrize('bloom_threshold', [None, 0])
+def test_filter_pending_skips_trained_and_leased_combinations(db_manager, logs_config, bloom_threshold):
+    pipeline_params_manager = build_manager(db_manager, logs_config, HashScheme.CANONICAL, 'v1',
+                                            skip_filter_bloom_threshold=bloom_threshold,
+                                            skip_filter_confirm_chunk_size=3)
+    pipeline_params = list(pipeline_params_manager.unfold_combinations(COMBINATIONS))
+    stored_ids = {params_hash: params_id
+                  for (params_hash, _), params_id in pipeline_params_manager.store_in_db(pipeline_params).items()}
+    params_ids = [stored_ids[params.Hash] for params in pipeline_params]
+    db_manager.insert([EnumStatus(ID=status_id, Description=description)
+                       for status_id, description in StatusType.DESCRIPTIONS.items()])
+    db_manager.insert([Training(ParamsID=params_ids[0], ModelPath='model.keras')])
+    db_manager.insert([States(ParamsID=params_ids[1], Status=StatusType.COMPLETED),
+                       States(ParamsID=params_ids[2], Status=StatusType.RUNNING, LeaseExpiresOn=datetime(2100, 1, 1)),
+                       # pending again: the lease expired, the run failed, or it was never claimed
+                       States(ParamsID=params_ids[3], Status=StatusType.RUNNING, LeaseExpiresOn=datetime(2000, 1, 1)),
+                       States(ParamsID=params_ids[4], Status=StatusType.FAILED),
+                       States(ParamsID=params_ids[5], Status=StatusType.PENDING)])
+
+    pending_params, skip_summary = pipeline_params_manager.filter_pending(iter(pipeline_params))
+
+    assert list(pending_params) == pipeline_params[3:]
+    assert (skip_summary.total, skip_summary.skipped, skip_summary.pending) == (len(pipeline_params), 3,
+                                                                                len(pipeline_params) - 3)
+    # another code version has trained nothing yet
+    other_version_manager = build_manager(db_manager, logs_config, HashScheme.CANONICAL, 'v2')
+    other_pending_params, _ = other_version_manager.filter_pending(pipeline_params)
+    assert len(list(other_pending_params)) == len(pipeline_params)
@@ -0,0 +1,90 @@
+import json
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import pytest
+
+from source.libs.base_class import BaseConfig, base_method, BaseClass
+from source.libs.profiler import Profiler
+
+
+@pytest.fixture(autouse=True)
+def profiler() -> Iterator[type[Profiler]]:
+    # the registry is process-wide, so every test starts from an empty one
+    Profiler.reset()
+    yield Profiler
+    Profiler.reset()
+
+
+@dataclass
+class Config(BaseConfig):
+    pass
+
+
+class Pipeline(BaseClass):
+
+    def __init__(self, config: dict):
+        super().__init__(Config, config, None)
+
+    @base_method
+    def run(self, steps_count: int) -> int:
+        return sum(self.step(step_index) for step_index in range(steps_count))
+
+    @base_method
+    def step(self, step_index: int) -> int:
+        return step_index
+
+
+def record_calls(name: str, elapsed_ns_values: range):
+    for elapsed_ns in elapsed_ns_values:
+        Profiler.enter(name)
+        Profiler.exit(elapsed_ns)
+
+
+def test_percentiles(profiler):
+    record_calls('method', range(100, 0, -1))
+
+    method_report = profiler.get_report(percentiles=(0, 50, 90, 99, 100))['methods']['method']
+
+    assert (method_report['calls'], method_report['inclusive_ns']) == (100, 5050)
+    assert method_report['percentiles_ns'] == {'p0': 1, 'p50': 51, 'p90': 91, 'p99': 100, 'p100': 100}
+
+
+def test_percentiles_of_sampled_calls(profiler, monkeypatch):
+    monkeypatch.setattr(Profiler, 'samples_per_method', 100)
+    record_calls('method', range(1, 10001))
+
+    method_report = profiler.get_report()['methods']['method']
+
+    # every call is counted, while the percentiles come from a bounded, representative sample
+    assert (method_report['calls'], method_report['inclusive_ns']) == (10000, 10000 * 10001 // 2)
+    percentiles_ns = method_report['percentiles_ns']
+    assert 3000 < percentiles_ns['p50'] < 7000
+    assert percentiles_ns['p50'] < percentiles_ns['p90'] <= percentiles_ns['p99'] <= 10000
+
+
+def test_nested_calls_split_inclusive_and_exclusive_time(profiler, tmp_path):
+    Profiler.enter('outer')
+    record_calls('inner', range(10, 40, 10))
+    Profiler.exit(100)
+
+    report = profiler.get_report()
+    assert (report['methods']['outer']['inclusive_ns'], report['methods']['outer']['exclusive_ns']) == (100, 40)
+    assert {tuple(node['path']): node['exclusive_ns'] for node in report['tree']} == {('outer',): 40,
+                                                                                     ('outer', 'inner'): 60}
+    profiler.export_collapsed(tmp_path / 'profile.folded')
+    assert (tmp_path / 'profile.folded').read_text().splitlines() == ['outer;inner 60', 'outer 40']
+    profiler.export_json(tmp_path / 'profile.json')
+    assert json.loads((tmp_path / 'profile.json').read_text()) == report
+
+
+def test_base_methods_are_profiled(profiler, logs_config):
+    assert Pipeline(logs_config('Pipeline')).run(5) == 10
+
+    report = profiler.get_report()
+    assert (report['methods']['Pipeline.run']['calls'], report['methods']['Pipeline.step']['calls']) == (1, 5)
+    assert {tuple(node['path']): node['calls'] for node in report['tree']} == {('Pipeline.run',): 1,
+                                                                               ('Pipeline.run', 'Pipeline.step'): 5}
+    run_report = report['methods']['Pipeline.run']
+    assert run_report['inclusive_ns'] >= report['methods']['Pipeline.step']['inclusive_ns']
+    assert run_report['exclusive_ns'] == run_report['inclusive_ns'] - report['methods']['Pipeline.step']['inclusive_ns']
@@ -0,0 +1,34 @@
+from collections import Counter
+
+import pytest
+
+from source.libs.combination_space import CartesianProduct
+from source.libs.search_strategies import GridSearch, RandomSearch, LatinHypercubeSearch
+
+SPACE = CartesianProduct({'units': range(5), 'window_width': range(10), 'shuffle': [True, False]})
+
+
+def test_grid_search_selects_the_whole_space():
+    assert list(GridSearch().select_indexes(SPACE)) == list(range(len(SPACE)))
+
+
+@pytest.mark.parametrize('search_class', [RandomSearch, LatinHypercubeSearch])
+def test_samples_are_distinct_reproducible_and_capped(search_class):
+    selected_indexes = search_class(5, seed=7).select_indexes(SPACE)
+
+    assert len(set(selected_indexes)) == 5
+    assert all(0 <= index < len(SPACE) for index in selected_indexes)
+    assert list(search_class(5, seed=7).select_indexes(SPACE)) == list(selected_indexes)
+    # more samples than combinations: the whole space, once
+    assert sorted(search_class(len(SPACE) + 10, seed=7).select_indexes(SPACE)) == list(range(len(SPACE)))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_latin_hypercube_draws_every_stratum_once(seed):
+    selected_digits = list(map(SPACE.get_digits, LatinHypercubeSearch(5, seed=seed).select_indexes(SPACE)))
+
+    # 5 values in 5 strata, and 10 values in 5 strata of 2
+    assert sorted(digits[0] for digits in selected_digits) == list(range(5))
+    assert sorted(digits[1] // 2 for digits in selected_digits) == list(range(5))
+    # 2 values in 5 samples: both are drawn, as evenly as the strata allow
+    assert sorted(Counter(digits[2] for digits in selected_digits).values()) == [2, 3]
@@ -0,0 +1,62 @@
+from collections.abc import Callable, Iterator
+
+import pytest
+from sqlalchemy import select
+
+from source.db_tables import Training
+from source.libs.db_manager import DBManager
+from source.libs.training_scheduler import TrainingScheduler
+from source.types.hash_types import HashScheme
+from source.types.pipeline_params_types import PipelineParams
+from test_pipeline_params_manager import COMBINATIONS, build_manager
+
+
+def train(pipeline_params: PipelineParams) -> str:
+    return f'models/{pipeline_params.Hash}.keras'
+
+
+def build_scheduler(db_manager: DBManager, logs_config: Callable[[str], dict]) -> TrainingScheduler:
+    return TrainingScheduler(config={'dbconn_dbname': 'unused', 'code_version': 'v1', 'max_workers': 1,
+                                     'max_pending_tasks_per_worker': 1, 'pin_workers_to_cores': False,
+                                     'results_batch_size': 100, **logs_config('TrainingScheduler')},
+                             db_manager=db_manager)
+
+
+def store_params(db_manager: DBManager,
+                 logs_config: Callable[[str], dict]) -> tuple[list[PipelineParams], dict[str, int]]:
+    pipeline_params_manager = build_manager(db_manager, logs_config, HashScheme.CANONICAL, 'v1')
+    pipeline_params = pipeline_params_manager.unfold_combinations(COMBINATIONS)
+    params_ids = pipeline_params_manager.store_in_db(pipeline_params)
+    return pipeline_params, {params_hash: params_id for (params_hash, _), params_id in params_ids.items()}
+
+
+def get_model_paths(db_manager: DBManager) -> dict[int, str]:
+    with db_manager.begin() as session:
+        return dict(session.execute(select(Training.ParamsID, Training.ModelPath)).all())
+
+
+def test_run_records_every_training_and_replaces_previous_ones(db_manager, logs_config):
+    pipeline_params, params_ids = store_params(db_manager, logs_config)
+    retrained_id = params_ids[pipeline_params[0].Hash]
+    db_manager.insert([Training(ParamsID=retrained_id, ModelPath='models/previous.keras', DurationInSec=100)])
+
+    trained_models = build_scheduler(db_manager, logs_config).run(pipeline_params, train)
+
+    expected_model_paths = {params.Hash: train(params) for params in pipeline_params}
+    assert trained_models == expected_model_paths
+    assert get_model_paths(db_manager) == {params_ids[params_hash]: model_path
+                                           for params_hash, model_path in expected_model_paths.items()}
+
+
+def test_run_records_collected_trainings_when_interrupted(db_manager, logs_config):
+    pipeline_params, params_ids = store_params(db_manager, logs_config)
+
+    def interrupted_params() -> Iterator[PipelineParams]:
+        yield from pipeline_params[:3]
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        build_scheduler(db_manager, logs_config).run(interrupted_params(), train)
+
+    # a single task runs at a time, so the first two were collected when the third was submitted
+    assert get_model_paths(db_manager) == {params_ids[params.Hash]: train(params) for params in pipeline_params[:2]}
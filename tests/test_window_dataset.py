@@ -0,0 +1,44 @@
+import numpy
+import pytest
+
+from source.libs.window_dataset import WindowDataset, InvalidWindowWidth, InvalidBatchSize
+
+ROWS_COUNT = 10
+
+
+def build_dataset(window_width: int = 3, batch_size: int = 4, **kwargs) -> WindowDataset:
+    features = numpy.arange(ROWS_COUNT * 2, dtype=numpy.float32).reshape(ROWS_COUNT, 2)
+    targets = numpy.arange(ROWS_COUNT, dtype=numpy.float32) * 10
+    return WindowDataset(features, targets, window_width, batch_size, **kwargs)
+
+
+def test_windows_are_views_batched_in_order():
+    window_dataset = build_dataset()
+
+    assert window_dataset.windows.shape == (ROWS_COUNT - 3, 3, 2)
+    assert not window_dataset.windows.flags.owndata
+    numpy.testing.assert_array_equal(window_dataset.windows[1], [[2, 3], [4, 5], [6, 7]])
+    # each window predicts the row right after it
+    numpy.testing.assert_array_equal(window_dataset.targets, numpy.arange(3, ROWS_COUNT) * 10)
+    assert [len(batch_windows) for batch_windows, _ in window_dataset] == [4, 3]
+    assert len(window_dataset) == 2
+
+
+def test_shuffled_batches_cover_every_sample_once():
+    window_dataset = build_dataset(batch_size=2, shuffle=True, seed=0)
+
+    shuffled_targets = numpy.concatenate([batch_targets for _, batch_targets in window_dataset])
+
+    assert sorted(shuffled_targets) == list(window_dataset.targets)
+
+
+@pytest.mark.parametrize('window_width, target_offset', [(0, 1), (-1, 1), (ROWS_COUNT, 1), (ROWS_COUNT - 2, 3)])
+def test_windows_that_do_not_fit_are_rejected(window_width, target_offset):
+    with pytest.raises(InvalidWindowWidth):
+        build_dataset(window_width=window_width, target_offset=target_offset)
+
+
+@pytest.mark.parametrize('batch_size', [0, -4])
+def test_invalid_batch_size_is_rejected(batch_size):
+    with pytest.raises(InvalidBatchSize, match='batch size'):
+        build_dataset(batch_size=batch_size)
@@ -0,0 +1,97 @@
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from source.db_tables import Params, States
+from source.libs.db_manager import DBManager
+from source.libs.work_queue import WorkQueue
+from source.types.status_types import StatusType
+
+PARAMS_COUNT = 20
+
+
+def store_params(db_manager: DBManager) -> list[int]:
+    db_manager.insert([Params(Hash=f'hash_{index}', CodeVersion='v1') for index in range(PARAMS_COUNT)])
+    with db_manager.begin() as session:
+        return list(session.execute(select(Params.ID).order_by(Params.ID)).scalars())
+
+
+def build_queue(db_manager: DBManager, logs_config: Callable[[str], dict], worker_name: str, **config) -> WorkQueue:
+    return WorkQueue(config={'dbconn_dbname': 'unused', 'worker_name': worker_name,
+                             **logs_config('WorkQueue'), **config},
+                     db_manager=db_manager)
+
+
+def expire_leases(db_manager: DBManager):
+    # as if the worker holding them had crashed long ago
+    with db_manager.begin() as session:
+        session.execute(update(States).where(States.Status == StatusType.RUNNING)
+                        .values(LeaseExpiresOn=datetime(2000, 1, 1)))
+
+
+def get_state(db_manager: DBManager, params_id: int) -> tuple:
+    with db_manager.begin() as session:
+        return tuple(session.execute(select(States.Status, States.SetBy, States.Attempts)
+                                     .where(States.ParamsID == params_id)).one())
+
+
+def test_concurrent_workers_claim_disjoint_rows(db_manager, logs_config):
+    params_ids = store_params(db_manager)
+    work_queues = [build_queue(db_manager, logs_config, f'worker_{index}') for index in range(4)]
+    assert work_queues[0].enqueue(params_ids).inserted == PARAMS_COUNT
+
+    def claim_all(work_queue: WorkQueue) -> list[int]:
+        claimed_ids = []
+        while len(next_ids := work_queue.claim_next(3)) > 0:
+            claimed_ids.extend(next_ids)
+        return claimed_ids
+
+    with ThreadPoolExecutor(max_workers=len(work_queues)) as executor:
+        claimed_ids_per_worker = list(executor.map(claim_all, work_queues))
+
+    all_claimed_ids = [params_id for claimed_ids in claimed_ids_per_worker for params_id in claimed_ids]
+    assert sorted(all_claimed_ids) == params_ids
+    for worker_index, claimed_ids in enumerate(claimed_ids_per_worker):
+        for params_id in claimed_ids:
+            assert get_state(db_manager, params_id) == (StatusType.RUNNING, f'worker_{worker_index}', 1)
+
+
+def test_expired_lease_is_reclaimed(db_manager, logs_config):
+    params_ids = store_params(db_manager)
+    first_queue = build_queue(db_manager, logs_config, 'first')
+    second_queue = build_queue(db_manager, logs_config, 'second')
+    first_queue.enqueue(params_ids[:1])
+
+    assert first_queue.claim_next() == params_ids[:1]
+    assert second_queue.claim_next() == []
+    # a heartbeat renews an expired lease that nobody reclaimed yet
+    expire_leases(db_manager)
+    assert first_queue.heartbeat(params_ids[:1]) == params_ids[:1]
+    assert second_queue.claim_next() == []
+
+    expire_leases(db_manager)
+    assert second_queue.claim_next() == params_ids[:1]
+    assert get_state(db_manager, params_ids[0]) == (StatusType.RUNNING, 'second', 2)
+    # the first worker lost the lease, so it can neither renew nor complete it
+    assert first_queue.heartbeat(params_ids[:1]) == []
+    assert first_queue.complete(params_ids[:1]) == []
+    assert second_queue.complete(params_ids[:1]) == params_ids[:1]
+    assert get_state(db_manager, params_ids[0]) == (StatusType.COMPLETED, 'second', 2)
+
+
+def test_exhausted_attempts_fail_the_row(db_manager, logs_config):
+    params_ids = store_params(db_manager)
+    work_queue = build_queue(db_manager, logs_config, 'worker', lease_max_attempts=2)
+    work_queue.enqueue(params_ids[:2])
+
+    assert work_queue.claim_next(2) == params_ids[:2]
+    expire_leases(db_manager)
+    assert work_queue.claim_next(2) == params_ids[:2]
+    assert work_queue.complete(params_ids[1:2]) == params_ids[1:2]
+    expire_leases(db_manager)
+
+    assert work_queue.claim_next(2) == []
+    assert get_state(db_manager, params_ids[0]) == (StatusType.FAILED, 'worker', 2)
+    assert get_state(db_manager, params_ids[1]) == (StatusType.COMPLETED, 'worker', 2)